@@ -1 +1,8 @@
-from django.contrib import admin
\ No newline at end of file
+from django.contrib import admin
+from .models import AnalysisJob
+
+@admin.register(AnalysisJob)
+class AnalysisJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'status', 'sentences_processed', 'sentences_total', 'created_at', 'updated_at')
+    list_filter = ('status',)
+    readonly_fields = ('result', 'error', 'sentences_total', 'sentences_processed', 'created_at', 'updated_at')
@@ -1,3 +1,5 @@
+import os
+import sys
 from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
@@ -5,9 +7,65 @@ class ApiConfig(AppConfig):
     name = 'api'
 
     detector = None
+    job_queue = None
+    analysis_sessions = None
+    admission = None
+
+    # manage.py commands that run the models, any other command (migrate, test, ...) skips loading them
+    MODEL_COMMANDS = {
+        'runserver', 'run_analysis_worker', 'audit_corpus', 'benchmark', 'distill_student',
+        'build_synonym_lexicon', 'build_embedding_table'
+    }
+
+    @classmethod
+    def process_role(cls):
+        """
+        'server' for processes serving requests, 'command' for manage.py commands that run
+        the models, None for everything else.
+        """
+        if os.path.basename(sys.argv[0]) != 'manage.py':
+            # gunicorn, uwsgi and other WSGI servers
+            return 'server'
+
+        command = sys.argv[1] if len(sys.argv) > 1 else None
+        if command == 'runserver':
+            # The autoreloader's parent process only watches files, the child serves
+            return 'server' if os.environ.get('RUN_MAIN') == 'true' or '--noreload' in sys.argv else None
+        return 'command' if command in cls.MODEL_COMMANDS else None
 
     def ready(self):
+        from django.conf import settings
+        from .utils.analysis_sessions import AnalysisSessions
+        from .utils.admission import AdmissionController
+
+        if ApiConfig.analysis_sessions is None:
+            ApiConfig.analysis_sessions = AnalysisSessions(settings.ANALYSIS_SESSION_MAX)
+
+        if ApiConfig.admission is None:
+            ApiConfig.admission = AdmissionController(
+                settings.ADMISSION_PROCESS_MAX_COST, settings.ADMISSION_PROCESS_CLIENT_CONCURRENCY, settings.ADMISSION_MAX_WORDS,
+                settings.ADMISSION_MODE_COST, settings.ADMISSION_DEGRADE_AT
+            )
+
+        role = self.process_role()
+        if role is None:
+            return
+
+        from .utils.runtime import configure_runtime
+
+        # Thread counts and CPU pinning have to be in place before torch is imported
+        configure_runtime()
+
         from .utils.bias_detector import BiasDetector
+        from .utils.job_queue import JobQueue
+        from .utils import warmup
 
         if ApiConfig.detector is None:
-            ApiConfig.detector = BiasDetector()
\ No newline at end of file
+            ApiConfig.detector = BiasDetector()
+            if settings.MODEL_WARMUP:
+                warmup.start_warm_up(ApiConfig.detector, settings.MODEL_COMPILE)
+            else:
+                warmup.mark_ready()
+
+        if ApiConfig.job_queue is None and role == 'server':
+            ApiConfig.job_queue = JobQueue(settings.ANALYSIS_JOB_WORKERS)
\ No newline at end of file
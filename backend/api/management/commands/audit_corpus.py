@@ -0,0 +1,181 @@
+import os
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from api.utils.document_reader import SUPPORTED_EXTENSIONS, extract_text
+from api.utils.runtime import setup_worker_process
+
+_worker_detector = None
+
+def _init_worker(counter, threads):
+    """
+    Runs once in every pool process. Each worker owns its own BiasDetector, loaded
+    through the regular app registry, and gets its own worker index and share of the
+    cores before the runtime is configured.
+    """
+    global _worker_detector
+    setup_worker_process(counter, threads)
+
+    from django.apps import apps
+    _worker_detector = apps.get_app_config('api').detector
+
+def _audit_chunk(root, rel_paths, ignored_texts, batch_size, detector=None):
+    """
+    Extracts and analyzes a chunk of files in one analyze_batch call. Files that cannot
+    be read are reported with an error instead of failing the whole chunk, and a failed
+    analysis is reported for every file of the chunk instead of failing the whole run.
+    """
+    detector = detector or _worker_detector
+    records = {}
+    readable = []
+
+    for rel_path in rel_paths:
+        try:
+            with open(os.path.join(root, rel_path), 'rb') as f:
+                text = extract_text(f, rel_path)
+            readable.append((rel_path, text))
+        except Exception as e:
+            records[rel_path] = {"path": rel_path, "error": str(e)}
+
+    if readable:
+        try:
+            analyses = detector.analyze_batch([text for _, text in readable], ignored_texts, batch_size=batch_size)
+        except Exception as e:
+            analyses = []
+            for rel_path, _ in readable:
+                records[rel_path] = {"path": rel_path, "error": f"Analysis failed: {e}"}
+        for (rel_path, _), analysis in zip(readable, analyses):
+            records[rel_path] = {
+                "path": rel_path,
+                "score": analysis["overall_score"],
+                "bias_count": analysis["bias_count"],
+                "word_count": analysis["word_count"],
+                "sentence_count": analysis["sentence_count"],
+                "biases": analysis["biases"],
+            }
+
+    return [records[p] for p in rel_paths]
+
+class Command(BaseCommand):
+    help = (
+        "Audits every .txt, .pdf and .docx file under a directory and writes one JSON line "
+        "per file. The output file doubles as the checkpoint: with --resume, files that "
+        "already have a result are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Directory to walk for documents.')
+        parser.add_argument('--output', default='audit.jsonl', help='JSONL file to write results to.')
+        parser.add_argument('--workers', type=int, default=1, help='Number of worker processes, each loading its own models.')
+        parser.add_argument('--threads', type=int, help='Torch threads per worker process. Defaults to TORCH_NUM_THREADS, or the cores divided by --workers.')
+        parser.add_argument('--chunk-size', type=int, default=16, help='Number of files analyzed per batch call.')
+        parser.add_argument('--batch-size', type=int, default=32, help='Model batch size inside each chunk.')
+        parser.add_argument('--ignore', nargs='*', default=[], help='Words/phrases to bypass.')
+        parser.add_argument('--resume', action='store_true', help='Skip files already present in the output file.')
+
+    def handle(self, *args, **options):
+        root = options['directory']
+        if not os.path.isdir(root):
+            raise CommandError(f"'{root}' is not a directory")
+
+        output = Path(options['output'])
+        files = self.collect_files(root)
+
+        done = self.load_checkpoint(output) if options['resume'] else set()
+        pending = [f for f in files if f not in done]
+
+        self.stdout.write(f"Found {len(files)} documents, {len(done)} already audited, {len(pending)} to go.")
+        if not pending:
+            return
+
+        chunk_size = max(1, options['chunk_size'])
+        chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+        mode = 'a' if options['resume'] else 'w'
+
+        with open(output, mode, encoding='utf-8') as out:
+            if mode == 'a' and output.stat().st_size and not self.ends_with_newline(output):
+                out.write("\n")
+
+            completed = 0
+            for records in self.run_chunks(root, chunks, options):
+                for record in records:
+                    out.write(json.dumps(record, default=self.json_default) + "\n")
+                out.flush()
+                os.fsync(out.fileno())
+
+                completed += len(records)
+                self.stdout.write(f"Audited {completed}/{len(pending)}")
+
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
+
+    def run_chunks(self, root, chunks, options):
+        ignored_texts = options['ignore']
+        batch_size = options['batch_size']
+
+        if options['workers'] <= 1:
+            from django.apps import apps
+            detector = apps.get_app_config('api').detector
+            for chunk in chunks:
+                yield _audit_chunk(root, chunk, ignored_texts, batch_size, detector)
+            return
+
+        threads = options['threads'] or settings.TORCH_NUM_THREADS or max(1, (os.cpu_count() or 1) // options['workers'])
+
+        # spawn rather than fork, torch and tokenizers do not survive forking a loaded process
+        context = multiprocessing.get_context('spawn')
+        counter = context.Value('i', 0)
+        with ProcessPoolExecutor(max_workers=options['workers'], mp_context=context, initializer=_init_worker, initargs=(counter, threads)) as pool:
+            futures = {pool.submit(_audit_chunk, root, chunk, ignored_texts, batch_size): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                try:
+                    records = future.result()
+                except Exception as e:
+                    # The worker died (e.g. out of memory); record the chunk so --resume retries it
+                    records = [{"path": rel_path, "error": f"Worker failed: {e}"} for rel_path in futures[future]]
+                yield records
+
+    @staticmethod
+    def collect_files(root):
+        files = []
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    files.append(os.path.relpath(os.path.join(dirpath, name), root))
+        return sorted(files)
+
+    @staticmethod
+    def load_checkpoint(output):
+        """
+        Returns the paths that already have a successful result. Errored files are
+        retried, and a line truncated by an interruption is ignored.
+        """
+        done = set()
+        if not output.exists():
+            return done
+
+        with open(output, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if "error" not in record:
+                    done.add(record["path"])
+        return done
+
+    @staticmethod
+    def ends_with_newline(path):
+        with open(path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    @staticmethod
+    def json_default(obj):
+        if hasattr(obj, 'item'):
+            return obj.item()
+        if hasattr(obj, 'tolist'):
+            return obj.tolist()
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
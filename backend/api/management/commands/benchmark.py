@@ -0,0 +1,353 @@
+import os
+import sys
+import json
+import time
+import platform
+import difflib
+import resource
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from api.utils.metrics import registry
+from api.utils.runtime import setup_worker_process
+from api.utils.agentic_communal_detector import DiscourseContext
+
+DEFAULT_CORPUS = Path(settings.BASE_DIR) / 'benchmarks' / 'corpus' / 'v1.json'
+
+TARGETS = ('analyze_text', 'analyze_text_score', 'stereotype', 'agentic_communal', 'pronoun', 'gendered_terms')
+
+_sweep_detector = None
+_sweep_barrier = None
+
+def _init_sweep_worker(counter, threads, barrier):
+    """
+    Runs once in every sweep process: takes the next worker index and the thread count
+    under test, then loads the models through the regular app registry, which applies
+    the runtime configuration first.
+    """
+    global _sweep_detector, _sweep_barrier
+    setup_worker_process(counter, threads)
+
+    from django.apps import apps
+    _sweep_detector = apps.get_app_config('api').detector
+    _sweep_barrier = barrier
+
+def _sweep_run(texts, passes, warm):
+    """
+    One warm-up pass, then waits for every other worker so all of them measure at the
+    same time. Returns the per-text latencies in ms and the wall time of the timed passes.
+    """
+    detector = _sweep_detector
+    for text in texts: detector.analyze_text(text)
+    _sweep_barrier.wait(timeout=1800)
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(passes):
+        if not warm: detector.clear_caches()
+        for text in texts:
+            text_start = time.perf_counter()
+            detector.analyze_text(text)
+            latencies.append((time.perf_counter() - text_start) * 1000.0)
+    return latencies, time.perf_counter() - start
+
+def percentile(values, q):
+    """
+    Linear-interpolated percentile of a non-empty list, q in [0, 100].
+    """
+    ordered = sorted(values)
+    if len(ordered) == 1: return ordered[0]
+    rank = (len(ordered) - 1) * q / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+def stage_delta(before, after, passes):
+    """
+    Model calls and inputs per stage between two registry snapshots, per pass over the bucket.
+    """
+    delta = {}
+    for stage, entry in after["stages"].items():
+        prev = before["stages"].get(stage, {"count": 0, "items": 0})
+        calls = entry["count"] - prev["count"]
+        if calls:
+            delta[stage] = {
+                "calls": round(calls / passes, 2),
+                "items": round((entry["items"] - prev["items"]) / passes, 2),
+            }
+    return delta
+
+class Command(BaseCommand):
+    help = (
+        "Runs BiasDetector.analyze_text and each detector over a fixed, versioned corpus and "
+        "reports throughput, latency percentiles, peak RSS and model call counts as JSON. "
+        "With --compare, flags regressions against a stored baseline and exits non-zero. "
+        "With --rewrite-parity, also checks a stereotype rewrite decoding tier against beam search. "
+        "With --sweep-workers, instead measures throughput for each worker x thread combination."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corpus', default=str(DEFAULT_CORPUS), help='Corpus JSON file.')
+        parser.add_argument('--targets', nargs='*', default=list(TARGETS), choices=TARGETS, help='What to benchmark.')
+        parser.add_argument('--sizes', nargs='*', default=['short', 'medium', 'long'], help='Corpus buckets to run.')
+        parser.add_argument('--repeat', type=int, default=3, help='Measured passes over each bucket.')
+        parser.add_argument('--warm', action='store_true', help='Keep sentence caches between passes instead of measuring cold runs.')
+        parser.add_argument('--output', help='Write the report to this file instead of stdout.')
+        parser.add_argument('--compare', help='Baseline report to compare against.')
+        parser.add_argument('--tolerance', type=float, default=0.10, help='Allowed relative slowdown before a result counts as a regression.')
+        parser.add_argument('--sweep-workers', type=int, nargs='*', help='Sweep mode: worker process counts to try, each running analyze_text concurrently.')
+        parser.add_argument('--sweep-threads', type=int, nargs='*', default=[1, 2, 4], help='Sweep mode: torch threads per worker to try.')
+        parser.add_argument('--rewrite-parity', metavar='TIER', help='Also compare stereotype rewrites of this decoding tier against --reference-tier on every corpus sentence.')
+        parser.add_argument('--reference-tier', default='quality', help='Decoding tier the --rewrite-parity tier is compared against.')
+
+    def handle(self, *args, **options):
+        corpus_path = Path(options['corpus'])
+        if not corpus_path.exists():
+            raise CommandError(f"Corpus '{corpus_path}' not found")
+        corpus = json.loads(corpus_path.read_text(encoding='utf-8'))
+
+        if options['sweep_workers']:
+            self.sweep(corpus, corpus_path, options)
+            return
+
+        from django.apps import apps
+        detector = apps.get_app_config('api').detector
+
+        report = {
+            "corpus": corpus.get("version", corpus_path.stem),
+            "created": datetime.now(timezone.utc).isoformat(),
+            "environment": self.environment(),
+            "options": {"repeat": options['repeat'], "warm": options['warm']},
+            "results": {},
+        }
+
+        for target in options['targets']:
+            report["results"][target] = {}
+            for size in options['sizes']:
+                texts = corpus["texts"].get(size)
+                if not texts:
+                    continue
+                self.stderr.write(f"Benchmarking {target} on {size} texts...")
+                report["results"][target][size] = self.run_target(detector, target, texts, options)
+
+        if options['rewrite_parity']:
+            for tier in (options['rewrite_parity'], options['reference_tier']):
+                if tier not in settings.STEREOTYPE_REWRITE_TIERS:
+                    raise CommandError(f"Unknown rewrite tier '{tier}'")
+            self.stderr.write(f"Comparing {options['rewrite_parity']} rewrites against {options['reference_tier']}...")
+            report["rewrite_parity"] = self.rewrite_parity(detector, corpus, options['rewrite_parity'], options['reference_tier'])
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            Path(options['output']).write_text(output + "\n", encoding='utf-8')
+            self.stderr.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(output)
+
+        if options['compare']:
+            baseline = json.loads(Path(options['compare']).read_text(encoding='utf-8'))
+            regressions = self.compare(baseline, report, options['tolerance'])
+            for line in regressions:
+                self.stderr.write(self.style.ERROR(f"REGRESSION {line}"))
+            if regressions:
+                raise CommandError(f"{len(regressions)} regression(s) against {options['compare']}")
+            self.stderr.write(self.style.SUCCESS("No regressions against baseline."))
+
+    def run_target(self, detector, target, texts, options):
+        run = self.target_callable(detector, target)
+        words = sum(len(t.split()) for t in texts)
+        latencies = []
+
+        # One untimed pass loads lazy state (tokenizer caches, kernels) so it does not skew the first sample
+        if not options['warm']: detector.clear_caches()
+        for text in texts: run(text)
+
+        passes = max(1, options['repeat'])
+        before = registry.snapshot()
+        elapsed_total = 0.0
+        for _ in range(passes):
+            if not options['warm']: detector.clear_caches()
+            for text in texts:
+                start = time.perf_counter()
+                run(text)
+                elapsed = time.perf_counter() - start
+                latencies.append(elapsed * 1000.0)
+                elapsed_total += elapsed
+        after = registry.snapshot()
+
+        return {
+            "texts": len(texts),
+            "words": words,
+            "throughput_texts_per_s": round(len(latencies) / elapsed_total, 3) if elapsed_total else None,
+            "throughput_words_per_s": round(words * passes / elapsed_total, 1) if elapsed_total else None,
+            "latency_ms": {
+                "p50": round(percentile(latencies, 50), 2),
+                "p95": round(percentile(latencies, 95), 2),
+                "p99": round(percentile(latencies, 99), 2),
+                "max": round(max(latencies), 2),
+            },
+            "peak_rss_mb": peak_rss_mb(),
+            "model_calls": stage_delta(before, after, passes),
+        }
+
+    def sweep(self, corpus, corpus_path, options):
+        """
+        Capacity planning mode. For every workers x threads combination, starts that many
+        processes with that many torch threads each, runs analyze_text over the selected
+        texts in all of them at once, and reports the combined throughput and latency.
+        """
+        texts = [t for size in options['sizes'] for t in corpus["texts"].get(size, [])]
+        if not texts:
+            raise CommandError("No texts selected for the sweep")
+
+        passes = max(1, options['repeat'])
+        cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+        context = multiprocessing.get_context('spawn')
+        runs = []
+
+        for workers in options['sweep_workers']:
+            for threads in options['sweep_threads']:
+                self.stderr.write(f"Sweeping {workers} worker(s) x {threads} thread(s)...")
+                counter = context.Value('i', 0)
+                barrier = context.Barrier(workers)
+                with ProcessPoolExecutor(
+                    max_workers=workers, mp_context=context,
+                    initializer=_init_sweep_worker, initargs=(counter, threads, barrier)
+                ) as pool:
+                    futures = [pool.submit(_sweep_run, texts, passes, options['warm']) for _ in range(workers)]
+                    outcomes = [f.result() for f in futures]
+
+                latencies = [ms for worker_latencies, _ in outcomes for ms in worker_latencies]
+                wall = max(elapsed for _, elapsed in outcomes)
+                runs.append({
+                    "workers": workers,
+                    "threads": threads,
+                    "oversubscribed": workers * threads > cpus,
+                    "throughput_texts_per_s": round(len(latencies) / wall, 3) if wall else None,
+                    "latency_ms": {
+                        "p50": round(percentile(latencies, 50), 2),
+                        "p95": round(percentile(latencies, 95), 2),
+                        "p99": round(percentile(latencies, 99), 2),
+                    },
+                })
+
+        report = {
+            "corpus": corpus.get("version", corpus_path.stem),
+            "created": datetime.now(timezone.utc).isoformat(),
+            "environment": dict(self.environment(), cpus_available=cpus),
+            "options": {"repeat": passes, "warm": options['warm'], "sizes": options['sizes'], "cpu_affinity": settings.CPU_AFFINITY},
+            "sweep": runs,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            Path(options['output']).write_text(output + "\n", encoding='utf-8')
+            self.stderr.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(output)
+
+    @staticmethod
+    def target_callable(detector, target):
+        if target == 'analyze_text':
+            return detector.analyze_text
+        if target == 'analyze_text_score':
+            return lambda text: detector.analyze_text(text, mode='score')
+        if target == 'pronoun':
+            return detector.pronoun_detector.analyze
+        if target == 'gendered_terms':
+            return detector.gendered_terms_detector.analyze
+
+        split = detector.processor.extract_sentences
+        if target == 'stereotype':
+            return lambda text: [detector.stereotype_detector.analyze_sentence(s) for s in split(text)]
+
+        def run_agentic(text):
+            context = DiscourseContext(detector.agentic_communal_detector.resolve_subject)
+            return [detector.agentic_communal_detector.analyze_sentence(s, context) for s in split(text)]
+        return run_agentic
+
+    @staticmethod
+    def rewrite_parity(detector, corpus, tier, reference_tier):
+        """
+        Rewrites every distinct corpus sentence with both tiers, cold, and reports how often
+        the outputs agree and how long each tier took.
+        """
+        stereotype = detector.stereotype_detector
+        sentences = list(dict.fromkeys(
+            s for texts in corpus["texts"].values() for text in texts for s in detector.processor.extract_sentences(text)
+        ))
+
+        rewrites, elapsed = {}, {}
+        for name in (reference_tier, tier):
+            stereotype.rewrite_cache.clear()
+            start = time.perf_counter()
+            rewrites[name] = [rewrite for _, rewrite in stereotype.fix_bias_batch(sentences, name)]
+            elapsed[name] = time.perf_counter() - start
+
+        pairs = list(zip(rewrites[reference_tier], rewrites[tier]))
+        n = max(1, len(pairs))
+        return {
+            "tier": tier,
+            "reference_tier": reference_tier,
+            "sentences": len(pairs),
+            "exact_match": round(sum(a == b for a, b in pairs) / n, 3),
+            "mean_similarity": round(sum(difflib.SequenceMatcher(None, a, b).ratio() for a, b in pairs) / n, 3),
+            "ms_per_sentence": round(elapsed[tier] * 1000.0 / n, 2),
+            "reference_ms_per_sentence": round(elapsed[reference_tier] * 1000.0 / n, 2),
+        }
+
+    @staticmethod
+    def environment():
+        env = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        }
+        try:
+            import torch
+            env["torch"] = torch.__version__
+            env["torch_threads"] = torch.get_num_threads()
+        except ImportError:
+            pass
+        return env
+
+    @staticmethod
+    def compare(baseline, report, tolerance):
+        """
+        Flags a regression when p50/p95 latency grows, or throughput drops, by more
+        than the tolerance, or when a stage makes more model calls than before.
+        """
+        regressions = []
+        for target, sizes in report["results"].items():
+            for size, current in sizes.items():
+                base = baseline.get("results", {}).get(target, {}).get(size)
+                if not base:
+                    continue
+                name = f"{target}/{size}"
+
+                for q in ("p50", "p95"):
+                    old, new = base["latency_ms"][q], current["latency_ms"][q]
+                    if old and new > old * (1 + tolerance):
+                        regressions.append(f"{name} {q} latency {old}ms -> {new}ms")
+
+                old, new = base.get("throughput_texts_per_s"), current.get("throughput_texts_per_s")
+                if old and new is not None and new < old * (1 - tolerance):
+                    regressions.append(f"{name} throughput {old} -> {new} texts/s")
+
+                for stage, calls in current["model_calls"].items():
+                    old_calls = base.get("model_calls", {}).get(stage, {}).get("calls")
+                    if old_calls is not None and calls["calls"] > old_calls:
+                        regressions.append(f"{name} {stage} calls {old_calls} -> {calls['calls']}")
+
+        base, current = baseline.get("rewrite_parity"), report.get("rewrite_parity")
+        if base and current and base["tier"] == current["tier"] and base["reference_tier"] == current["reference_tier"]:
+            if current["exact_match"] < base["exact_match"] - tolerance:
+                regressions.append(f"rewrite parity {current['tier']} exact match {base['exact_match']} -> {current['exact_match']}")
+        return regressions
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from api.utils.vector_index import EmbeddingTable
+from api.management.commands.build_synonym_lexicon import Command as LexiconCommand
+
+class Command(BaseCommand):
+    help = (
+        "Embeds the fill-mask vocabulary and every anchor word with the sentence encoder and "
+        "writes the embedding table, so word-level humanness and concept scores are served "
+        "without running the encoder."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=settings.EMBEDDING_TABLE_PATH, help='Directory to write the table to.')
+        parser.add_argument('--words', help='Optional file with extra words to cover, one per line.')
+        parser.add_argument('--batch-size', type=int, default=256, help='Words per encoder batch.')
+
+    def handle(self, *args, **options):
+        from django.apps import apps
+
+        if not options['output']:
+            raise CommandError("No output path, set --output or EMBEDDING_TABLE_PATH")
+
+        detector = apps.get_app_config('api').detector.agentic_communal_detector
+        anchors = (
+            detector.HUMAN_ANCHORS + detector.NON_HUMAN_ANCHORS + detector.AGENTIC_ANCHORS
+            + detector.COMMUNAL_ANCHORS + detector.FUNCTIONAL_ANCHORS
+        )
+        words = list(dict.fromkeys(anchors + LexiconCommand.collect_vocabulary(detector, options['words'])))
+
+        self.stdout.write(f"Embedding {len(words)} words")
+        vectors = detector.encoder.encode(words, batch_size=options['batch_size'])
+
+        EmbeddingTable(words, vectors, detector.ENCODER_NAME).save(options['output'])
+        self.stdout.write(self.style.SUCCESS(f"Embedding table with {len(words)} words written to {options['output']}"))
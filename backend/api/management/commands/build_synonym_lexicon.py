@@ -0,0 +1,127 @@
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from api.utils.synonym_lexicon import SynonymLexicon
+from api.utils.vector_index import ExactIndex, normalize
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+class HNSWIndex:
+    """
+    Approximate nearest neighbours over a large vector table with hnswlib, an optional
+    dependency. Only used here, offline: the detector scores against small anchor lists,
+    where ExactIndex is both exact and faster. Same search API as ExactIndex.
+    """
+    def __init__(self, vectors, ef=200, m=16):
+        vectors = normalize(vectors)
+        self.size = len(vectors)
+        self.ef = ef
+        self.index = hnswlib.Index(space="cosine", dim=vectors.shape[1])
+        self.index.init_index(max_elements=self.size, ef_construction=ef, M=m)
+        self.index.add_items(vectors, np.arange(self.size))
+
+    def __len__(self):
+        return self.size
+
+    def search(self, query, k):
+        k = min(k, self.size)
+        # Recall drops when fewer candidates than results are explored
+        self.index.set_ef(max(self.ef, k))
+        labels, distances = self.index.knn_query(normalize(query), k=k)
+        return labels[0].tolist(), (1.0 - distances[0]).tolist()
+
+def build_index(vectors, approximate=True):
+    """
+    HNSW index if hnswlib is installed and approximate results are acceptable, otherwise
+    an exact one.
+    """
+    if approximate and hnswlib is not None:
+        return HNSWIndex(vectors)
+    return ExactIndex(vectors)
+
+class Command(BaseCommand):
+    help = (
+        "Precomputes neutral alternatives for every word of the fill-mask vocabulary the "
+        "agentic/communal detector would flag, and writes the synonym lexicon that "
+        "replacements are looked up in before falling back to fill-mask."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=settings.SYNONYM_LEXICON_PATH, help='File to write the lexicon to.')
+        parser.add_argument('--words', help='Optional file with extra words to cover, one per line.')
+        parser.add_argument('--max-alternatives', type=int, default=12, help='Alternatives kept per word, before the part of speech filter.')
+        parser.add_argument('--candidates', type=int, default=200, help='Nearest neighbours searched per word for neutral alternatives.')
+        parser.add_argument('--exact', action='store_true', help='Search neighbours exactly even if hnswlib is installed.')
+
+    def handle(self, *args, **options):
+        from django.apps import apps
+
+        if not options['output']:
+            raise CommandError("No output path, set --output or SYNONYM_LEXICON_PATH")
+
+        detector = apps.get_app_config('api').detector.agentic_communal_detector
+        vocabulary = self.collect_vocabulary(detector, options['words'])
+        stop_words = detector.nlp.Defaults.stop_words
+
+        # Read from the embedding table where possible, see build_embedding_table
+        self.stdout.write(f"Embedding {len(vocabulary)} words")
+        vecs = detector.word_vectors(vocabulary)
+
+        # The word-level checks of find_biased_spans and generate_replacements, for the whole vocabulary at once
+        agentic_sims = detector.agentic_index.mean(vecs)
+        communal_sims = detector.communal_index.mean(vecs)
+        functional_sims = detector.functional_index.mean(vecs)
+        max_bias = np.maximum(agentic_sims, communal_sims)
+
+        flagged = [
+            i for i in np.flatnonzero((max_bias > 0.35) & (functional_sims <= max_bias)).tolist()
+            if len(vocabulary[i]) >= 3 and vocabulary[i] not in stop_words
+        ]
+        neutral = {"Agentic": agentic_sims < 0.35, "Communal": communal_sims < 0.35}
+        self.stdout.write(f"{len(flagged)} words would be flagged")
+
+        index = build_index(vecs, approximate=not options['exact'])
+        entries = {}
+        for n, i in enumerate(flagged, 1):
+            bias_type = "Agentic" if agentic_sims[i] > communal_sims[i] else "Communal"
+            neighbours, scores = index.search(vecs[i], options['candidates'])
+            alternatives = [
+                vocabulary[j] for j, score in zip(neighbours, scores)
+                if j != i and score >= 0.5 and neutral[bias_type][j]
+            ]
+            entries[vocabulary[i]] = {"type": bias_type, "alternatives": alternatives[:options['max_alternatives']]}
+            if n % 1000 == 0 or n == len(flagged):
+                self.stdout.write(f"Ranked alternatives for {n}/{len(flagged)} words")
+
+        # Part of speech of each word on its own. A lookup only returns alternatives with the flagged token's tag
+        words = list(dict.fromkeys(w for entry in entries.values() for w in entry["alternatives"]))
+        tags = {word: doc[0].pos_ for word, doc in zip(words, detector.nlp.pipe(words)) if len(doc)}
+        for entry in entries.values():
+            entry["alternatives"] = [[word, tags[word]] for word in entry["alternatives"] if word in tags]
+
+        lexicon = SynonymLexicon(entries, detector.lexicon_fingerprint())
+        lexicon.save(options['output'])
+        self.stdout.write(self.style.SUCCESS(f"Lexicon with {len(lexicon)} words written to {options['output']}"))
+
+    @staticmethod
+    def collect_vocabulary(detector, words_path=None):
+        """
+        Every alphabetic whole word of the fill-mask model's vocabulary, lowercased: exactly
+        the words fill-mask can suggest. Words from words_path are added, so flagged words
+        the tokenizer splits into pieces can be covered too.
+        """
+        vocabulary = {}
+        for token in detector.fixer.tokenizer.get_vocab():
+            word = token.lstrip("Ġ").lower()
+            if word.isalpha(): vocabulary[word] = None
+
+        if words_path:
+            with open(words_path, encoding='utf-8') as f:
+                for line in f:
+                    word = line.strip().lower()
+                    if word.isalpha(): vocabulary[word] = None
+
+        return list(vocabulary)
@@ -0,0 +1,252 @@
+import os
+import json
+import math
+import random
+from bisect import bisect_right
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from api.utils.document_reader import extract_text
+from api.utils.agentic_communal_detector import DiscourseContext
+from api.management.commands.audit_corpus import Command as AuditCommand
+
+class Command(BaseCommand):
+    help = (
+        "Distills the detection models into one multi-task student model. The current pipeline "
+        "labels every sentence of a corpus (.txt, .pdf and .docx files under a directory), the "
+        "student is trained on those labels and saved for DETECTION_BACKEND=student."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', nargs='?', help='Directory to walk for training documents.')
+        parser.add_argument('--output', default=settings.STUDENT_MODEL_PATH, help='Directory to save the student model to.')
+        parser.add_argument('--labels', default='student_labels.jsonl', help='JSONL file the teacher labels are written to.')
+        parser.add_argument('--reuse-labels', action='store_true', help='Train on an existing --labels file instead of labelling the corpus again.')
+        parser.add_argument('--base-model', default='sentence-transformers/all-MiniLM-L6-v2', help='Pretrained encoder the student starts from.')
+        parser.add_argument('--epochs', type=int, default=3, help='Training epochs.')
+        parser.add_argument('--batch-size', type=int, default=32, help='Batch size for labelling and training.')
+        parser.add_argument('--learning-rate', type=float, default=5e-5, help='Peak AdamW learning rate.')
+        parser.add_argument('--max-length', type=int, default=128, help='Maximum tokens per sentence.')
+        parser.add_argument('--validation', type=float, default=0.1, help='Fraction of sentences held out to measure agreement with the pipeline.')
+        parser.add_argument('--seed', type=int, default=13, help='Seed for the split and shuffling.')
+
+    def handle(self, *args, **options):
+        from django.apps import apps
+        from api.utils.student_model import StudentModel
+
+        detector = apps.get_app_config('api').detector
+        labels = Path(options['labels'])
+
+        if options['reuse_labels']:
+            if not labels.exists():
+                raise CommandError(f"'{labels}' does not exist")
+        else:
+            root = options['directory']
+            if not root or not os.path.isdir(root):
+                raise CommandError(f"'{root}' is not a directory")
+            self.label_corpus(detector, root, labels, options['batch_size'])
+
+        with open(labels, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        if not records:
+            raise CommandError("No labelled sentences to train on")
+
+        rng = random.Random(options['seed'])
+        rng.shuffle(records)
+        held_out = int(len(records) * options['validation'])
+        validation, training = records[:held_out], records[held_out:]
+
+        student = StudentModel.from_base(
+            options['base_model'], options['max_length'],
+            thresholds={"stereotype": detector.stereotype_detector.THRESHOLD}
+        )
+        self.stdout.write(f"Training on {len(training)} sentences, {len(validation)} held out.")
+        self.train(student, training, options, rng)
+
+        if validation:
+            self.report(student, validation, detector.stereotype_detector.THRESHOLD, options['batch_size'])
+
+        student.save(options['output'])
+        self.stdout.write(self.style.SUCCESS(f"Student model written to {options['output']}"))
+
+    def label_corpus(self, detector, root, labels, batch_size):
+        """
+        Writes one JSON line of teacher labels per distinct sentence of the corpus.
+        """
+        files = AuditCommand.collect_files(root)
+        seen = set()
+
+        with open(labels, 'w', encoding='utf-8') as out:
+            for i, rel_path in enumerate(files, 1):
+                try:
+                    with open(os.path.join(root, rel_path), 'rb') as f:
+                        text = extract_text(f, rel_path)
+                except Exception as e:
+                    self.stderr.write(f"Skipping {rel_path}: {e}")
+                    continue
+
+                for record in self.label_document(detector, text, batch_size):
+                    if record["text"] in seen: continue
+                    seen.add(record["text"])
+                    out.write(json.dumps(record) + "\n")
+                self.stdout.write(f"Labelled {i}/{len(files)} documents, {len(seen)} sentences")
+
+    @staticmethod
+    def label_document(detector, text, batch_size=32):
+        """
+        Runs the pipeline's detection models over the sentences of a document, in the order
+        and with the document context BiasDetector uses. Per sentence, the labels are:
+            - stereotype: classifier probability
+            - human: whether the subject is a person, None if the cascade screened the sentence out
+            - tags: [start, end, "Agentic"/"Communal", score] of each flagged word
+            - specific: [start, end, verdict] of each gendered term the NLI filter judged
+        """
+        text = text.strip()
+        if not text: return []
+
+        spans = detector.processor.sentence_spans(text)
+        sentences = [text[start:end] for start, end in spans]
+        predictions = detector.stereotype_detector.predict_bias_batch(sentences, batch_size)
+        records = [
+            {"text": sentence, "stereotype": prediction["confidence"], "human": None, "tags": [], "specific": []}
+            for sentence, prediction in zip(sentences, predictions)
+        ]
+
+        context = DiscourseContext(detector.agentic_communal_detector.resolve_subject)
+        for record, prediction in zip(records, predictions):
+            stage, found, subject_update = detector.agentic_communal_detector.run_cascade(
+                record["text"], context.previous_subject_non_human, with_replacements=False
+            )
+            # Stereotype sentences skip the agentic detector in BiasDetector, so they never move the context
+            if not prediction["bias"]: context.update(subject_update)
+            if stage != "screen": record["human"] = stage != "non_human"
+            record["tags"] = [[s["span"][0], s["span"][1], s["type"], s["score"]] for s in found]
+
+        gendered = detector.gendered_terms_detector
+        candidates = gendered.find_candidates([text], [spans])
+        verdicts = gendered.are_specific([(premise, token) for _, premise, _, token in candidates], batch_size)
+        sentence_at = {start: i for i, (start, _) in enumerate(spans)}
+        for (_, _, premise_start, token), specific in zip(candidates, verdicts):
+            start = token.idx - premise_start
+            records[sentence_at[premise_start]]["specific"].append([start, start + len(token.text), bool(specific)])
+
+        return records
+
+    @staticmethod
+    def word_token(words, firsts, offset):
+        """
+        First sub-token of the word containing a character offset, None if there is none.
+        """
+        i = bisect_right([start for start, _ in words], offset) - 1
+        if i < 0 or offset >= words[i][1]: return None
+        return firsts[i]
+
+    def encode_batch(self, student, batch):
+        import torch
+        from api.utils.student_model import MultiTaskStudent
+
+        inputs, words, firsts = student.tokenize([record["text"] for record in batch])
+        shape = inputs["input_ids"].shape
+        targets = {
+            "stereotype": torch.tensor([record["stereotype"] for record in batch]),
+            "human": torch.tensor([float(bool(record["human"])) for record in batch]),
+            "human_mask": torch.tensor([record["human"] is not None for record in batch]),
+            # Only the first sub-token of each word is trained, the rest are ignored
+            "tags": torch.full(shape, -100, dtype=torch.long),
+            "tag_score": torch.zeros(shape),
+            "tag_score_mask": torch.zeros(shape, dtype=torch.bool),
+            "specificity": torch.zeros(shape),
+            "specificity_mask": torch.zeros(shape, dtype=torch.bool),
+        }
+
+        for row, record in enumerate(batch):
+            for token in firsts[row]:
+                if token is not None: targets["tags"][row, token] = 0
+            for start, _, label, score in record["tags"]:
+                token = self.word_token(words[row], firsts[row], start)
+                if token is None: continue
+                targets["tags"][row, token] = MultiTaskStudent.TAGS.index(label)
+                targets["tag_score"][row, token] = score
+                targets["tag_score_mask"][row, token] = True
+            for start, _, specific in record["specific"]:
+                token = self.word_token(words[row], firsts[row], start)
+                if token is None: continue
+                targets["specificity"][row, token] = float(specific)
+                targets["specificity_mask"][row, token] = True
+
+        return inputs, targets
+
+    @staticmethod
+    def loss(outputs, targets):
+        """
+        Sum of the head losses. The stereotype head learns the classifier's probabilities
+        (soft labels), heads without a label in the batch are left out.
+        """
+        from torch.nn import functional as F
+
+        loss = F.binary_cross_entropy_with_logits(outputs["stereotype"], targets["stereotype"])
+        if (targets["tags"] != -100).any():
+            loss = loss + F.cross_entropy(outputs["tags"].flatten(0, 1), targets["tags"].flatten(), ignore_index=-100)
+        for head in ("human", "specificity"):
+            mask = targets[f"{head}_mask"]
+            if mask.any():
+                loss = loss + F.binary_cross_entropy_with_logits(outputs[head][mask], targets[head][mask])
+        mask = targets["tag_score_mask"]
+        if mask.any():
+            loss = loss + F.mse_loss(outputs["tag_score"][mask], targets["tag_score"][mask])
+        return loss
+
+    def train(self, student, records, options, rng):
+        import torch
+        from transformers import get_linear_schedule_with_warmup
+
+        model = student.model
+        batch_size = options['batch_size']
+        batches = math.ceil(len(records) / batch_size)
+        total_steps = batches * options['epochs']
+
+        optimizer = torch.optim.AdamW(model.parameters(), lr=options['learning_rate'])
+        scheduler = get_linear_schedule_with_warmup(optimizer, int(0.1 * total_steps), total_steps)
+
+        model.train()
+        for epoch in range(options['epochs']):
+            rng.shuffle(records)
+            total = 0.0
+            for i in range(0, len(records), batch_size):
+                inputs, targets = self.encode_batch(student, records[i:i + batch_size])
+                loss = self.loss(model(**inputs), targets)
+                loss.backward()
+                torch.nn.utils.clip_grad_norm_(model.parameters(), 1.0)
+                optimizer.step()
+                scheduler.step()
+                optimizer.zero_grad()
+                total += loss.item()
+            self.stdout.write(f"Epoch {epoch + 1}/{options['epochs']}: loss {total / batches:.4f}")
+        model.eval()
+
+    def report(self, student, records, threshold, batch_size):
+        """
+        Agreement of the student with the pipeline on the held-out sentences.
+        """
+        predictions = student.predict([record["text"] for record in records], batch_size)
+        student.cache.clear()
+
+        stereotype = [p["stereotype"]["bias"] == (r["stereotype"] >= threshold) for r, p in zip(records, predictions)]
+        human = [p["human"] == r["human"] for r, p in zip(records, predictions) if r["human"] is not None]
+        specific = [
+            (p["specificity"].get(start, 0.0) >= student.thresholds["specificity"]) == verdict
+            for r, p in zip(records, predictions) for start, _, verdict in r["specific"]
+        ]
+
+        expected = {(i, start, label) for i, r in enumerate(records) for start, _, label, _ in r["tags"]}
+        predicted = {(i, start, label) for i, p in enumerate(predictions) for start, _, label, _ in p["tags"]}
+        matched = len(expected & predicted)
+        tag_f1 = 2 * matched / (len(expected) + len(predicted)) if expected or predicted else 1.0
+
+        def rate(values):
+            return f"{sum(values) / len(values):.3f} ({len(values)})" if values else "n/a"
+
+        self.stdout.write(f"Stereotype agreement: {rate(stereotype)}")
+        self.stdout.write(f"Subject humanness agreement: {rate(human)}")
+        self.stdout.write(f"Agentic/communal tag F1: {tag_f1:.3f} ({len(expected)} tagged words)")
+        self.stdout.write(f"Gendered term specificity agreement: {rate(specific)}")
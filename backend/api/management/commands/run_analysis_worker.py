@@ -0,0 +1,34 @@
+import time
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from api.utils.job_queue import claim_next_job, requeue_stale_jobs, run_job
+
+class Command(BaseCommand):
+    help = (
+        "Processes queued analysis jobs in a separate process. Use together with "
+        "ANALYSIS_JOB_WORKERS=0 to keep inference out of the web workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty.')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is drained.')
+
+    def handle(self, *args, **options):
+        from django.apps import apps
+        detector = apps.get_app_config('api').detector
+
+        requeued = requeue_stale_jobs(settings.ANALYSIS_JOB_STALE_SECONDS)
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} jobs left running by a stopped process")
+
+        self.stdout.write("Waiting for analysis jobs...")
+        while True:
+            job_id = claim_next_job()
+            if job_id is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+
+            self.stdout.write(f"Running job {job_id}")
+            run_job(job_id, detector=detector, claimed=True)
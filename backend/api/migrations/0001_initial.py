@@ -0,0 +1,34 @@
+# Generated by Django 5.1.3 on 2026-10-19 16:20
+
+import api.utils.encoders
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='pending', max_length=16)),
+                ('text', models.TextField()),
+                ('ignored_texts', models.JSONField(blank=True, default=list)),
+                ('result', models.JSONField(blank=True, encoder=api.utils.encoders.NumpyEncoder, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('sentences_total', models.PositiveIntegerField(default=0)),
+                ('sentences_processed', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
@@ -1 +1,41 @@
-from django.db import models
\ No newline at end of file
+import uuid
+from django.db import models
+from .utils.encoders import NumpyEncoder
+
+class AnalysisJob(models.Model):
+    """
+    A long-running analysis submitted through the job API. Rows double as the queue:
+    workers claim the oldest pending job, report progress and heartbeats on it, and store
+    the result.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        RUNNING = 'running', 'Running'
+        COMPLETED = 'completed', 'Completed'
+        FAILED = 'failed', 'Failed'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING, db_index=True)
+    text = models.TextField()
+    ignored_texts = models.JSONField(default=list, blank=True)
+    result = models.JSONField(null=True, blank=True, encoder=NumpyEncoder)
+    error = models.TextField(blank=True, default='')
+    sentences_total = models.PositiveIntegerField(default=0)
+    sentences_processed = models.PositiveIntegerField(default=0)
+    # Worker process running the job ("host:pid") and the last time it reported being alive
+    owner = models.CharField(max_length=255, blank=True, default='')
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"{self.id} ({self.status})"
+
+    @property
+    def progress(self):
+        if not self.sentences_total:
+            return 100.0 if self.status == self.Status.COMPLETED else 0.0
+        return round(100.0 * self.sentences_processed / self.sentences_total, 1)
@@ -0,0 +1,108 @@
+from django.test import SimpleTestCase
+from api.utils.admission import AdmissionController, Rejected
+
+MODE_COST = {"full": 1.0, "detect": 0.5, "score": 0.25}
+
+class AdmissionControllerTests(SimpleTestCase):
+    # 10 words and 1 sentence: a full analysis costs 18, detect 9, score 4.5
+    TEXT = "one two three four five six seven eight nine ten."
+
+    def controller(self, process_max_cost=100, process_client_concurrency=0, max_words=0, degrade_at=None):
+        return AdmissionController(
+            process_max_cost, process_client_concurrency, max_words, MODE_COST,
+            {"detect": 0.5, "score": 0.8} if degrade_at is None else degrade_at
+        )
+
+    def hold(self, controller, cost):
+        """
+        Puts cost in flight, as a request still running would.
+        """
+        controller.in_flight += cost
+
+    def test_estimate_counts_trailing_fragments(self):
+        controller = self.controller()
+        self.assertEqual(controller.estimate("One. Two! Three? four"), (4, 4))
+        self.assertEqual(controller.estimate(""), (0, 1))
+
+    def test_idle_process_serves_the_requested_mode(self):
+        controller = self.controller()
+        with controller.admit("a", self.TEXT, "full") as mode:
+            self.assertEqual(mode, "full")
+            self.assertEqual(controller.in_flight, 18)
+        self.assertEqual(controller.in_flight, 0)
+        self.assertEqual(controller.clients, {})
+
+    def test_degrades_to_detect_then_score_as_load_grows(self):
+        controller = self.controller()
+        self.hold(controller, 50)
+        with controller.admit("a", self.TEXT, "full") as mode:
+            self.assertEqual(mode, "detect")
+
+        controller.in_flight = 80
+        with controller.admit("a", self.TEXT, "full") as mode:
+            self.assertEqual(mode, "score")
+
+    def test_cheaper_mode_is_never_upgraded(self):
+        controller = self.controller()
+        with controller.admit("a", self.TEXT, "score") as mode:
+            self.assertEqual(mode, "score")
+
+    def test_degrades_when_the_requested_mode_does_not_fit(self):
+        controller = self.controller(degrade_at={})
+        self.hold(controller, 90)
+        with controller.admit("a", self.TEXT, "full") as mode:
+            self.assertEqual(mode, "detect")
+
+    def test_overloaded_when_no_mode_fits(self):
+        controller = self.controller()
+        self.hold(controller, 98)
+        with self.assertRaises(Rejected) as raised:
+            with controller.admit("a", self.TEXT, "full"):
+                pass
+        self.assertEqual(raised.exception.status, 503)
+        self.assertEqual(raised.exception.code, "overloaded")
+        self.assertGreaterEqual(raised.exception.retry_after, 1)
+        self.assertEqual(controller.in_flight, 98)
+
+    def test_idle_process_takes_a_request_over_the_budget(self):
+        controller = self.controller(process_max_cost=5)
+        with controller.admit("a", self.TEXT, "full") as mode:
+            self.assertEqual(mode, "full")
+
+    def test_too_large(self):
+        controller = self.controller(max_words=5)
+        with self.assertRaises(Rejected) as raised:
+            with controller.admit("a", self.TEXT, "full"):
+                pass
+        self.assertEqual(raised.exception.status, 413)
+        self.assertIsNone(raised.exception.retry_after)
+
+    def test_client_concurrency(self):
+        controller = self.controller(process_client_concurrency=1)
+        with controller.admit("a", self.TEXT, "score"):
+            with self.assertRaises(Rejected) as raised:
+                with controller.admit("a", self.TEXT, "score"):
+                    pass
+            self.assertEqual(raised.exception.status, 429)
+
+            with controller.admit("b", self.TEXT, "score") as mode:
+                self.assertEqual(mode, "score")
+        self.assertEqual(controller.clients, {})
+
+    def test_client_limit_retry_follows_the_clients_own_requests(self):
+        controller = self.controller(process_client_concurrency=1)
+        controller.seconds_per_cost = 0.1
+        with controller.admit("a", self.TEXT, "full"):
+            with self.assertRaises(Rejected) as raised:
+                with controller.admit("a", "Hi.", "full"):
+                    pass
+        # The held request costs 18, the rejected one only 9
+        self.assertEqual(raised.exception.retry_after, 2)
+
+    def test_slot_is_released_when_the_analysis_fails(self):
+        controller = self.controller(process_client_concurrency=1)
+        with self.assertRaises(ValueError):
+            with controller.admit("a", self.TEXT, "full"):
+                raise ValueError()
+        self.assertEqual(controller.in_flight, 0)
+        self.assertEqual(controller.clients, {})
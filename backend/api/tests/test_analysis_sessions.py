@@ -0,0 +1,76 @@
+from django.test import SimpleTestCase
+from api.utils.analysis_sessions import AnalysisSessions
+
+def bias(bias_id, text, word, description="Gendered term."):
+    start = text.index(word)
+    return {
+        "id": bias_id, "type": "gendered_terms", "description": description, "suggestion": "chair",
+        "position": {"start": start, "end": start + len(word)},
+    }
+
+class AnalysisSessionsTests(SimpleTestCase):
+    def setUp(self):
+        self.sessions = AnalysisSessions(maxsize=10)
+
+    def test_first_revision_has_no_delta(self):
+        text = "The chairman spoke."
+        revision, delta = self.sessions.update("s", None, text, [bias("a", text, "chairman")])
+        self.assertIsNone(delta)
+        self.assertIsInstance(revision, int)
+
+    def test_delta_against_the_stored_revision(self):
+        old = "The chairman met the fireman."
+        revision, _ = self.sessions.update("s", None, old, [bias("a", old, "chairman"), bias("b", old, "fireman")])
+
+        new = "Today the chairman met the policeman."
+        biases = [bias("c", new, "chairman"), bias("d", new, "policeman")]
+        new_revision, delta = self.sessions.update("s", revision, new, biases)
+
+        self.assertGreater(new_revision, revision)
+        # The chairman bias only moved, so it keeps its id
+        self.assertEqual(biases[0]["id"], "a")
+        self.assertEqual(delta["moved"], [{"id": "a", "position": {"start": 10, "end": 18}}])
+        self.assertEqual(delta["added"], [biases[1]])
+        self.assertEqual(delta["removed"], ["b"])
+
+    def test_unchanged_biases_give_an_empty_delta(self):
+        text = "The chairman spoke."
+        revision, _ = self.sessions.update("s", None, text, [bias("a", text, "chairman")])
+        biases = [bias("x", text, "chairman")]
+        _, delta = self.sessions.update("s", revision, text, biases)
+        self.assertEqual(delta, {"added": [], "removed": [], "moved": []})
+        self.assertEqual(biases[0]["id"], "a")
+
+    def test_repeated_biases_are_matched_one_to_one(self):
+        old = "chairman and chairman"
+        revision, _ = self.sessions.update("s", None, old, [
+            {**bias("a", old, "chairman"), "position": {"start": 0, "end": 8}},
+            {**bias("b", old, "chairman"), "position": {"start": 13, "end": 21}},
+        ])
+        new = "chairman"
+        biases = [bias("c", new, "chairman")]
+        _, delta = self.sessions.update("s", revision, new, biases)
+        self.assertEqual(biases[0]["id"], "a")
+        self.assertEqual(delta["removed"], ["b"])
+
+    def test_stale_base_revision_gets_no_delta_but_keeps_ids(self):
+        text = "The chairman spoke."
+        first, _ = self.sessions.update("s", None, text, [bias("a", text, "chairman")])
+        self.sessions.update("s", first, text, [bias("b", text, "chairman")])
+
+        biases = [bias("c", text, "chairman")]
+        _, delta = self.sessions.update("s", first, text, biases)
+        self.assertIsNone(delta)
+        self.assertEqual(biases[0]["id"], "a")
+
+    def test_sessions_are_independent(self):
+        text = "The chairman spoke."
+        revision, _ = self.sessions.update("s", None, text, [bias("a", text, "chairman")])
+        _, delta = self.sessions.update("other", revision, text, [bias("b", text, "chairman")])
+        self.assertIsNone(delta)
+
+    def test_ignore_list_is_kept_by_version(self):
+        self.sessions.set_ignored("s", "v1", ["chairman"])
+        self.assertEqual(self.sessions.get_ignored("s", "v1"), ["chairman"])
+        self.assertIsNone(self.sessions.get_ignored("s", "v2"))
+        self.assertIsNone(self.sessions.get_ignored("other", "v1"))
@@ -0,0 +1,45 @@
+from django.test import SimpleTestCase
+from api.utils.bias_table import BiasTable
+
+def bias(bias_type, start, end, text=None):
+    return {"id": f"{bias_type}-{start}", "type": bias_type, "text": text, "position": {"start": start, "end": end}}
+
+class BiasTableResolveTests(SimpleTestCase):
+    TEXT = "The chairman was bossy. She is a nurse. He was assertive."
+
+    def resolve(self, biases, **kwargs):
+        table = BiasTable()
+        table.extend(biases)
+        return [(b["type"], b["position"]["start"], b["position"]["end"]) for b in table.resolve(self.TEXT, **kwargs).to_dicts()]
+
+    def test_result_is_sorted_by_position(self):
+        kept = self.resolve([bias("pronoun", 40, 42), bias("gendered_terms", 4, 12), bias("agentic_communal", 17, 22)])
+        self.assertEqual(kept, [("gendered_terms", 4, 12), ("agentic_communal", 17, 22), ("pronoun", 40, 42)])
+
+    def test_higher_priority_wins_an_overlap(self):
+        kept = self.resolve([bias("pronoun", 24, 27), bias("gendered_terms", 4, 12), bias("stereotype", 24, 38)])
+        self.assertEqual(kept, [("gendered_terms", 4, 12), ("stereotype", 24, 38)])
+
+    def test_longest_span_wins_within_a_type(self):
+        kept = self.resolve([bias("gendered_terms", 4, 9), bias("gendered_terms", 4, 12)])
+        self.assertEqual(kept, [("gendered_terms", 4, 12)])
+
+    def test_adjacent_spans_are_both_kept(self):
+        kept = self.resolve([bias("agentic_communal", 4, 12), bias("pronoun", 12, 16)])
+        self.assertEqual(kept, [("agentic_communal", 4, 12), ("pronoun", 12, 16)])
+
+    def test_ignored_text_is_dropped(self):
+        kept = self.resolve([bias("gendered_terms", 4, 12), bias("agentic_communal", 17, 22)], ignored={"chairman"})
+        self.assertEqual(kept, [("agentic_communal", 17, 22)])
+
+    def test_biases_in_blocked_ranges_are_dropped(self):
+        kept = self.resolve(
+            [bias("stereotype", 24, 38), bias("pronoun", 24, 27), bias("agentic_communal", 47, 56)],
+            blocked=[(24, 39)]
+        )
+        self.assertEqual(kept, [("agentic_communal", 47, 56)])
+
+    def test_blocked_bias_does_not_shadow_lower_priority_ones(self):
+        # The stereotype overlaps the blocked range, so the pronoun it would have beaten is kept
+        kept = self.resolve([bias("stereotype", 4, 30), bias("pronoun", 24, 27)], blocked=[(0, 10)])
+        self.assertEqual(kept, [("pronoun", 24, 27)])
@@ -0,0 +1,72 @@
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from api.utils.cache import LRUCache, approximate_size
+from api.utils.metrics import registry
+
+@override_settings(CACHE_MAX_MB=0, CACHE_TTL=0, CACHE_LIMITS={})
+class LRUCacheTests(SimpleTestCase):
+    def evictions(self, name, reason):
+        return registry.snapshot()["evictions"].get(f"{name}:{reason}", 0)
+
+    def test_least_recently_used_entry_is_evicted_first(self):
+        cache = LRUCache("test_capacity", maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(self.evictions("test_capacity", "capacity"), 1)
+
+    def test_byte_budget(self):
+        entry = approximate_size("key0") + approximate_size("x" * 100)
+        cache = LRUCache("test_memory", maxsize=None, max_bytes=3 * entry)
+        for i in range(4):
+            cache.put(f"key{i}", "x" * 100)
+
+        self.assertEqual(len(cache), 3)
+        self.assertNotIn("key0", cache)
+        self.assertLessEqual(cache.bytes, cache.max_bytes)
+        self.assertEqual(self.evictions("test_memory", "memory"), 1)
+
+    def test_value_over_the_budget_is_not_stored(self):
+        cache = LRUCache("test_oversized", max_bytes=1000)
+        cache.put("small", 1)
+        cache.put("large", "x" * 2000)
+        self.assertIn("small", cache)
+        self.assertNotIn("large", cache)
+
+    def test_replacing_a_key_updates_the_bytes(self):
+        cache = LRUCache("test_replace")
+        cache.put("a", "x" * 100)
+        cache.put("a", "x")
+        self.assertEqual(cache.bytes, approximate_size("a") + approximate_size("x"))
+        cache.clear()
+        self.assertEqual(cache.bytes, 0)
+
+    def test_entries_expire_after_the_ttl(self):
+        cache = LRUCache("test_ttl", ttl=10)
+        with mock.patch("api.utils.cache.time.monotonic", return_value=100.0):
+            cache.put("a", 1)
+        with mock.patch("api.utils.cache.time.monotonic", return_value=109.0):
+            self.assertEqual(cache.get("a"), 1)
+        with mock.patch("api.utils.cache.time.monotonic", return_value=110.0):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.bytes, 0)
+        self.assertEqual(self.evictions("test_ttl", "expired"), 1)
+
+    def test_expired_entries_are_dropped_on_put(self):
+        cache = LRUCache("test_ttl_put", ttl=10)
+        with mock.patch("api.utils.cache.time.monotonic", return_value=100.0):
+            cache.put("a", 1)
+        with mock.patch("api.utils.cache.time.monotonic", return_value=200.0):
+            cache.put("b", 2)
+        self.assertEqual(len(cache), 1)
+
+    @override_settings(CACHE_LIMITS={"test_configured": {"maxsize": 1, "ttl": 5}})
+    def test_limits_come_from_settings(self):
+        cache = LRUCache("test_configured", maxsize=100)
+        self.assertEqual(cache.maxsize, 1)
+        self.assertEqual(cache.ttl, 5)
@@ -0,0 +1,36 @@
+from django.test import SimpleTestCase
+from api.utils.ignore_matcher import IgnoreMatcher
+
+class IgnoreMatcherTests(SimpleTestCase):
+    def test_terms_are_lowercased_and_blank_ones_dropped(self):
+        matcher = IgnoreMatcher(["Chairman", "", "Bossy"])
+        self.assertEqual(matcher.terms, frozenset({"chairman", "bossy"}))
+        self.assertIn("CHAIRMAN", matcher)
+        self.assertNotIn("chair", matcher)
+
+    def test_empty_matcher_is_falsy(self):
+        self.assertFalse(IgnoreMatcher())
+        self.assertFalse(IgnoreMatcher([""]))
+        self.assertEqual(IgnoreMatcher().terms_in("He said so."), frozenset())
+
+    def test_terms_in_matches_whole_words_only(self):
+        matcher = IgnoreMatcher(["he", "man"])
+        self.assertEqual(matcher.terms_in("The chairman spoke."), frozenset())
+        self.assertEqual(matcher.terms_in("He is a man."), frozenset({"he", "man"}))
+
+    def test_terms_in_finds_nested_and_overlapping_terms(self):
+        matcher = IgnoreMatcher(["chair", "chair man", "man of the hour"])
+        self.assertEqual(
+            matcher.terms_in("The chair man of the hour left."),
+            frozenset({"chair", "chair man", "man of the hour"})
+        )
+
+    def test_terms_with_punctuation_are_escaped(self):
+        matcher = IgnoreMatcher(["c.e.o", "(he)"])
+        self.assertEqual(matcher.terms_in("Our c.e.o said (he) would."), frozenset({"c.e.o", "(he)"}))
+        self.assertEqual(matcher.terms_in("Our cxexo said he would."), frozenset())
+
+    def test_compile_shares_matchers_per_list(self):
+        first = IgnoreMatcher.compile(["Chairman", "bossy"])
+        self.assertIs(IgnoreMatcher.compile(["bossy", "chairman"]), first)
+        self.assertIsNot(IgnoreMatcher.compile(["bossy"]), first)
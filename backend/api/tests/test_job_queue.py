@@ -0,0 +1,163 @@
+import socket
+import threading
+from datetime import timedelta
+from unittest import mock
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from api.models import AnalysisJob
+from api.utils import job_queue
+from api.utils.bias_table import BiasTable
+from api.utils.job_queue import claim_job, claim_next_job, owner_alive, requeue_stale_jobs, run_job, worker_id
+
+Status = AnalysisJob.Status
+
+def running_job(owner, heartbeat_age=0):
+    job = AnalysisJob.objects.create(text="x", status=Status.RUNNING, owner=owner, sentences_processed=3)
+    AnalysisJob.objects.filter(id=job.id).update(heartbeat_at=timezone.now() - timedelta(seconds=heartbeat_age))
+    return job
+
+class ClaimTests(TestCase):
+    def test_claim_records_the_owner(self):
+        job = AnalysisJob.objects.create(text="x")
+        self.assertTrue(claim_job(job.id))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Status.RUNNING)
+        self.assertEqual(job.owner, worker_id())
+        self.assertIsNotNone(job.heartbeat_at)
+
+    def test_a_job_is_claimed_once(self):
+        job = AnalysisJob.objects.create(text="x")
+        self.assertTrue(claim_job(job.id))
+        self.assertFalse(claim_job(job.id))
+
+    def test_claim_next_takes_the_oldest_pending_job(self):
+        first = AnalysisJob.objects.create(text="a")
+        AnalysisJob.objects.create(text="b", status=Status.COMPLETED)
+        AnalysisJob.objects.create(text="c")
+        self.assertEqual(claim_next_job(), first.id)
+
+    def test_claim_next_moves_on_when_another_worker_wins(self):
+        first = AnalysisJob.objects.create(text="a")
+        second = AnalysisJob.objects.create(text="b")
+        real_claim = job_queue.claim_job
+
+        def racing_claim(job_id):
+            if job_id == first.id and not racing_claim.raced:
+                racing_claim.raced = True
+                # Another worker claims the job between the select and the update
+                AnalysisJob.objects.filter(id=job_id).update(status=Status.RUNNING, owner="elsewhere:1")
+            return real_claim(job_id)
+        racing_claim.raced = False
+
+        with mock.patch.object(job_queue, "claim_job", racing_claim):
+            self.assertEqual(claim_next_job(), second.id)
+        self.assertEqual(AnalysisJob.objects.get(id=first.id).owner, "elsewhere:1")
+
+    def test_claim_next_on_an_empty_queue(self):
+        self.assertIsNone(claim_next_job())
+
+class RequeueStaleJobsTests(TestCase):
+    def test_job_of_a_dead_local_process_is_requeued_at_once(self):
+        with mock.patch.object(job_queue, "owner_alive", return_value=False):
+            job = running_job(f"{socket.gethostname()}:1234")
+            self.assertEqual(requeue_stale_jobs(180), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Status.PENDING)
+        self.assertEqual((job.owner, job.heartbeat_at, job.sentences_processed), ("", None, 0))
+
+    def test_live_local_owner_keeps_its_job_without_heartbeats(self):
+        job = running_job(worker_id(), heartbeat_age=3600)
+        self.assertEqual(requeue_stale_jobs(180), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Status.RUNNING)
+
+    def test_remote_owner_is_judged_by_its_heartbeat(self):
+        fresh = running_job("elsewhere:1", heartbeat_age=10)
+        stale = running_job("elsewhere:2", heartbeat_age=600)
+        self.assertEqual(requeue_stale_jobs(180), 1)
+        self.assertEqual(AnalysisJob.objects.get(id=fresh.id).status, Status.RUNNING)
+        self.assertEqual(AnalysisJob.objects.get(id=stale.id).status, Status.PENDING)
+
+    def test_other_statuses_are_left_alone(self):
+        AnalysisJob.objects.create(text="x", status=Status.COMPLETED, owner="elsewhere:1")
+        AnalysisJob.objects.create(text="y")
+        self.assertEqual(requeue_stale_jobs(0), 0)
+
+    def test_owner_alive(self):
+        self.assertTrue(owner_alive(worker_id()))
+        self.assertIsNone(owner_alive("elsewhere:1"))
+        self.assertIsNone(owner_alive(""))
+
+class FakeDetector:
+    def __init__(self, on_run=None, error=None):
+        self.on_run = on_run
+        self.error = error
+
+    def analyze_text(self, text, ignored_texts, progress_callback=None, rewrite_tier=None):
+        progress_callback(1, 2)
+        if self.on_run: self.on_run()
+        if self.error: raise self.error
+        progress_callback(2, 2)
+        return {
+            "text": text, "bias_table": BiasTable(), "biases": [], "overall_score": 100,
+            "pronoun_stats": {}, "word_count": 1, "highlighted_text": text
+        }
+
+@override_settings(ANALYSIS_JOB_HEARTBEAT_SECONDS=60)
+class RunJobTests(TestCase):
+    def test_result_and_progress_are_stored(self):
+        job = AnalysisJob.objects.create(text="Hello.")
+        run_job(job.id, detector=FakeDetector())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Status.COMPLETED)
+        self.assertEqual(job.result["score"], 100)
+        self.assertEqual((job.sentences_processed, job.sentences_total), (2, 2))
+
+    def test_failure_is_stored(self):
+        job = AnalysisJob.objects.create(text="Hello.")
+        with self.assertLogs("api.utils.job_queue", "ERROR"):
+            run_job(job.id, detector=FakeDetector(error=ValueError("boom")))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), (Status.FAILED, "boom"))
+
+    def test_result_is_dropped_once_the_job_was_requeued(self):
+        job = AnalysisJob.objects.create(text="Hello.")
+
+        def requeue():
+            AnalysisJob.objects.filter(id=job.id).update(status=Status.PENDING, owner="")
+
+        with self.assertLogs("api.utils.job_queue", "WARNING"):
+            run_job(job.id, detector=FakeDetector(on_run=requeue))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Status.PENDING)
+        self.assertIsNone(job.result)
+
+    def test_claimed_job_is_not_run_again(self):
+        job = AnalysisJob.objects.create(text="Hello.", status=Status.COMPLETED)
+        run_job(job.id, detector=FakeDetector(error=AssertionError("ran")))
+        self.assertEqual(AnalysisJob.objects.get(id=job.id).status, Status.COMPLETED)
+
+class HeartbeatTests(TransactionTestCase):
+    def test_heartbeat_is_written_while_the_job_runs(self):
+        job = AnalysisJob.objects.create(text="x")
+        claim_job(job.id)
+        AnalysisJob.objects.filter(id=job.id).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+
+        beaten = threading.Event()
+        with job_queue.Heartbeat(job.id, worker_id(), 0.01):
+            for _ in range(200):
+                if AnalysisJob.objects.get(id=job.id).heartbeat_at > timezone.now() - timedelta(minutes=1):
+                    beaten.set()
+                    break
+                beaten.wait(0.01)
+        self.assertTrue(beaten.is_set())
+
+    def test_heartbeat_stops_when_the_job_changes_owner(self):
+        job = AnalysisJob.objects.create(text="x")
+        claim_job(job.id)
+        AnalysisJob.objects.filter(id=job.id).update(owner="elsewhere:1")
+
+        heartbeat = job_queue.Heartbeat(job.id, worker_id(), 0.01)
+        with heartbeat:
+            heartbeat.thread.join(timeout=5)
+            self.assertFalse(heartbeat.thread.is_alive())
@@ -0,0 +1,54 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from unittest import mock
+from django.test import SimpleTestCase
+from api.utils.runtime import parse_cpu_list, setup_worker_process, worker_cpus
+
+# Read at import, like the module level settings of the benchmark command, so the spawned
+# worker has loaded the settings before its initializer runs
+BASE_DIR = settings.BASE_DIR
+
+def _init_worker(counter, threads):
+    setup_worker_process(counter, threads)
+
+def _worker_settings():
+    from django.conf import settings
+    return settings.WORKER_INDEX, settings.TORCH_NUM_THREADS
+
+class SetupWorkerProcessTests(SimpleTestCase):
+    def test_spawned_workers_see_their_index_and_threads(self):
+        context = multiprocessing.get_context('spawn')
+        counter = context.Value('i', 0)
+        with ProcessPoolExecutor(max_workers=2, mp_context=context, initializer=_init_worker, initargs=(counter, 3)) as pool:
+            futures = [pool.submit(_worker_settings) for _ in range(8)]
+            seen = {future.result() for future in futures}
+
+        for index, threads in seen:
+            self.assertIn(index, (0, 1))
+            self.assertEqual(threads, 3)
+        self.assertEqual(counter.value, 2)
+
+class CpuAffinityTests(SimpleTestCase):
+    def test_parse_cpu_list(self):
+        self.assertEqual(parse_cpu_list("0-3,8,10-11"), [0, 1, 2, 3, 8, 10, 11])
+        self.assertEqual(parse_cpu_list(" 2, 1 ,1,"), [1, 2])
+
+    def test_no_affinity(self):
+        self.assertIsNone(worker_cpus("", 0, 4))
+
+    def test_explicit_list_is_shared_by_all_workers(self):
+        self.assertEqual(worker_cpus("0-1", 5, 4), [0, 1])
+
+    @mock.patch("api.utils.runtime.os.sched_getaffinity", return_value=set(range(8)), create=True)
+    def test_auto_gives_each_worker_its_own_block(self, _):
+        self.assertEqual(worker_cpus("auto", 0, 2), [0, 1])
+        self.assertEqual(worker_cpus("auto", 3, 2), [6, 7])
+        # More workers than blocks wrap around
+        self.assertEqual(worker_cpus("auto", 4, 2), [0, 1])
+
+    def test_auto_needs_a_worker_index_and_threads(self):
+        with self.assertLogs("api.utils.runtime", "WARNING"):
+            self.assertIsNone(worker_cpus("auto", None, 2))
+        with self.assertLogs("api.utils.runtime", "WARNING"):
+            self.assertIsNone(worker_cpus("auto", 0, 0))
@@ -0,0 +1,142 @@
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from .utils import requires
+
+TIERS = {
+    "quality": {"num_beams": 4, "max_length": 128},
+    "fast": {"num_beams": 1, "max_new_tokens": 64},
+    "speculative": {"speculative": True, "max_new_tokens": 128, "draft_tokens": 10},
+}
+
+class FakeTokenizer:
+    """
+    One token per word. Encoded batches keep the prompt strings so the fake model can echo them.
+    """
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, inputs, return_tensors=None, padding=False):
+        if return_tensors is None:
+            return {"input_ids": [text.split() for text in inputs]}
+        self.batches.append(list(inputs))
+        return {"input_ids": list(inputs)}
+
+    def batch_decode(self, outputs, skip_special_tokens=False):
+        return [f"Reason: generalization | Rewrite: {text.replace('Fix Gender Bias: ', '').upper()}" for text in outputs]
+
+class FakeRewriter:
+    def __init__(self):
+        self.calls = []
+
+    def generate(self, input_ids, **decoding):
+        self.calls.append(decoding)
+        return input_ids
+
+def make_detector():
+    from api.utils.cache import LRUCache
+    from api.utils.stereotype_detector import StereotypeDetector
+
+    detector = StereotypeDetector.__new__(StereotypeDetector)
+    detector.THRESHOLD = 0.85
+    detector.detector_model = None
+    detector.rewriter_tokenizer = FakeTokenizer()
+    detector.rewriter_model = FakeRewriter()
+    detector.rewrite_cache = LRUCache("test_stereotype_rewrite", maxsize=16)
+    return detector
+
+@requires("torch", "transformers")
+@override_settings(STEREOTYPE_REWRITE_TIERS=TIERS, STEREOTYPE_REWRITE_TIER="quality", STEREOTYPE_REWRITE_BATCH_SIZE=2)
+class FixBiasBatchTests(SimpleTestCase):
+    TEXTS = [
+        "women are naturally too emotional to lead teams",
+        "men are strong",
+        "girls cannot do maths",
+        "boys do not cry",
+        "mothers should always stay at home with the children",
+    ]
+
+    def test_results_are_in_input_order(self):
+        detector = make_detector()
+        fixes = detector.fix_bias_batch(self.TEXTS)
+        self.assertEqual([rewrite for _, rewrite in fixes], [text.upper() for text in self.TEXTS])
+        self.assertEqual({reason for reason, _ in fixes}, {"generalization"})
+
+    def test_batches_are_bucketed_by_length(self):
+        detector = make_detector()
+        detector.fix_bias_batch(self.TEXTS)
+        batches = [[len(prompt.split()) for prompt in batch] for batch in detector.rewriter_tokenizer.batches]
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        flat = [length for batch in batches for length in batch]
+        self.assertEqual(flat, sorted(flat))
+
+    def test_duplicates_and_repeats_hit_the_cache(self):
+        detector = make_detector()
+        detector.fix_bias_batch(["men are strong", "men are strong"])
+        fixes = detector.fix_bias_batch(["men are strong"])
+        self.assertEqual(fixes, [("generalization", "MEN ARE STRONG")])
+        self.assertEqual(len(detector.rewriter_model.calls), 1)
+
+    def test_cache_is_per_tier(self):
+        detector = make_detector()
+        detector.fix_bias_batch(["men are strong"])
+        detector.fix_bias_batch(["men are strong"], tier="fast")
+        self.assertEqual(detector.rewriter_model.calls, [TIERS["quality"], TIERS["fast"]])
+
+    def test_unknown_tier(self):
+        with self.assertRaises(ValueError):
+            make_detector().fix_bias_batch(["men are strong"], tier="turbo")
+
+    def test_speculative_tier_uses_copy_drafts(self):
+        detector = make_detector()
+        with mock.patch.object(detector, "generate_speculative", side_effect=lambda encoded, decoding: encoded["input_ids"]) as speculative:
+            fixes = detector.fix_bias_batch(self.TEXTS[:3], tier="speculative")
+        self.assertEqual(speculative.call_count, 2)
+        self.assertEqual(detector.rewriter_model.calls, [])
+        self.assertEqual([rewrite for _, rewrite in fixes], [text.upper() for text in self.TEXTS[:3]])
+
+    def test_without_rewriter(self):
+        detector = make_detector()
+        detector.rewriter_model = None
+        self.assertEqual(detector.fix_bias_batch(["men are strong"]), [("Model unavailable", "men are strong")])
+
+@requires("torch", "transformers")
+class AnalyzeSentencesTests(SimpleTestCase):
+    def test_rewrite_false_leaves_description_and_suggestion_empty(self):
+        detector = make_detector()
+        predictions = [{"bias": True, "confidence": 0.9}, {"bias": False, "confidence": 0.1}]
+        results = detector.analyze_sentences(["men are strong", "the sky is blue"], rewrite=False, predictions=predictions)
+        self.assertIsNone(results[1])
+        self.assertIsNone(results[0]["description"])
+        self.assertIsNone(results[0]["suggestion"])
+        self.assertEqual(results[0]["alternatives"], [])
+        self.assertEqual(detector.rewriter_model.calls, [])
+
+    @override_settings(STEREOTYPE_REWRITE_TIERS=TIERS, STEREOTYPE_REWRITE_TIER="quality", STEREOTYPE_REWRITE_BATCH_SIZE=2)
+    def test_flagged_sentences_get_rewrites(self):
+        detector = make_detector()
+        predictions = [{"bias": False, "confidence": 0.1}, {"bias": True, "confidence": 0.9}]
+        results = detector.analyze_sentences(["the sky is blue", "men are strong"], predictions=predictions)
+        self.assertIsNone(results[0])
+        self.assertEqual(results[1]["alternatives"], ["MEN ARE STRONG"])
+        self.assertEqual(results[1]["description"], "generalization")
+
+@requires("torch", "transformers")
+class RewriteParsingTests(SimpleTestCase):
+    def setUp(self):
+        from api.utils.stereotype_detector import StereotypeDetector
+        self.detector = StereotypeDetector
+
+    def test_parse_rewrite(self):
+        parse = self.detector.parse_rewrite
+        self.assertEqual(parse("Reason: gender role | Rewrite: People can cook."), ("gender role", "People can cook."))
+        self.assertEqual(parse("Rewrite: People can cook."), ("Automated Rewrite", "People can cook."))
+        self.assertEqual(parse("People can cook."), ("Automated Rewrite", "People can cook."))
+
+    def test_copy_draft_continues_the_longest_matching_suffix(self):
+        source = [5, 6, 7, 8, 9, 6, 10]
+        copy_draft = self.detector.copy_draft
+        self.assertEqual(copy_draft(source, [0, 5, 6], 3), [7, 8, 9])
+        # The 1-gram 6 also matches at the end of the source, the longer suffix wins
+        self.assertEqual(copy_draft(source, [0, 9, 6], 3), [10])
+        self.assertEqual(copy_draft(source, [0, 42], 3), [])
+        self.assertEqual(copy_draft(source, [0, 5], 0), [])
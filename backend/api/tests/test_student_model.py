@@ -0,0 +1,142 @@
+import re
+from types import SimpleNamespace
+from django.test import SimpleTestCase
+from .utils import requires, requires_models
+
+WORD = re.compile(r"\w+")
+
+class FakeTokenizer:
+    """
+    Splits words into three character sub-tokens after a [CLS] token, with offset mappings.
+    """
+    def __call__(self, sentences, return_tensors=None, truncation=False, max_length=128, padding=False, return_offsets_mapping=False):
+        import torch
+
+        rows = []
+        for sentence in sentences:
+            ids, offsets = [1], [(0, 0)]
+            for m in WORD.finditer(sentence):
+                for start in range(m.start(), m.end(), 3):
+                    end = min(start + 3, m.end())
+                    ids.append(2 + sum(map(ord, sentence[start:end])) % 97)
+                    offsets.append((start, end))
+            rows.append((ids[:max_length], offsets[:max_length]))
+
+        width = max(len(ids) for ids, _ in rows)
+        return {
+            "input_ids": torch.tensor([ids + [0] * (width - len(ids)) for ids, _ in rows]),
+            "attention_mask": torch.tensor([[1] * len(ids) + [0] * (width - len(ids)) for ids, _ in rows]),
+            "offset_mapping": torch.tensor([offsets + [(0, 0)] * (width - len(offsets)) for _, offsets in rows]),
+        }
+
+def make_student(**config):
+    import torch
+    from torch import nn
+    from api.utils.student_model import MultiTaskStudent, StudentModel
+
+    class Encoder(nn.Module):
+        config = SimpleNamespace(hidden_size=8)
+
+        def __init__(self):
+            super().__init__()
+            self.embeddings = nn.Embedding(100, 8)
+
+        def forward(self, input_ids, attention_mask):
+            return SimpleNamespace(last_hidden_state=self.embeddings(input_ids))
+
+    torch.manual_seed(0)
+    return StudentModel(MultiTaskStudent(Encoder()), FakeTokenizer(), config)
+
+@requires("torch", "transformers")
+class FirstTokensTests(SimpleTestCase):
+    def test_first_sub_token_of_each_word(self):
+        from api.utils.student_model import first_tokens
+
+        offsets = [(0, 0), (0, 3), (3, 5), (6, 9), (0, 0)]
+        self.assertEqual(first_tokens(offsets, [(0, 5), (6, 9)]), [1, 3])
+
+    def test_truncated_words(self):
+        from api.utils.student_model import first_tokens
+
+        offsets = [(0, 0), (0, 3), (3, 5), (0, 0)]
+        self.assertEqual(first_tokens(offsets, [(0, 5), (6, 9)]), [1, None])
+
+@requires("torch", "transformers")
+class StudentModelTests(SimpleTestCase):
+    SENTENCES = ["She is a caring nurse", "He leads", "The board approved the budget for next year"]
+
+    def test_tokenize_maps_words_to_first_sub_tokens(self):
+        inputs, words, firsts = make_student().tokenize(["She is caring"])
+        self.assertEqual(words, [[(0, 3), (4, 6), (7, 13)]])
+        self.assertEqual(firsts, [[1, 2, 3]])
+        self.assertEqual(inputs["input_ids"].shape[1], 5)
+
+    def test_forward_shapes(self):
+        student = make_student()
+        inputs, _, _ = student.tokenize(self.SENTENCES)
+        outputs = student.model(**inputs)
+        rows, tokens = inputs["input_ids"].shape
+        self.assertEqual(tuple(outputs["stereotype"].shape), (rows,))
+        self.assertEqual(tuple(outputs["tags"].shape), (rows, tokens, 3))
+        self.assertEqual(tuple(outputs["specificity"].shape), (rows, tokens))
+
+    def test_predict_is_in_input_order_and_independent_of_batching(self):
+        student = make_student()
+        batched = student.predict(self.SENTENCES, batch_size=2)
+        student.cache.clear()
+        single = [student.predict([sentence])[0] for sentence in self.SENTENCES]
+
+        for a, b in zip(batched, single):
+            self.assertAlmostEqual(a["stereotype"]["confidence"], b["stereotype"]["confidence"], places=5)
+            self.assertEqual(a["human"], b["human"])
+            self.assertEqual(set(a["specificity"]), set(b["specificity"]))
+
+        # One specificity score per word, keyed on its start offset
+        self.assertEqual(sorted(batched[1]["specificity"]), [0, 3])
+
+    def test_thresholds_from_config(self):
+        student = make_student(thresholds={"stereotype": 0.0})
+        self.assertEqual(student.thresholds["human"], 0.5)
+        self.assertTrue(student.predict(["He leads"])[0]["stereotype"]["bias"])
+
+@requires_models
+class DistillLossTests(SimpleTestCase):
+    RECORDS = [
+        {"text": "She is caring and strong", "stereotype": 0.9, "human": True,
+         "tags": [[7, 13, "Communal", 0.4]], "specific": [[0, 3, True]]},
+        {"text": "The plan works", "stereotype": 0.1, "human": None, "tags": [], "specific": []},
+    ]
+
+    def test_word_token(self):
+        from api.management.commands.distill_student import Command
+
+        words, firsts = [(0, 3), (4, 6), (7, 13)], [1, 2, 3]
+        self.assertEqual(Command.word_token(words, firsts, 7), 3)
+        self.assertEqual(Command.word_token(words, firsts, 10), 3)
+        self.assertIsNone(Command.word_token(words, firsts, 3))
+
+    def test_encode_batch_targets(self):
+        from api.management.commands.distill_student import Command
+
+        inputs, targets = Command().encode_batch(make_student(), self.RECORDS)
+        # [CLS] she is car ing and str ong: only first sub-tokens are trained
+        self.assertEqual(targets["tags"][0].tolist(), [-100, 0, 0, 2, -100, 0, 0, -100])
+        self.assertEqual(targets["tag_score_mask"][0].nonzero().flatten().tolist(), [3])
+        self.assertEqual(targets["specificity_mask"][0].nonzero().flatten().tolist(), [1])
+        self.assertEqual(targets["human_mask"].tolist(), [True, False])
+        self.assertEqual(targets["tags"][1, 5:].tolist(), [-100] * 3)
+
+    def test_loss_trains_every_labelled_head(self):
+        import torch
+        from api.management.commands.distill_student import Command
+
+        student = make_student()
+        student.model.train()
+        inputs, targets = Command().encode_batch(student, self.RECORDS)
+        loss = Command.loss(student.model(**inputs), targets)
+        self.assertEqual(loss.dim(), 0)
+        self.assertTrue(torch.isfinite(loss))
+
+        loss.backward()
+        for head in ("stereotype", "human", "tags", "tag_score", "specificity"):
+            self.assertIsNotNone(getattr(student.model, head).weight.grad, head)
@@ -0,0 +1,82 @@
+import tempfile
+from pathlib import Path
+import numpy as np
+from django.test import SimpleTestCase
+from api.management.commands.build_synonym_lexicon import HNSWIndex, build_index
+from api.utils.synonym_lexicon import SynonymLexicon
+from api.utils.vector_index import EmbeddingTable, ExactIndex
+from .utils import installed, requires
+
+ENTRIES = {
+    "bossy": {"type": "Communal", "alternatives": [["assertive", "ADJ"], ["direct", "ADJ"], ["lead", "VERB"]]},
+    "dominate": {"type": "Agentic", "alternatives": []},
+}
+
+class SynonymLexiconTests(SimpleTestCase):
+    def test_lookup_filters_by_part_of_speech(self):
+        lexicon = SynonymLexicon(ENTRIES)
+        self.assertEqual(lexicon.lookup("Bossy", "Communal", "ADJ"), ["assertive", "direct"])
+        self.assertIsNone(lexicon.lookup("bossy", "Communal", "NOUN"))
+
+    def test_lookup_unknown_word_or_type(self):
+        lexicon = SynonymLexicon(ENTRIES)
+        self.assertIsNone(lexicon.lookup("kind", "Communal", "ADJ"))
+        self.assertIsNone(lexicon.lookup("bossy", "Agentic", "ADJ"))
+
+    def test_word_without_neutral_alternatives(self):
+        self.assertEqual(SynonymLexicon(ENTRIES).lookup("dominate", "Agentic", "VERB"), [])
+
+    def test_round_trip_and_fingerprint(self):
+        fingerprint = SynonymLexicon.anchor_fingerprint(["strong"], ["kind"], ["table"])
+        self.assertNotEqual(fingerprint, SynonymLexicon.anchor_fingerprint(["strong"], ["warm"], ["table"]))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "lexicon.json.gz"
+            SynonymLexicon(ENTRIES, fingerprint).save(path)
+            self.assertEqual(len(SynonymLexicon.load(path, fingerprint)), 2)
+            with self.assertLogs("api.utils.synonym_lexicon", "WARNING"):
+                self.assertEqual(len(SynonymLexicon.load(path, "other anchors")), 0)
+        self.assertEqual(len(SynonymLexicon.load(Path(tmp) / "missing.json.gz")), 0)
+
+class VectorIndexTests(SimpleTestCase):
+    VECTORS = np.array([[1.0, 0.0], [0.8, 0.6], [0.0, 1.0], [-1.0, 0.0]])
+
+    def test_exact_search_is_best_first(self):
+        indices, scores = ExactIndex(self.VECTORS).search(np.array([2.0, 0.1]), 3)
+        self.assertEqual(indices, [0, 1, 2])
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_exact_scores_single_and_batched_queries(self):
+        index = ExactIndex(self.VECTORS[:2])
+        self.assertAlmostEqual(index.max(np.array([0.0, 1.0])), 0.6)
+        np.testing.assert_allclose(index.mean(np.array([[1.0, 0.0], [0.0, 1.0]])), [0.9, 0.3])
+
+    def test_build_index_without_approximation_is_exact(self):
+        self.assertIsInstance(build_index(self.VECTORS, approximate=False), ExactIndex)
+        if not installed("hnswlib"):
+            self.assertIsInstance(build_index(self.VECTORS), ExactIndex)
+
+    @requires("hnswlib")
+    def test_hnsw_search_matches_exact_search(self):
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(500, 16))
+        query = vectors[7] + rng.normal(scale=0.01, size=16)
+        exact, _ = ExactIndex(vectors).search(query, 5)
+        approximate, scores = HNSWIndex(vectors).search(query, 5)
+        self.assertEqual(approximate[0], 7)
+        self.assertGreaterEqual(len(set(exact) & set(approximate)), 4)
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+class EmbeddingTableTests(SimpleTestCase):
+    def test_round_trip_through_mmap(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            EmbeddingTable(["strong", "kind"], np.eye(2), model="encoder").save(tmp)
+            table = EmbeddingTable.load(tmp, model="encoder")
+            self.assertIn("STRONG", table)
+            np.testing.assert_array_equal(table.get("kind"), [0.0, 1.0])
+            self.assertIsNone(table.get("bossy"))
+            del table
+
+            with self.assertLogs("api.utils.vector_index", "WARNING"):
+                self.assertIsNone(EmbeddingTable.load(tmp, model="another encoder"))
+        self.assertIsNone(EmbeddingTable.load(""))
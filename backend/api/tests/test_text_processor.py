@@ -0,0 +1,49 @@
+from django.test import SimpleTestCase
+from api.utils.text_processor import TextProcessor
+
+class SentenceSpansTests(SimpleTestCase):
+    def assertSpans(self, text, sentences):
+        spans = TextProcessor.sentence_spans(text)
+        self.assertEqual([text[start:end] for start, end in spans], sentences)
+        self.assertEqual(TextProcessor.extract_sentences(text), sentences)
+
+    def test_offsets_match_the_sentences(self):
+        self.assertSpans("He is strong. She is kind! Is it?", ["He is strong.", "She is kind!", "Is it?"])
+
+    def test_surrounding_whitespace_is_excluded(self):
+        text = "  First one.\n\n   Second one.  "
+        self.assertEqual(TextProcessor.sentence_spans(text), [(2, 12), (17, 28)])
+
+    def test_trailing_fragment_is_a_sentence(self):
+        self.assertSpans("Done. and then", ["Done.", "and then"])
+
+    def test_punctuation_without_whitespace_does_not_split(self):
+        self.assertSpans("Version 2.0 is out. e.g.this stays", ["Version 2.0 is out.", "e.g.this stays"])
+
+    def test_blank_text_has_no_sentences(self):
+        self.assertEqual(TextProcessor.sentence_spans(""), [])
+        self.assertEqual(TextProcessor.sentence_spans(" \n\t "), [])
+
+class PronounStatsTests(SimpleTestCase):
+    def test_reflexives_stay_out_of_the_totals(self):
+        stats = TextProcessor.calculate_pronoun_stats("He did it himself. She told her.")
+        self.assertEqual((stats["himself"], stats["reflexive_total"]), (1, 1))
+        self.assertEqual((stats["masculine_total"], stats["feminine_total"]), (1, 2))
+        self.assertEqual(stats["pronoun_balance"], 33.33)
+
+    def test_counts_are_case_insensitive_whole_words(self):
+        stats = TextProcessor.calculate_pronoun_stats("HE and He, but not the theme or hero.")
+        self.assertEqual(stats["he"], 2)
+        self.assertEqual(stats["them"], 0)
+
+    def test_short_documents_get_no_paragraphs(self):
+        stats = TextProcessor.calculate_pronoun_stats("He spoke.\n\nShe spoke.")
+        self.assertNotIn("paragraphs", stats)
+
+    def test_long_documents_get_paragraph_totals(self):
+        first = "He said so. " * 500
+        text = first + "\n\nShe herself agreed."
+        paragraphs = TextProcessor.calculate_pronoun_stats(text)["paragraphs"]
+        self.assertEqual(len(paragraphs), 2)
+        self.assertEqual(paragraphs[0]["masculine"], 500)
+        self.assertEqual(paragraphs[1], {"masculine": 0, "feminine": 1, "neutral": 0, "start": len(first) + 2})
@@ -0,0 +1,83 @@
+import json
+from unittest import mock
+from django.apps import apps
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from api.models import AnalysisJob
+from .utils import requires_models
+
+class FakeDetector:
+    """
+    Stands in for BiasDetector in score mode and records the ignore lists it is given.
+    """
+    def __init__(self):
+        self.ignored = []
+
+    def analyze_text(self, text, ignored_texts, mode="full", highlight=True):
+        self.ignored.append(ignored_texts)
+        return {"overall_score": 100, "bias_count": 0, "counts": {}, "word_count": len(text.split())}
+
+@requires_models
+class RealTimeIgnoreListTests(SimpleTestCase):
+    def setUp(self):
+        self.sessions = apps.get_app_config('api').analysis_sessions
+        self.detector = FakeDetector()
+        patcher = mock.patch('api.views.get_detector', return_value=self.detector)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, **data):
+        payload = {"text": "The chairman spoke.", "mode": "score", **data}
+        return self.client.post(reverse('real-time-analyze'), json.dumps(payload), content_type='application/json')
+
+    def test_list_is_stored_under_its_version(self):
+        response = self.post(session_id="s1", ignore_version=1, ignored_texts=["chairman"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.sessions.get_ignored("s1", 1), ["chairman"])
+
+        response = self.post(session_id="s1", ignore_version=1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.detector.ignored, [["chairman"], ["chairman"]])
+
+    def test_unknown_version_is_a_conflict(self):
+        self.sessions.set_ignored("s2", 1, ["chairman"])
+        response = self.post(session_id="s2", ignore_version=2)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["code"], "ignored_texts_required")
+        self.assertEqual(self.detector.ignored, [])
+
+    def test_unknown_session_is_a_conflict(self):
+        response = self.post(session_id="never-seen", ignore_version=1)
+        self.assertEqual(response.status_code, 409)
+
+    def test_requests_without_a_version_send_the_list(self):
+        response = self.post(session_id="s3", ignored_texts=["bossy"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.detector.ignored, [["bossy"]])
+        self.assertIsNone(self.sessions.get_ignored("s3", None))
+
+    def test_invalid_list_is_rejected_before_it_is_stored(self):
+        self.sessions.set_ignored("s4", 1, ["chairman"])
+        for ignored_texts in ("chairman", ["chairman", 3], {"chairman": True}, None):
+            response = self.post(session_id="s4", ignore_version=2, ignored_texts=ignored_texts)
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.sessions.get_ignored("s4", 1), ["chairman"])
+        self.assertIsNone(self.sessions.get_ignored("s4", 2))
+        self.assertEqual(self.detector.ignored, [])
+
+class IgnoreListValidationTests(TestCase):
+    @requires_models
+    def test_batch_rejects_an_invalid_list(self):
+        response = self.client.post(
+            reverse('batch-analyze'), json.dumps({"documents": ["Hi."], "ignored_texts": "chairman"}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_job_submission_rejects_an_invalid_list(self):
+        response = self.client.post(
+            reverse('analysis-jobs'), json.dumps({"text": "Hi.", "ignored_texts": [1, 2]}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(AnalysisJob.objects.exists())
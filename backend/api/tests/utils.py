@@ -0,0 +1,16 @@
+from importlib.util import find_spec
+from unittest import skipUnless
+
+def installed(*packages):
+    return all(find_spec(package) is not None for package in packages)
+
+def requires(*packages):
+    """
+    Skips a test case unless the packages are installed, for tests of the model code in
+    environments without the model dependencies.
+    """
+    return skipUnless(installed(*packages), f"needs {', '.join(packages)}")
+
+# Imported by BiasDetector and therefore by the analysis views
+MODEL_PACKAGES = ("torch", "transformers", "sentence_transformers", "spacy", "gliner", "fastcoref")
+requires_models = requires(*MODEL_PACKAGES)
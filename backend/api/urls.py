@@ -1,8 +1,17 @@
 from django.urls import path
-from .views import RealTimeAnalyzeView, ApplySuggestionView, DocumentUploadView
+from .views import (
+    RealTimeAnalyzeView, BatchAnalyzeView, ApplySuggestionView, DocumentUploadView,
+    AnalysisJobSubmitView, AnalysisJobDetailView, AnalysisJobProgressView, MetricsView, HealthView
+)
 
 urlpatterns = [
     path('real-time-analyze/', RealTimeAnalyzeView.as_view(), name='real-time-analyze'),
+    path('batch-analyze/', BatchAnalyzeView.as_view(), name='batch-analyze'),
+    path('analysis-jobs/', AnalysisJobSubmitView.as_view(), name='analysis-jobs'),
+    path('analysis-jobs/<uuid:job_id>/', AnalysisJobDetailView.as_view(), name='analysis-job'),
+    path('analysis-jobs/<uuid:job_id>/progress/', AnalysisJobProgressView.as_view(), name='analysis-job-progress'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+    path('health/', HealthView.as_view(), name='health'),
     path('apply-suggestion/', ApplySuggestionView.as_view(), name='apply-suggestion'),
     path('upload-document/', DocumentUploadView.as_view(), name='upload-document')
 ]
\ No newline at end of file
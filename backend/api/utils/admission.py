@@ -0,0 +1,143 @@
+import re
+import math
+import time
+import threading
+from contextlib import contextmanager
+from .metrics import registry
+
+SENTENCE_END = re.compile(r"[.!?]+")
+
+class Rejected(Exception):
+    """
+    Raised by AdmissionController.admit when a request is not admitted. status is the HTTP
+    status to answer with, retry_after the seconds the client should wait (None if
+    retrying will not help).
+    """
+    def __init__(self, status, code, message, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """
+    Decides whether a real-time analysis runs now, runs in a cheaper mode or is rejected,
+    so that bursts of editors and pasted books cannot queue up behind each other.
+
+    The cost of a request is estimated from its word and sentence counts (every sentence is
+    a separate model input, whatever its length), weighted by the analysis mode. Each
+    process admits requests while their combined cost stays within process_max_cost and
+    each client has at most process_client_concurrency requests in flight. As the in-flight cost grows,
+    full analyses are served in the cheaper modes of degrade_at instead: "detect" keeps the
+    highlights but skips rewrites and synonym suggestions, "score" only returns the score.
+
+    Limits are per process, like the analysis sessions: nothing is shared between workers,
+    so with N workers the server admits up to N times process_max_cost, and a client may
+    have process_client_concurrency requests in flight on each of them. A request that fits
+    in no mode is rejected with a retry hint: the seconds until this process has drained
+    enough cost (or the client's own requests on it), from the observed seconds per unit
+    of cost. Another worker may take a retry sooner.
+    """
+    # Cheapest last, see BiasDetector.MODES
+    LADDER = ("full", "detect", "score")
+    # Cost of a sentence on top of its words
+    SENTENCE_COST = 8
+    MAX_RETRY_AFTER = 30
+
+    def __init__(self, process_max_cost, process_client_concurrency, max_words, mode_cost, degrade_at):
+        self.process_max_cost = process_max_cost
+        self.process_client_concurrency = process_client_concurrency
+        self.max_words = max_words
+        self.mode_cost = mode_cost
+        self.degrade_at = degrade_at
+        self.in_flight = 0.0
+        # client -> [requests, cost] in flight
+        self.clients = {}
+        # Running average of request seconds per unit of cost, for Retry-After
+        self.seconds_per_cost = 0.005
+        self._lock = threading.Lock()
+
+    def estimate(self, text):
+        """
+        (words, sentences) of a text, without running the sentence splitter.
+        """
+        words = len(text.split())
+        return words, max(1, sum(1 for part in SENTENCE_END.split(text) if part.strip()))
+
+    def cost(self, words, sentences, mode):
+        return (words + self.SENTENCE_COST * sentences) * self.mode_cost.get(mode, 1.0)
+
+    def retry_after(self, cost):
+        return max(1, min(self.MAX_RETRY_AFTER, math.ceil(cost * self.seconds_per_cost)))
+
+    @contextmanager
+    def admit(self, client, text, mode):
+        """
+        Holds a slot for the request while the block runs and yields the mode to analyze
+        it in, which is mode or a cheaper one. Raises Rejected if it is not admitted.
+        """
+        words, sentences = self.estimate(text)
+        if self.max_words and words > self.max_words:
+            self._count("too_large")
+            raise Rejected(
+                413, "too_large",
+                f"Text has {words} words, real-time analysis accepts up to {self.max_words}. Submit it as an analysis job."
+            )
+
+        with self._lock:
+            requests, client_cost = self.clients.get(client, (0, 0.0))
+            if self.process_client_concurrency and requests >= self.process_client_concurrency:
+                # A slot frees up once the client's own requests on this process finish
+                retry_after = self.retry_after(client_cost / requests)
+                self._count("client_limit")
+                raise Rejected(429, "client_limit", "Too many concurrent analyses for this client on this worker.", retry_after)
+
+            served, cost = self._choose_mode(words, sentences, mode)
+            if served is None:
+                retry_after = self.retry_after(self.in_flight + cost - self.process_max_cost)
+                self._count("overloaded")
+                raise Rejected(503, "overloaded", "This worker is at capacity, retry shortly.", retry_after)
+
+            self.in_flight += cost
+            self.clients[client] = [requests + 1, client_cost + cost]
+
+        self._count("admitted" if served == mode else f"degraded_{served}")
+        start = time.perf_counter()
+        try:
+            yield served
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.in_flight -= cost
+                entry = self.clients[client]
+                entry[0] -= 1
+                entry[1] -= cost
+                if not entry[0]: del self.clients[client]
+                if cost: self.seconds_per_cost = 0.9 * self.seconds_per_cost + 0.1 * elapsed / cost
+
+    def _choose_mode(self, words, sentences, mode):
+        """
+        The mode to serve under the current load and its cost, (None, cost of the cheapest
+        mode) if none fits. Called with the lock held.
+        """
+        candidates = self.LADDER[self.LADDER.index(mode):] if mode in self.LADDER else (mode,)
+        load = self.in_flight / self.process_max_cost if self.process_max_cost else 0.0
+
+        cost = 0.0
+        for candidate in candidates:
+            cheaper = candidates[candidates.index(candidate) + 1:]
+            # Degrade further while a cheaper mode's threshold is already reached
+            if any(load >= self.degrade_at.get(m, math.inf) for m in cheaper): continue
+
+            cost = self.cost(words, sentences, candidate)
+            # An idle process always takes the request, however large
+            if not self.process_max_cost or not self.in_flight or self.in_flight + cost <= self.process_max_cost:
+                return candidate, cost
+        return None, cost
+
+    @staticmethod
+    def _count(result):
+        registry.increment(
+            "neutral_net_admission_total", {"result": result},
+            help_text="Real-time analysis requests by admission result: admitted, degraded_<mode>, too_large, client_limit or overloaded."
+        )
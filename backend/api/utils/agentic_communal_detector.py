@@ -1,10 +1,61 @@
+import re
 import spacy
 import torch
 import uuid
 import time
+import numpy as np
 from transformers import pipeline
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import SentenceTransformer
 from gliner import GLiNER
+from django.conf import settings
+from .metrics import track, registry
+from .cache import LRUCache
+from .interval_index import IntervalIndex
+from .synonym_lexicon import SynonymLexicon
+from .vector_index import ExactIndex, EmbeddingTable, cosine
+
+class DeferredSubject:
+    """
+    Subject update of a screened sentence. Its subject was never classified, which is only
+    worth doing if a later sentence needs the document context.
+    """
+    def __init__(self, text):
+        self.text = text
+
+class DiscourseContext:
+    """
+    Subject-tracking state for one document, used to resolve pronoun subjects
+    against the last explicit subject. Kept outside the detector so that a single
+    shared detector can analyze many documents concurrently.
+
+    Screened sentences defer their subject update. When the context is next read, the
+    deferred sentences are classified by resolve (AgenticCommunalDetector.resolve_subject),
+    latest first, until one of them names a subject, so the context is the same as if
+    every sentence had been classified. Without resolve, deferred sentences are dropped.
+    """
+    def __init__(self, resolve=None):
+        self.last_subject = None
+        self.last_subject_was_human = False
+        self.resolve = resolve
+        self.deferred = []
+
+    @property
+    def previous_subject_non_human(self):
+        deferred, self.deferred = self.deferred, []
+        if self.resolve is not None:
+            for text in reversed(deferred):
+                subject_update = self.resolve(text)
+                if subject_update is not None:
+                    self.update(subject_update)
+                    break
+        return bool(self.last_subject) and not self.last_subject_was_human
+
+    def update(self, subject_update):
+        if isinstance(subject_update, DeferredSubject):
+            self.deferred.append(subject_update.text)
+        elif subject_update is not None:
+            self.last_subject, self.last_subject_was_human = subject_update
+            self.deferred = []
 
 class AgenticCommunalDetector:
     """
@@ -17,6 +68,48 @@ class AgenticCommunalDetector:
         Agentic and Communal anchors.
         - distilroberta - Context-aware synonym generation for replacements.
     """
+    ENCODER_NAME = "all-MiniLM-L6-v2"
+
+    ENTITY_LABELS = [
+        "Person", "Job Role", "Family Member", "Individual", 
+        "Animal", 
+        "Group of People", "Organization", "Technology", "Inanimate Object", "Abstract Concept"
+    ]
+
+    AGENTIC_ANCHORS = [
+        "dominant", "aggressive", "ambitious", "forceful", "leader", "decisive", 
+        "intellectual", "confident", "assertive", "competitive", "logical", "strategic",
+        "command", "commands", "commanding", "imposing", "charge", 
+        "defensive" 
+    ]
+
+    COMMUNAL_ANCHORS = [
+        "caring", "gentle", "supportive", "sensitive", "collaborative", "helper", 
+        "compassionate", "honest", "understanding", "loyal", "kind", "emotional"
+    ]
+
+    HUMAN_ANCHORS = [
+        "human", "person", "man", "woman", "someone", "people",
+        "worker", "employee", "staff", "leader", "professional",
+        "expert", "individual", "boy", "girl"
+    ]
+
+    NON_HUMAN_ANCHORS = [
+        "animal", "creature", "species", "beast", "organism",
+        "object", "machine", "tool", "software", "thing", "place", 
+        "concept", "idea", "state", "abstract", "process",
+        "plan", "method", "structure", "device", "document",
+        "action", "effort", "work", "atmosphere", "environment", "condition",
+        "market", "sensor", "detector", "system", "algorithm", "camera",
+        "group", "team", "committee", "board", "management", "investors", "critics"
+    ]
+
+    FUNCTIONAL_ANCHORS = [
+        "direction", "movement", "speed", "quantity", "size", "time", "location", 
+        "physical", "technical", "mechanical", "code", "software", "system",
+        "future", "forward", "back", "clean"
+    ]
+
     def __init__(self):        
         try:
             self.nlp = spacy.load("en_core_web_sm")
@@ -25,43 +118,36 @@ class AgenticCommunalDetector:
             download("en_core_web_sm")
             self.nlp = spacy.load("en_core_web_sm")
 
-        self.encoder = SentenceTransformer('all-MiniLM-L6-v2')
+        self.encoder = SentenceTransformer(self.ENCODER_NAME)
         self.entity_model = GLiNER.from_pretrained("urchade/gliner_small-v2.1")
         self.fixer = pipeline("fill-mask", model="distilroberta-base")
+
+        # GLiNER entities per sentence, with offsets relative to the sentence
+        self.entity_cache = LRUCache("gliner_entities", maxsize=4096)
+        self.embedding_cache = LRUCache("sentence_embeddings", maxsize=4096)
+
+        # First cascade stage. A threshold of 0 disables the early exit
+        self.screen_threshold = settings.AGENTIC_SCREEN_THRESHOLD
+        self.screen_lexicon = set(self.AGENTIC_ANCHORS + self.COMMUNAL_ANCHORS) if settings.AGENTIC_SCREEN_LEXICON else set()
                 
-        self.human_anchors = self.encoder.encode([
-            "human", "person", "man", "woman", "someone", "people",
-            "worker", "employee", "staff", "leader", "professional",
-            "expert", "individual", "boy", "girl"
-        ])
-       
-        self.non_human_anchors = self.encoder.encode([
-            "animal", "creature", "species", "beast", "organism",
-            "object", "machine", "tool", "software", "thing", "place", 
-            "concept", "idea", "state", "abstract", "process",
-            "plan", "method", "structure", "device", "document",
-            "action", "effort", "work", "atmosphere", "environment", "condition",
-            "market", "sensor", "detector", "system", "algorithm", "camera",
-            "group", "team", "committee", "board", "management", "investors", "critics"
-        ])
-
-        self.agentic_concept = self.encoder.encode([
-            "dominant", "aggressive", "ambitious", "forceful", "leader", "decisive", 
-            "intellectual", "confident", "assertive", "competitive", "logical", "strategic",
-            "command", "commands", "commanding", "imposing", "charge", 
-            "defensive" 
-        ])
-
-        self.communal_concept = self.encoder.encode([
-            "caring", "gentle", "supportive", "sensitive", "collaborative", "helper", 
-            "compassionate", "honest", "understanding", "loyal", "kind", "emotional"
-        ])
-
-        self.functional_concept = self.encoder.encode([
-            "direction", "movement", "speed", "quantity", "size", "time", "location", 
-            "physical", "technical", "mechanical", "code", "software", "system",
-            "future", "forward", "back", "clean"
-        ])
+        # Precomputed word embeddings, words missing from the table are encoded on demand
+        self.embeddings = EmbeddingTable.load(settings.EMBEDDING_TABLE_PATH, self.ENCODER_NAME)
+
+        self.human_anchors = self.word_vectors(self.HUMAN_ANCHORS)
+        self.non_human_anchors = self.word_vectors(self.NON_HUMAN_ANCHORS)
+        self.agentic_concept = self.word_vectors(self.AGENTIC_ANCHORS)
+        self.communal_concept = self.word_vectors(self.COMMUNAL_ANCHORS)
+        self.functional_concept = self.word_vectors(self.FUNCTIONAL_ANCHORS)
+
+        # Anchor lists are small, so they are scored exactly
+        self.human_index = ExactIndex(self.human_anchors)
+        self.non_human_index = ExactIndex(self.non_human_anchors)
+        self.agentic_index = ExactIndex(self.agentic_concept)
+        self.communal_index = ExactIndex(self.communal_concept)
+        self.functional_index = ExactIndex(self.functional_concept)
+
+        # Fast path for replacements, fill-mask only runs for words it has no fitting entry for
+        self.lexicon = SynonymLexicon.load(settings.SYNONYM_LEXICON_PATH, self.lexicon_fingerprint())
 
         self.technical_containers = {
             "strategy", "timeline", "architecture", "approach", "framework", 
@@ -69,21 +155,133 @@ class AgenticCommunalDetector:
             "output", "result", "deadline", "project", "market", "legislation",
             "sensor", "code", "database", "bond", "fund", "presentation"
         }
-        
-        self.last_subject = None
-        self.last_subject_was_human = False
 
-    def get_dynamic_subject_type(self, text, subject_text):
+    def encode(self, texts):
+        """
+        Embeds a word, a sentence or a list of them with MiniLM.
+        """
+        with track("embedding", len(texts) if isinstance(texts, list) else 1):
+            return self.encoder.encode(texts)
+
+    def word_vectors(self, words):
+        """
+        Embeddings of single words as one matrix. Words in the embedding table are read
+        from it, the rest are encoded in one MiniLM call.
+        """
+        vectors = [self.embeddings.get(word) if self.embeddings is not None else None for word in words]
+        missing = [i for i, vec in enumerate(vectors) if vec is None]
+        if missing:
+            for i, vec in zip(missing, self.encode([words[i] for i in missing])):
+                vectors[i] = vec
+
+        registry.increment(
+            "neutral_net_word_embeddings_total", {"source": "table"}, len(words) - len(missing),
+            help_text="Word embeddings read from the embedding table or computed by the encoder."
+        )
+        registry.increment("neutral_net_word_embeddings_total", {"source": "encoder"}, len(missing))
+        if not vectors:
+            return np.empty((0, self.encoder.get_sentence_embedding_dimension()), dtype=np.float32)
+        return np.stack(vectors)
+
+    def parse(self, text):
+        with track("dependency_parse"):
+            return self.nlp(text)
+
+    def embed_sentences(self, sentences):
+        """
+        Sentence embeddings, cached per sentence. Missing sentences are encoded in one
+        batched call, so a document costs a single encoder pass.
+        """
+        found = {}
+        missing = []
+        for sentence in dict.fromkeys(sentences):
+            vec = self.embedding_cache.get(sentence)
+            if vec is None: missing.append(sentence)
+            else: found[sentence] = vec
+
+        if missing:
+            for sentence, vec in zip(missing, self.encode(missing)):
+                self.embedding_cache.put(sentence, vec)
+                found[sentence] = vec
+
+        return [found[s] for s in sentences]
+
+    def skew_scores(self, sentence_vec):
+        return self.agentic_index.mean(sentence_vec), self.communal_index.mean(sentence_vec)
+
+    def has_lexicon_hit(self, text):
+        for word in re.findall(r"[a-z]+", text.lower()):
+            if word in self.screen_lexicon: return True
+            if word.endswith("ly") and word[:-2] in self.screen_lexicon: return True
+            if word.endswith("s") and word[:-1] in self.screen_lexicon: return True
+        return False
+
+    def screen_sentence(self, text):
+        """
+        First, cheap stage of the cascade. A sentence with no skew lexicon hit whose cached
+        embedding scores below the screen threshold on both anchors is clearly neutral and
+        skips subject detection, GLiNER and span extraction.
+
+        Returns (passed, agentic_score, communal_score).
+        """
+        agentic_score, communal_score = self.skew_scores(self.embed_sentences([text])[0])
+        passed = (
+            self.screen_threshold <= 0
+            or max(agentic_score, communal_score) >= self.screen_threshold
+            or self.has_lexicon_hit(text)
+        )
+        return passed, agentic_score, communal_score
+
+    def screen_sentences(self, sentences):
+        """
+        Batched screen over a document. Returns the sentences that pass.
+        """
+        self.embed_sentences(sentences)
+        return [s for s in sentences if self.screen_sentence(s)[0]]
+
+    def predict_entities(self, sentences, batch_size=8):
+        """
+        Runs GLiNER over every sentence that has no cached entities in batched forward
+        passes, and returns the entities of each sentence in input order.
+        """
+        found = {}
+        missing = []
+        for sentence in dict.fromkeys(sentences):
+            entities = self.entity_cache.get(sentence)
+            if entities is None: missing.append(sentence)
+            else: found[sentence] = entities
+
+        if missing:
+            with track("gliner", len(missing)):
+                predictions = self.entity_model.batch_predict_entities(
+                    missing, self.ENTITY_LABELS, threshold=0.3, batch_size=batch_size
+                )
+            for sentence, entities in zip(missing, predictions):
+                self.entity_cache.put(sentence, entities)
+                found[sentence] = entities
+
+        return [found[s] for s in sentences]
+
+    def build_entity_index(self, located_sentences, batch_size=8):
+        """
+        Document-level entity pass. Takes (sentence, start offset) pairs and returns an
+        IntervalIndex of their entities by document character offset.
+        """
+        sentences = [sentence for sentence, _ in located_sentences]
+        intervals = []
+        for (_, offset), entities in zip(located_sentences, self.predict_entities(sentences, batch_size)):
+            for ent in entities:
+                intervals.append((offset + ent['start'], offset + ent['end'], ent))
+        return IntervalIndex(intervals)
+
+    def get_dynamic_subject_type(self, text, subject_text, entities=None):
         """
-        Uses GLINER to classify subject
+        Uses GLINER to classify subject. The sentence's entities are looked up from a
+        document-level entity pass when given, otherwise predicted for this sentence alone.
         """
         if not subject_text: return "UNKNOWN"        
-        labels = [
-            "Person", "Job Role", "Family Member", "Individual", 
-            "Animal", 
-            "Group of People", "Organization", "Technology", "Inanimate Object", "Abstract Concept"
-        ]       
-        entities = self.entity_model.predict_entities(text, labels, threshold=0.3)       
+        if entities is None:
+            entities = self.predict_entities([text])[0]
         for ent in entities:
             if subject_text.lower() in ent['text'].lower() or ent['text'].lower() in subject_text.lower():
                 label = ent['label']
@@ -95,11 +293,15 @@ class AgenticCommunalDetector:
                     return "NON_HUMAN"                    
         return "UNKNOWN"
 
-    def get_subject(self, text):
+    def get_subject(self, text, doc=None):
         """
         Uses spacy (dependency parsing) to extract the nominal subject
         """
-        doc = self.nlp(text)
+        if doc is None: doc = self.parse(text)
+        with track("subject_detection"):
+            return self._get_subject(doc)
+
+    def _get_subject(self, doc):
         candidates = []
 
         for token in doc:
@@ -122,15 +324,15 @@ class AgenticCommunalDetector:
         return candidates[0].text if candidates else None
     
     def is_noun_human(self, noun):        
-        noun_vec = self.encoder.encode(noun)
-        human_sim = util.cos_sim(noun_vec, self.human_anchors).max().item()
-        non_human_sim = util.cos_sim(noun_vec, self.non_human_anchors).max().item()
+        noun_vec = self.word_vectors([noun])[0]
+        human_sim = self.human_index.max(noun_vec)
+        non_human_sim = self.non_human_index.max(noun_vec)
         return human_sim > (non_human_sim - 0.05)
 
     def is_explicitly_human(self, word):        
-        vec = self.encoder.encode(word)
-        human_sim = util.cos_sim(vec, self.human_anchors).max().item()
-        non_human_sim = util.cos_sim(vec, self.non_human_anchors).max().item()
+        vec = self.word_vectors([word])[0]
+        human_sim = self.human_index.max(vec)
+        non_human_sim = self.non_human_index.max(vec)
         return human_sim > 0.35 and human_sim > non_human_sim
 
     def has_human_possessive(self, token):
@@ -139,17 +341,21 @@ class AgenticCommunalDetector:
                 return True
         return False
 
-    def find_biased_spans(self, text, skew_verdict, verbose=False):
+    def find_biased_spans(self, text, skew_verdict, verbose=False, doc=None, with_replacements=True, ignored_words=frozenset()):
         """
         Iterates through adjectives and verbs, calculates their semantic distance from bias anchors
-        and flags them if they modify a human subject.
+        and flags them if they modify a human subject. with_replacements=False skips the fill-mask
+        synonym search, for callers that only need the detections. Words in ignored_words (lowercase)
+        are never encoded or flagged.
         """
-        doc = self.nlp(text)
+        if doc is None: doc = self.parse(text)
         spans = []
+        candidates = []
         
         for token in doc:
             if token.pos_ not in ["ADJ", "ADV", "VERB", "NOUN"]: continue
             if token.is_stop or len(token.text) < 3: continue
+            if token.text.lower() in ignored_words: continue
             if token.dep_ == 'pobj': continue
             if token.lemma_.lower() in self.technical_containers:
                 continue
@@ -178,12 +384,17 @@ class AgenticCommunalDetector:
                 elif verbose:
                     print(f"[DEBUG] Checking Word '{token.text}' -> Target '{target_noun.text}' is Valid Human")
 
-            word_vec = self.encoder.encode(token.text)
-            
-            agentic_sim = util.cos_sim(word_vec, self.agentic_concept).mean().item()
-            communal_sim = util.cos_sim(word_vec, self.communal_concept).mean().item()
-            functional_sim = util.cos_sim(word_vec, self.functional_concept).mean().item() 
-            
+            candidates.append(token)
+
+        if not candidates: return spans
+
+        # One encoder call for every candidate word of the sentence
+        word_vecs = self.word_vectors([token.text for token in candidates])
+        agentic_sims = self.agentic_index.mean(word_vecs).tolist()
+        communal_sims = self.communal_index.mean(word_vecs).tolist()
+        functional_sims = self.functional_index.mean(word_vecs).tolist()
+
+        for token, agentic_sim, communal_sim, functional_sim in zip(candidates, agentic_sims, communal_sims, functional_sims):
             max_bias = max(agentic_sim, communal_sim)
             if functional_sim > max_bias: continue
 
@@ -200,7 +411,7 @@ class AgenticCommunalDetector:
                     score = communal_sim
             
             if bias_type:
-                replacements = self.generate_replacements(text, token, bias_type)
+                replacements = self.generate_replacements(text, token, bias_type) if with_replacements else []
                 reason = self.generate_span_reason(token.text, bias_type, skew_verdict)
                 
                 start_char = token.idx
@@ -226,38 +437,73 @@ class AgenticCommunalDetector:
                 return f"'{word}' contributes to a heavy Communal skew. This can inadvertently minimize technical competence."
             return f"'{word}' is Communal. Ensure this doesn't overshadow leadership traits."
 
+    @classmethod
+    def lexicon_fingerprint(cls):
+        return SynonymLexicon.anchor_fingerprint(cls.AGENTIC_ANCHORS, cls.COMMUNAL_ANCHORS, cls.FUNCTIONAL_ANCHORS)
+
+    def lexicon_replacements(self, text, token, bias_type):
+        """
+        Neutral alternatives from the precomputed lexicon that keep the word's part of speech
+        and, substituted into the sentence, keep its meaning. All substituted sentences are
+        encoded in one call. Returns None if the lexicon cannot answer, or none of its
+        alternatives fits the sentence, and an empty list if the word has no neutral alternative.
+        """
+        candidates = self.lexicon.lookup(token.text, bias_type, token.pos_)
+        if not candidates: return candidates
+
+        original_sent_vec = self.embed_sentences([text])[0]
+        substituted = [text[:token.idx] + word + text[token.idx + len(token.text):] for word in candidates]
+        context_fidelity = ExactIndex(self.encode(substituted)).similarities(original_sent_vec).tolist()
+
+        fitting = [word for word, fidelity in zip(candidates, context_fidelity) if fidelity >= 0.85]
+        return fitting[:3] if fitting else None
+
     def generate_replacements(self, text, token, bias_type):
         """
         Uses Distilroberta to generate contextual synonyms, and filters them
-        via cosine similarity to ensure they are tonally neutral
+        via cosine similarity to ensure they are tonally neutral. Words the synonym
+        lexicon can answer for skip the fill-mask search.
         """
+        replacements = self.lexicon_replacements(text, token, bias_type)
+        registry.increment(
+            "neutral_net_replacement_source_total", {"source": "fill_mask" if replacements is None else "lexicon"},
+            help_text="Agentic/communal replacement searches by where the alternatives came from."
+        )
+        if replacements is not None:
+            return replacements or ["(No neutral synonym found)"]
+
         masked_text = text[:token.idx] + self.fixer.tokenizer.mask_token + text[token.idx + len(token.text):]
-        preds = self.fixer(masked_text, top_k=60)
+        with track("fill_mask"):
+            preds = self.fixer(masked_text, top_k=60)
         
-        bad_concept = self.communal_concept if bias_type == "Communal" else self.agentic_concept
-        original_vec = self.encoder.encode(token.text)
-        original_sent_vec = self.encoder.encode(text)
+        bad_index = self.communal_index if bias_type == "Communal" else self.agentic_index
+        original_vec = self.word_vectors([token.text])[0]
+        original_sent_vec = self.embed_sentences([text])[0]
+
+        words = list(dict.fromkeys(
+            word for word in (p['token_str'].strip().lower() for p in preds)
+            if word.isalpha() and word != token.text.lower()
+        ))
+        word_vecs = self.word_vectors(words)
 
         perfect_matches = []
         soft_matches = []
         
-        for p in preds:
-            word = p['token_str'].strip().lower()
-            if not word.isalpha() or word == token.text.lower(): continue
-            
-            temp_text = text[:token.idx] + word + text[token.idx + len(token.text):]
-            temp_doc = self.nlp(temp_text)
-            if temp_doc[token.i].pos_ != token.pos_: continue
-
-            word_vec = self.encoder.encode(word)
-            cand_badness = util.cos_sim(word_vec, bad_concept).mean().item()
+        # Word-level checks first, they need no parse or encoder call
+        for word, word_vec in zip(words, word_vecs):
+            cand_badness = bad_index.mean(word_vec)
             if cand_badness >= 0.35: continue
             
-            word_fidelity = util.cos_sim(original_vec, word_vec).mean().item()
+            word_fidelity = cosine(original_vec, word_vec)
             if word_fidelity < 0.5: continue 
 
-            cand_sent_vec = self.encoder.encode(temp_text)
-            context_fidelity = util.cos_sim(original_sent_vec, cand_sent_vec).item()
+            temp_text = text[:token.idx] + word + text[token.idx + len(token.text):]
+            with track("dependency_parse"):
+                temp_doc = self.nlp(temp_text)
+            if temp_doc[token.i].pos_ != token.pos_: continue
+
+            cand_sent_vec = self.encode(temp_text)
+            context_fidelity = cosine(original_sent_vec, cand_sent_vec)
             if context_fidelity < 0.85: continue
 
             if word_fidelity > 0.6:
@@ -272,12 +518,96 @@ class AgenticCommunalDetector:
             
         return final_suggestions[:3] if final_suggestions else ["(No neutral synonym found)"]
 
-    def analyze_sentence(self, text, verbose=False):
+    def analyze_sentence(self, text, context=None, verbose=False):
         """
         Resolves subjects, calculates global sentence skew and triggers targeted span extraction
-        if threshold exceeded.
-        """        
-        raw_subject = self.get_subject(text)
+        if threshold exceeded. Sentences of the same document should share one DiscourseContext,
+        so pronoun subjects can be traced back to earlier sentences.
+        """
+        if context is None: context = DiscourseContext(self.resolve_subject)
+
+        biases, subject_update = self.classify_sentence(text, context.previous_subject_non_human, verbose)
+        context.update(subject_update)
+        return biases
+
+    def classify_sentence(self, text, previous_subject_non_human=False, verbose=False, entities=None, with_replacements=True, ignored_words=frozenset()):
+        """
+        Stateless core of analyze_sentence. The result depends only on the arguments, so it
+        can be cached on (text, previous_subject_non_human, with_replacements, ignored_words).
+        entities are the sentence's GLiNER entities if a document-level pass already produced them.
+
+        Returns the detected biases, and the (subject, is_human) pair the document context
+        should track from now on, or None if the sentence does not introduce a new subject.
+        """
+        stage, spans, subject_update = self.run_cascade(text, previous_subject_non_human, verbose, entities, with_replacements, ignored_words)
+        formatted_biases = self.format_spans(spans)
+
+        if verbose and stage == "spans":
+            if formatted_biases:
+                print(f"[DEBUG] DETECTED {len(formatted_biases)} agentic/communal biases.")
+            else:
+                print(f"[DEBUG] NEUTRAL. No biases found.")
+
+        return self.exit_at(stage, formatted_biases, subject_update)
+
+    def run_cascade(self, text, previous_subject_non_human=False, verbose=False, entities=None, with_replacements=True, ignored_words=frozenset()):
+        """
+        The classification cascade behind classify_sentence, returning the raw spans of
+        find_biased_spans. Returns (stage, spans, subject_update), stage being the cascade
+        stage the sentence stopped at: "screen", "non_human", "threshold" or "spans".
+        Screened sentences do not depend on previous_subject_non_human and return a
+        DeferredSubject, see DiscourseContext.
+        """
+        passed, agentic_score, communal_score = self.screen_sentence(text)
+        if not passed:
+            if verbose: print(f"[DEBUG] EXIT: Screened out (Agentic={agentic_score:.3f}, Communal={communal_score:.3f})")
+            return "screen", [], DeferredSubject(text)
+
+        doc = self.parse(text)
+        current_subject_is_human, is_strong_human, subject_update = self.classify_subject(
+            text, doc, previous_subject_non_human, entities, verbose
+        )
+
+        if not current_subject_is_human:
+            if verbose: print(f"[DEBUG] EXIT: Subject classified as Non-Human.")
+            return "non_human", [], subject_update
+
+        if verbose: print(f"[DEBUG] Sentence Scores: Agentic={agentic_score:.3f}, Communal={communal_score:.3f}")
+
+        if is_strong_human and verbose: print("[DEBUG] Strong Human detected -> BYPASSING THRESHOLD")
+
+        if not is_strong_human:
+            if max(agentic_score, communal_score) < 0.14:
+                if verbose: print("[DEBUG] EXIT: Failed Global Threshold")
+                return "threshold", [], subject_update
+
+        total_intensity = agentic_score + communal_score
+        if total_intensity < 0.01: communal_ratio = 0.5
+        else: communal_ratio = communal_score / total_intensity
+        
+        skew_verdict = "Balanced"
+        if communal_ratio > 0.65: skew_verdict = "Skewed Communal"
+        elif communal_ratio < 0.35: skew_verdict = "Skewed Agentic"
+
+        spans = self.find_biased_spans(text, skew_verdict, verbose, doc, with_replacements, ignored_words)
+        return "spans", spans, subject_update
+
+    def resolve_subject(self, text):
+        """
+        Subject update of a sentence that was screened out, as the cascade would have
+        produced it. Used by DiscourseContext for deferred sentences.
+        """
+        return self.classify_subject(text, self.parse(text), False)[2]
+
+    def classify_subject(self, text, doc, previous_subject_non_human=False, entities=None, verbose=False):
+        """
+        Subject stage of the cascade. Returns (is_human, is_strong_human, subject_update):
+        whether the sentence is about a person, whether GLiNER said so for an explicit
+        subject, and the (subject, is_human) pair the document context should track, None
+        for pronoun subjects and sentences without one.
+        """
+        subject_update = None
+        raw_subject = self.get_subject(text, doc)
         if verbose: print(f"[DEBUG] Raw Subject Found: '{raw_subject}'")
         
         is_pronoun = raw_subject and raw_subject.lower() in ["he", "she", "it", "they", "this", "that"]
@@ -287,63 +617,40 @@ class AgenticCommunalDetector:
         if raw_subject:
             if is_pronoun: 
                 if verbose: print(f"[DEBUG] Decision: Pronoun detected. Tracking back...")
-                if self.last_subject and not self.last_subject_was_human:
-                    if verbose: print(f"[DEBUG] -> Previous subject '{self.last_subject}' was Non-Human. Resetting.")
+                if previous_subject_non_human:
+                    if verbose: print(f"[DEBUG] -> Previous subject was Non-Human. Resetting.")
                     current_subject_is_human = False
                 elif raw_subject.lower() in ["it", "this", "that"]:
                     current_subject_is_human = False
             else:
-                dynamic_type = self.get_dynamic_subject_type(text, raw_subject)
+                dynamic_type = self.get_dynamic_subject_type(text, raw_subject, entities)
                 
                 if dynamic_type == "HUMAN":
                     if verbose: print(f"[DEBUG] Decision: GLiNER classified '{raw_subject}' as HUMAN")
                     current_subject_is_human = True
-                    self.last_subject = raw_subject
-                    self.last_subject_was_human = True
+                    subject_update = (raw_subject, True)
                 elif dynamic_type in ["NON_HUMAN", "ANIMAL"]:
                     if verbose: print(f"[DEBUG] Decision: GLiNER classified '{raw_subject}' as {dynamic_type}")
                     current_subject_is_human = False
-                    self.last_subject = raw_subject
-                    self.last_subject_was_human = False
+                    subject_update = (raw_subject, False)
                 else:
                     if verbose: print(f"[DEBUG] GLiNER unsure. Falling back to Vector Space...")
-                    noun_vec = self.encoder.encode(raw_subject)
-                    h_sim = util.cos_sim(noun_vec, self.human_anchors).max().item()
-                    nh_sim = util.cos_sim(noun_vec, self.non_human_anchors).max().item()
+                    noun_vec = self.word_vectors([raw_subject])[0]
+                    h_sim = self.human_index.max(noun_vec)
+                    nh_sim = self.non_human_index.max(noun_vec)
                     if verbose: print(f"[DEBUG] Vector Check: Human={h_sim:.3f} vs Non-Human={nh_sim:.3f}")
                     
                     current_subject_is_human = h_sim > nh_sim
-                    self.last_subject = raw_subject
-                    self.last_subject_was_human = current_subject_is_human
-
-        if not current_subject_is_human:
-            if verbose: print(f"[DEBUG] EXIT: Subject classified as Non-Human.")
-            return [] 
-
-        sent_vec = self.encoder.encode(text)
-        agentic_score = util.cos_sim(sent_vec, self.agentic_concept).mean().item()
-        communal_score = util.cos_sim(sent_vec, self.communal_concept).mean().item()
-        
-        if verbose: print(f"[DEBUG] Sentence Scores: Agentic={agentic_score:.3f}, Communal={communal_score:.3f}")
+                    subject_update = (raw_subject, current_subject_is_human)
 
         is_strong_human = (dynamic_type == "HUMAN") if not is_pronoun else False
-        if is_strong_human and verbose: print("[DEBUG] Strong Human detected -> BYPASSING THRESHOLD")
-
-        if not is_strong_human:
-            if max(agentic_score, communal_score) < 0.14:
-                if verbose: print("[DEBUG] EXIT: Failed Global Threshold")
-                return []
-
-        total_intensity = agentic_score + communal_score
-        if total_intensity < 0.01: communal_ratio = 0.5
-        else: communal_ratio = communal_score / total_intensity
-        
-        skew_verdict = "Balanced"
-        if communal_ratio > 0.65: skew_verdict = "Skewed Communal"
-        elif communal_ratio < 0.35: skew_verdict = "Skewed Agentic"
-
-        spans = self.find_biased_spans(text, skew_verdict, verbose)
+        return current_subject_is_human, is_strong_human, subject_update
 
+    @staticmethod
+    def format_spans(spans):
+        """
+        Converts find_biased_spans output into bias objects.
+        """
         formatted_biases = []
         for s in spans:
             alts = s['replacements']
@@ -367,11 +674,57 @@ class AgenticCommunalDetector:
                 "severity": "low",
                 "confidence": s["score"]
             })
+        return formatted_biases
 
-        if verbose:
-            if formatted_biases:
-                print(f"[DEBUG] DETECTED {len(formatted_biases)} agentic/communal biases.")
-            else:
-                print(f"[DEBUG] NEUTRAL. No biases found.")
+    def classify_tagged(self, text, subject_is_human, tags, with_replacements=True, ignored_words=frozenset()):
+        """
+        Builds the biases of a sentence from word tags predicted by the distilled student
+        model, instead of running the cascade. tags are (start, end, "Agentic"/"Communal", score)
+        tuples. Returns the same (biases, subject_update) pair as classify_sentence; the
+        student judges every sentence on its own, so it never updates the document context.
+        """
+        if not subject_is_human:
+            return self.exit_at("non_human", [], None)
 
-        return formatted_biases
\ No newline at end of file
+        tags = [tag for tag in tags if text[tag[0]:tag[1]].lower() not in ignored_words]
+        agentic_score = sum(score for _, _, bias_type, score in tags if bias_type == "Agentic")
+        communal_score = sum(score for _, _, bias_type, score in tags if bias_type == "Communal")
+        total_intensity = agentic_score + communal_score
+        communal_ratio = communal_score / total_intensity if total_intensity >= 0.01 else 0.5
+
+        skew_verdict = "Balanced"
+        if communal_ratio > 0.65: skew_verdict = "Skewed Communal"
+        elif communal_ratio < 0.35: skew_verdict = "Skewed Agentic"
+
+        # Fill-mask replacements need the word's spaCy token, so full mode still parses flagged sentences
+        doc = self.parse(text) if tags and with_replacements else None
+
+        spans = []
+        for start, end, bias_type, score in tags:
+            word = text[start:end]
+            replacements = []
+            if doc is not None:
+                token = doc.char_span(start, end)
+                if token is not None and len(token) == 1:
+                    replacements = self.generate_replacements(text, token[0], bias_type)
+            spans.append({
+                "word": word,
+                "span": [start, end],
+                "type": bias_type,
+                "score": round(score, 2),
+                "reason": self.generate_span_reason(word, bias_type, skew_verdict),
+                "replacements": replacements
+            })
+
+        return self.exit_at("spans", self.format_spans(spans), None)
+
+    @staticmethod
+    def exit_at(stage, biases, subject_update):
+        """
+        Records the cascade stage a classification stopped at.
+        """
+        registry.increment(
+            "neutral_net_agentic_exit_total", {"stage": stage},
+            help_text="Agentic/communal sentence classifications by the cascade stage they stopped at."
+        )
+        return biases, subject_update
\ No newline at end of file
@@ -0,0 +1,79 @@
+import itertools
+from .cache import LRUCache
+
+class AnalysisSessions:
+    """
+    Remembers the last real-time result of each editor session, so a new analysis can be
+    sent as a delta against the revision the client already holds.
+
+    Biases are matched across revisions by their content (type, highlighted text,
+    description and suggestion), not by position, so a bias that only moved because text
+    was typed before it keeps its id. Sessions live in process memory: a request landing
+    on another worker, or one whose session was evicted, simply gets a full response.
+
+    Each session also keeps the user's ignore list under a client-chosen version, so the
+    list only has to be sent when it changes.
+    """
+    def __init__(self, maxsize: int = 1000):
+        self.sessions = LRUCache("analysis_sessions", maxsize)
+        self.ignored = LRUCache("analysis_session_ignores", maxsize)
+        # Unique across sessions, so two racing requests of a session never share a revision
+        self._revisions = itertools.count(1)
+
+    @staticmethod
+    def bias_key(text, bias):
+        position = bias['position']
+        return (
+            bias.get('type'), text[position['start']:position['end']],
+            bias.get('description'), bias.get('suggestion'), tuple(bias.get('alternatives') or ())
+        )
+
+    def set_ignored(self, session_id, version, ignored_texts):
+        self.ignored.put(session_id, (version, list(ignored_texts)))
+
+    def get_ignored(self, session_id, version):
+        """
+        The stored ignore list of the session, or None if the server does not hold that version.
+        """
+        stored = self.ignored.get(session_id)
+        if stored is None or stored[0] != version: return None
+        return stored[1]
+
+    def update(self, session_id, base_revision, text, biases):
+        """
+        Stores biases as the newest revision of the session.
+
+        Biases matching one of the previous revision take over its id (biases is modified
+        in place). Returns (revision, delta), where delta is None unless base_revision is
+        the revision stored for the session. A delta holds the added biases, the ids of
+        removed ones and the new position of each bias that moved.
+        """
+        previous = self.sessions.get(session_id)
+
+        delta = None
+        if previous is not None:
+            unmatched = {}
+            for key, bias in previous['biases']:
+                unmatched.setdefault(key, []).append(bias)
+
+            added, moved = [], []
+            for bias in biases:
+                candidates = unmatched.get(self.bias_key(text, bias))
+                if not candidates:
+                    added.append(bias)
+                    continue
+                old = candidates.pop(0)
+                bias['id'] = old['id']
+                if old['position'] != bias['position']:
+                    moved.append({'id': bias['id'], 'position': bias['position']})
+
+            if previous['revision'] == base_revision:
+                removed = [bias['id'] for candidates in unmatched.values() for bias in candidates]
+                delta = {'added': added, 'removed': removed, 'moved': moved}
+
+        revision = next(self._revisions)
+        self.sessions.put(session_id, {
+            'revision': revision,
+            'biases': [(self.bias_key(text, bias), bias) for bias in biases]
+        })
+        return revision, delta
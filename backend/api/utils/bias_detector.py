@@ -1,16 +1,34 @@
 import re
-import uuid
 import math
-from functools import lru_cache
-from typing import Dict, List, Any
+import logging
+from typing import Callable, Dict, List, Any
+from django.conf import settings
 from .bias_patterns import BiasType, BiasPatterns
 from .text_processor import TextProcessor
-from .agentic_communal_detector import AgenticCommunalDetector
+from .agentic_communal_detector import AgenticCommunalDetector, DiscourseContext
 from .gendered_terms_detector import GenderedTermsDetector
 from .stereotype_detector import StereotypeDetector
 from .pronoun_detector import PronounBiasDetector
+from .metrics import track
+from .cache import LRUCache
+from .bias_table import BiasTable
+from .ignore_matcher import IgnoreMatcher
+from .student_model import StudentModel
+
+logger = logging.getLogger(__name__)
 
 class BiasDetector:
+    # "full" returns highlights, suggestions and rewrites. "detect" returns the same analysis
+    # without rewrites and synonym suggestions. "score" only runs the detection classifiers
+    # and returns the score with per-type counts
+    MODES = ("full", "detect", "score")
+    # "pipeline" runs the individual detection models, "student" the distilled multi-task
+    # model (see StudentModel) for every detection signal except pronoun coreference
+    BACKENDS = ("pipeline", "student")
+    BIAS_TYPES = BiasTable.TYPES
+
+    _MISSING = object()
+
     def __init__(self):
         self.processor = TextProcessor()
         
@@ -19,8 +37,20 @@ class BiasDetector:
         self.stereotype_detector = StereotypeDetector()
         self.pronoun_detector = PronounBiasDetector()
 
-        self.cached_agentic = lru_cache(maxsize=1024)(self.agentic_communal_detector.analyze_sentence)
-        self.cached_stereotype = lru_cache(maxsize=1024)(self.stereotype_detector.analyze_sentence)
+        if settings.DETECTION_BACKEND not in self.BACKENDS:
+            raise ValueError(f"Unknown detection backend '{settings.DETECTION_BACKEND}'")
+        self.student = None
+        if settings.DETECTION_BACKEND == "student":
+            try:
+                self.student = StudentModel.load(settings.STUDENT_MODEL_PATH)
+            except Exception:
+                logger.exception("Could not load the student model from %s, using the full pipeline", settings.STUDENT_MODEL_PATH)
+
+        # Keyed on (sentence, previous_subject_non_human, with_replacements). The subject state is
+        # the only document state a sentence depends on
+        self.agentic_cache = LRUCache("agentic", maxsize=1024)
+        # Keyed on (sentence, rewrite tier), tier None for bare detections. Values may be None for sentences without a stereotype
+        self.stereotype_cache = LRUCache("stereotype", maxsize=1024)
 
         self.empty_result = {
             "text": "",
@@ -33,7 +63,20 @@ class BiasDetector:
             "sentence_count": 0
         }
     
-    def analyze_text(self, text: str, ignored_texts: List[str] = None) -> Dict[str, Any]:
+    def clear_caches(self):
+        """
+        Drops every cached sentence result. Used by the benchmarks to measure cold runs.
+        """
+        self.agentic_cache.clear()
+        self.stereotype_cache.clear()
+        self.stereotype_detector.rewrite_cache.clear()
+        self.agentic_communal_detector.entity_cache.clear()
+        self.agentic_communal_detector.embedding_cache.clear()
+        self.gendered_terms_detector.nli_cache.clear()
+        if self.student is not None:
+            self.student.cache.clear()
+
+    def analyze_text(self, text: str, ignored_texts: List[str] = None, progress_callback: Callable[[int, int], None] = None, rewrite_tier: str = None, mode: str = "full", highlight: bool = True) -> Dict[str, Any]:
         """
         Acts as the core inference engine. It segments the input text, and uses cached
         transformer models for phrase-level bias detection (Agentic/Communal and Stereotype)
@@ -45,11 +88,20 @@ class BiasDetector:
             text (str): The raw input string to be analyzed.
             ignored_texts (List[str]): A list of words/phrases that the user has explicitly chosen to bypass.
             Defaults to None.
+            progress_callback (Callable[[int, int], None]): Called with (sentences_processed, sentences_total)
+            after every sentence. Defaults to None.
+            rewrite_tier (str): Decoding tier for stereotype rewrites, see settings.STEREOTYPE_REWRITE_TIERS.
+            Defaults to settings.STEREOTYPE_REWRITE_TIER.
+            mode (str): "full", "detect" to skip rewrites and synonym generation, or "score" to
+            also skip pronoun stats and HTML construction. Defaults to "full".
+            highlight (bool): Whether to build highlighted_text. Clients that render the highlights
+            themselves from the bias positions pass False. Defaults to True.
         
         Returns:
-            Dict[str, Any]: An analysis containing:
+            Dict[str, Any]: In score mode, see _score_result. Otherwise an analysis containing:
                 - text (str): The original input text
-                - highlighted_text (str): HTML string with detected biases wrapped in UI spans.
+                - highlighted_text (str): HTML string with detected biases wrapped in UI spans, None
+                if highlight is False.
                 - biases (List[Dict]): Detailed list of all biased objects.
                 - bias_count (int): Total count of biased objects.
                 - overall_score (int): The inclusivity score. Ranges from 0-100, inclusive.
@@ -58,102 +110,293 @@ class BiasDetector:
                 - sentence_count (int): Total sentences in analyzed text.
         """
         if ignored_texts is None: ignored_texts = []
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown analysis mode '{mode}'")
 
         text = text.strip()
         if not text:
-            return self.empty_result
-        
-        ignored_set = set(t.lower() for t in ignored_texts)
+            return self._score_result(BiasTable(), 0, 0) if mode == "score" else self._empty_result(highlight)
         
-        biases = []
-        blocked_ranges = []
-        
-        sentences = self.processor.extract_sentences(text)
-        current_pos = 0
+        ignore = IgnoreMatcher.compile(ignored_texts)
+        with track("sentence_split"):
+            spans = self.processor.sentence_spans(text)
+        sentences = [text[start:end] for start, end in spans]
+        if self.student is not None:
+            # One batched forward pass, later lookups per detector are cache hits
+            self.student.predict(sentences)
+
+        tier = (rewrite_tier or settings.STEREOTYPE_REWRITE_TIER) if mode == "full" else None
+        try:
+            # Ignored sentences are never classified, let alone rewritten
+            stereotype_results = self._stereotype_results([s for s in sentences if s not in ignore], tier)
+        except Exception:
+            logger.exception("Error in stereotype detection")
+            stereotype_results = {}
+
+        return self._analyze_document(text, spans, ignore, stereotype_results.get, progress_callback=progress_callback, mode=mode, highlight=highlight)
+
+    def _stereotype_results(self, sentences, tier, batch_size=32):
+        """
+        Stereotype results for every distinct sentence. Sentences missing from the cache are
+        classified, and the flagged ones rewritten, in batched calls. With tier None nothing
+        is rewritten and flagged sentences get bare detections.
+        """
+        results = {}
+        missing = []
+        for sentence in dict.fromkeys(sentences):
+            cached = self.stereotype_cache.get((sentence, tier), self._MISSING)
+            if cached is self._MISSING: missing.append(sentence)
+            else: results[sentence] = cached
+
+        if missing:
+            predictions = None
+            if self.student is not None:
+                predictions = [prediction["stereotype"] for prediction in self.student.predict(missing, batch_size)]
+            analyzed = self.stereotype_detector.analyze_sentences(missing, batch_size, tier, rewrite=tier is not None, predictions=predictions)
+            for sentence, result in zip(missing, analyzed):
+                self.stereotype_cache.put((sentence, tier), result)
+                results[sentence] = result
+
+        return results
+
+    def _classify_agentic(self, sentence, context, entity_index, start_index, with_replacements=True, ignore=None):
+        """
+        Cached agentic/communal classification of one sentence. On a miss, the sentence's
+        entities are read from the document entity index instead of running GLiNER again.
+        entity_index must be None unless the sentence was part of the index's entity pass:
+        an index has no entries for other sentences, which would read as "no entities".
+        Ignored terms occurring in the sentence are skipped by the detector and are part of
+        the cache key. The student backend ignores the document context.
+
+        Screened sentences do not depend on the context either. They are cached under the
+        state None and found without reading context.previous_subject_non_human, which
+        would classify the subjects the context deferred.
+        """
+        terms = ignore.terms_in(sentence) if ignore else frozenset()
+        if self.student is not None:
+            key = (sentence, False, with_replacements, terms)
+            result = self.agentic_cache.get(key)
+            if result is None:
+                prediction = self.student.predict([sentence])[0]
+                result = self.agentic_communal_detector.classify_tagged(
+                    sentence, prediction["human"], prediction["tags"], with_replacements=with_replacements, ignored_words=terms
+                )
+                self.agentic_cache.put(key, result)
+            return result
+
+        detector = self.agentic_communal_detector
+        screened_key = (sentence, None, with_replacements, terms)
+        result = self.agentic_cache.get(screened_key) if screened_key in self.agentic_cache else None
+        if result is None and not any((sentence, state, with_replacements, terms) in self.agentic_cache for state in (False, True)):
+            # Not cached at all: a miss, so its embedding is already there from the batched screen
+            if not detector.screen_sentence(sentence)[0]:
+                result = detector.classify_sentence(sentence, with_replacements=with_replacements, ignored_words=terms)
+                self.agentic_cache.put(screened_key, result)
+
+        if result is None:
+            key = (sentence, context.previous_subject_non_human, with_replacements, terms)
+            result = self.agentic_cache.get(key)
+            if result is None:
+                # Index payloads keep their sentence-relative offsets. Without an index GLiNER runs on the sentence alone
+                entities = entity_index.within(start_index, start_index + len(sentence)) if entity_index is not None else None
+                result = detector.classify_sentence(
+                    sentence, key[1], entities=entities, with_replacements=with_replacements, ignored_words=terms
+                )
+                self.agentic_cache.put(key, result)
+        return result
+
+    def _agentic_misses(self, sentences, with_replacements=True, ignore=None):
+        """
+        Sentences whose agentic result is not cached for any subject state, i.e. the ones
+        that may need GLiNER entities.
+        """
+        misses = []
+        for s in sentences:
+            skipped = ignore.terms_in(s) if ignore else frozenset()
+            if not any((s, state, with_replacements, skipped) in self.agentic_cache for state in (None, False, True)):
+                misses.append(s)
+        return misses
+
+    def analyze_batch(self, texts: List[str], ignored_texts: List[str] = None, batch_size: int = 32, mode: str = "full", highlight: bool = True) -> List[Dict[str, Any]]:
+        """
+        Analyzes many documents in one call. Sentences are deduplicated across the whole
+        batch, so a sentence shared by several documents is classified once. The stereotype
+        classifier, the coreference resolver and the NLI filter each run over the combined
+        batch instead of once per document.
+
+        Args:
+            texts (List[str]): The raw documents to be analyzed.
+            ignored_texts (List[str]): Words/phrases to bypass, applied to every document.
+            batch_size (int): Number of inputs per forward pass for the batched models.
+            mode (str): "full", "detect" or "score", as for analyze_text.
+            highlight (bool): Whether to build highlighted_text, as for analyze_text.
+
+        Returns:
+            List[Dict[str, Any]]: One analysis per input document, in input order, each with
+            the same shape as the analyze_text result.
+        """
+        if ignored_texts is None: ignored_texts = []
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown analysis mode '{mode}'")
+        with_replacements = mode == "full"
+
+        ignore = IgnoreMatcher.compile(ignored_texts)
+        documents = [t.strip() for t in texts]
+        with track("sentence_split", len(documents)):
+            sentence_tables = [self.processor.sentence_spans(t) for t in documents]
+
+        unique_sentences = list(dict.fromkeys(
+            text[start:end] for text, spans in zip(documents, sentence_tables) for start, end in spans
+        ))
+        if self.student is not None:
+            self.student.predict(unique_sentences, batch_size)
+        try:
+            tier = settings.STEREOTYPE_BATCH_REWRITE_TIER if with_replacements else None
+            stereotype_results = self._stereotype_results([s for s in unique_sentences if s not in ignore], tier, batch_size)
+        except Exception:
+            logger.exception("Error in stereotype detection")
+            stereotype_results = {}
+
+        # Fills the entity cache for the whole batch, so each document's entity pass is a lookup
+        try:
+            if self.student is None:
+                self.agentic_communal_detector.predict_entities(self.agentic_communal_detector.screen_sentences(
+                    [s for s in self._agentic_misses(unique_sentences, with_replacements, ignore) if not stereotype_results.get(s) and s not in ignore]
+                ))
+        except Exception:
+            logger.exception("Error in entity detection")
+
+        indices = [i for i, t in enumerate(documents) if t]
+        batch = [documents[i] for i in indices]
+
+        try:
+            pronoun_results = dict(zip(indices, self.pronoun_detector.analyze_batch(batch)))
+        except Exception:
+            logger.exception("Error in pronoun coref detection")
+            pronoun_results = {}
+
+        try:
+            gendered_results = dict(zip(indices, self.gendered_terms_detector.analyze_batch(
+                batch, batch_size, sentence_spans=[sentence_tables[i] for i in indices], ignored=ignore.terms,
+                specificity=self.student.are_specific if self.student is not None else None
+            )))
+        except Exception:
+            logger.exception("Error in gendered detection")
+            gendered_results = {}
+
+        results = []
+        for i, text in enumerate(documents):
+            if not text:
+                results.append(self._score_result(BiasTable(), 0, 0) if mode == "score" else self._empty_result(highlight))
+                continue
+
+            results.append(self._analyze_document(
+                text, sentence_tables[i], ignore, stereotype_results.get,
+                pronoun_biases=pronoun_results.get(i, []),
+                gendered_biases=gendered_results.get(i, []),
+                mode=mode, highlight=highlight
+            ))
+
+        return results
+
+    def _analyze_document(self, text, spans, ignore, stereotype_lookup, pronoun_biases=None, gendered_biases=None, progress_callback=None, mode="full", highlight=True):
+        """
+        Runs the phrase-level detectors over a segmented document and merges them with the
+        document-level detectors. spans are the sentence offsets from TextProcessor.sentence_spans,
+        ignore the IgnoreMatcher of the request. Ignored sentences are blocked: no detector
+        result inside them is kept.
+        Precomputed document-level results can be handed in by analyze_batch, otherwise the
+        detectors are run here.
+        """
+        with_replacements = mode == "full"
+        table = BiasTable()
+        context = DiscourseContext(self.agentic_communal_detector.resolve_subject if self.student is None else None)
         
-        for sentence in sentences:
-            start_index = text.find(sentence, current_pos)
-            if start_index == -1: continue            
-            sent_end = start_index + len(sentence)
+        located = [(text[start:end], start) for start, end in spans]
+        sentences = [sentence for sentence, _ in located]
+        blocked = [(start, end) for start, end in spans if text[start:end] in ignore]
+
+        # One batched embedding pass screens out neutral sentences, then one batched GLiNER
+        # pass covers every sentence that may reach subject classification
+        entity_index = None
+        pending = set()
+        try:
+            if self.student is None:
+                pending = set(self.agentic_communal_detector.screen_sentences(
+                    self._agentic_misses([s for s in sentences if s not in ignore], with_replacements, ignore)
+                ))
+                entity_index = self.agentic_communal_detector.build_entity_index(
+                    [loc for loc in located if loc[0] in pending]
+                )
+        except Exception:
+            logger.exception("Error in entity detection")
+
+        for sentence_index, location in enumerate(located):
+            if progress_callback: progress_callback(sentence_index, len(sentences))
+
+            sentence, start_index = location
+            # Dismissed sentences stay blocked, as a dismissed stereotype sentence did
+            if sentence in ignore: continue
             
             try:
-                cached_stereotype = self.cached_stereotype(sentence)
+                cached_stereotype = stereotype_lookup(sentence)
                 if cached_stereotype:
-                    stereotype_result = cached_stereotype.copy()
-                    stereotype_result['position'] = cached_stereotype['position'].copy()                    
-                    stereotype_result['position']['start'] += start_index
-                    stereotype_result['position']['end'] += start_index                    
-                    biases.append(stereotype_result)
-                    
-                    """ 
-                    Tracking sentence level flags to stop word-level flags from operating on them.
-                    Prevents double highlighting issues. 
-                    """
-
-                    blocked_ranges.append((start_index, sent_end))                    
-                    current_pos = sent_end
+                    # Word level biases inside the sentence are dropped when the table is resolved
+                    table.append(cached_stereotype, start_index)
                     continue 
-            except Exception as e:
-                print(f"Error in stereotype detection: {e}")
+            except Exception:
+                logger.exception("Error in stereotype detection")
 
-            cached_agentic_results = self.cached_agentic(sentence)
-            
-            for result in cached_agentic_results:
-                res_copy = result.copy()
-                res_copy['position'] = result['position'].copy()                
-                start = res_copy['position']['start']
-                end = res_copy['position']['end']
-                res_copy['id'] = str(uuid.uuid4())
-                res_copy['position']['start'] = start_index + start
-                res_copy['position']['end'] = start_index + end
-                biases.append(res_copy)
-            
-            current_pos = sent_end
-
-        def is_safe(b_start, b_end):
-            for block_start, block_end in blocked_ranges:
-                if not (b_end <= block_start or b_start >= block_end):
-                    return False
-            return True
+            # Sentences outside the entity pass (cached for the other subject state, or evicted
+            # since the probe) get their entities from predict_entities and its cache
+            cached_agentic_results, subject_update = self._classify_agentic(
+                sentence, context, entity_index if sentence in pending else None, start_index, with_replacements, ignore
+            )
+            context.update(subject_update)
+            # Returned biases need ids of their own, score mode only counts them
+            table.extend(cached_agentic_results, start_index, new_id=mode != "score")
 
         try:
-            raw_pronouns = self.pronoun_detector.analyze(text)
-            for b in raw_pronouns:
-                if is_safe(b['position']['start'], b['position']['end']):
-                    biases.append(b)
-        except Exception as e:
-            print(f"Error in pronoun coref detection: {e}")
+            raw_pronouns = self.pronoun_detector.analyze(text) if pronoun_biases is None else pronoun_biases
+            table.extend(raw_pronouns)
+        except Exception:
+            logger.exception("Error in pronoun coref detection")
         
         try:
-            gendered_biases = self.gendered_terms_detector.analyze(text)
-            for b in gendered_biases:
-                if is_safe(b['position']['start'], b['position']['end']):
-                    biases.append(b)
-        except Exception as e:
-            print(f"Error in gendered detection: {e}")
-
-        filtered_biases = []
-        for bias in biases:
-            start = bias['position']['start']
-            end = bias['position']['end']
-            
-            actual_text = text[start:end].lower()
-            
-            if actual_text not in ignored_set:
-                filtered_biases.append(bias)
-        
-        biases = filtered_biases
+            if gendered_biases is None:
+                gendered_biases = self.gendered_terms_detector.analyze(
+                    text, sentence_spans=spans, ignored=ignore.terms,
+                    specificity=self.student.are_specific if self.student is not None else None
+                )
+            table.extend(gendered_biases)
+        except Exception:
+            logger.exception("Error in gendered detection")
+
+        if progress_callback: progress_callback(len(sentences), len(sentences))
+
+        # Safe zones, detector priority, ignored texts and sentences in one pass, see BiasTable.resolve
+        with track("resolve"):
+            table = table.resolve(text, ignore.terms, blocked)
 
+        if mode == "score":
+            return self._score_result(table, len(text.split()), len(sentences))
+
+        biases = table.to_dicts()
         pronoun_stats = self.processor.calculate_pronoun_stats(text)
         word_count = len(text.split())
-        overall_score = self._calculate_overall_score(biases, word_count)
+        overall_score = self._calculate_overall_score(table, word_count)
 
-        highlighted_text = self.processor.highlight_text_with_biases(text, biases)
+        if highlight:
+            with track("html_highlight"):
+                highlighted_text = self.processor.highlight_text_with_biases(text, biases)
+        else:
+            highlighted_text = None
         
         return {
             "text": text,
             "highlighted_text": highlighted_text,
             "biases": biases,
+            "bias_table": table,
             "bias_count": len(biases),
             "overall_score": overall_score,
             "pronoun_stats": pronoun_stats,
@@ -161,6 +404,21 @@ class BiasDetector:
             "sentence_count": len(sentences)
         }
     
+    def _empty_result(self, highlight=True):
+        return dict(self.empty_result, bias_table=BiasTable(), highlighted_text="" if highlight else None)
+
+    def _score_result(self, table, word_count, sentence_count):
+        """
+        Result of a score mode analysis: the overall score and the number of biases per type.
+        """
+        return {
+            "overall_score": self._calculate_overall_score(table, word_count),
+            "bias_count": len(table),
+            "counts": table.counts(),
+            "word_count": word_count,
+            "sentence_count": sentence_count
+        }
+
     def _calculate_overall_score(self, biases: List[Dict], word_count: int) -> int:
         """
         Calculates a length-normalized inclusivity score using exponential-decay functions.
@@ -170,7 +428,7 @@ class BiasDetector:
 
         Args:
             biases (List[Dict]): A list of detected bias dictionaries, each containing 'type' and 'confidence'
-            keys.
+            keys, or a BiasTable.
 
             word_count (int): Total number of words in the analyzed text.
         
@@ -185,12 +443,16 @@ class BiasDetector:
             'agentic_communal': 3.0
         }
 
+        if isinstance(biases, BiasTable):
+            items = biases.score_items()
+        else:
+            items = ((bias.get('type','other'), bias.get('confidence')) for bias in biases)
+
         total_penalty = 0.0
-        for bias in biases:
-            bias_type = bias.get('type','other')
+        for bias_type, confidence in items:
             weight = weights.get(bias_type, 5.0)
 
-            confidence = bias.get('confidence') or 1.0
+            confidence = confidence or 1.0
             if confidence > 1: confidence /= 100.0
 
             total_penalty += weight*confidence
@@ -51,4 +51,15 @@ class BiasPatterns:
     
     @classmethod
     def get_bias_color(cls, bias_type: BiasType) -> str:
-        return cls.BIAS_COLORS.get(bias_type, "#cccccc")
\ No newline at end of file
+        return cls.BIAS_COLORS.get(bias_type, "#cccccc")
+
+    @classmethod
+    def get_bias_class(cls, bias_type: BiasType) -> str:
+        """
+        CSS class the frontend styles the highlights of a bias type with, see style.css.
+        """
+        return "bias-" + str(getattr(bias_type, "value", bias_type)).replace("_", "-")
+
+    @classmethod
+    def highlight_classes(cls) -> Dict[str, str]:
+        return {bias_type.value: cls.get_bias_class(bias_type) for bias_type in BiasType}
\ No newline at end of file
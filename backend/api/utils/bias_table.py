@@ -0,0 +1,196 @@
+import math
+import uuid
+from array import array
+from bisect import bisect_right
+from .interval_index import IntervalIndex
+
+class BiasTable:
+    """
+    Column store for the biases of one analysis.
+
+    Biases are kept as parallel arrays (positions, type codes, confidences) with every
+    string interned in one table, so a document with hundreds of highlights does not
+    allocate a dict and a position dict per bias. Detector results are appended with
+    their sentence offset applied, without copying them first. to_dicts() builds the
+    usual list of bias dicts, to_columnar() the compact response form.
+    """
+    TYPES = ("stereotype", "pronoun", "gendered_terms", "agentic_communal")
+    # Which bias wins when two overlap: sentence level stereotypes first, then the phrase
+    # and word level detectors
+    PRIORITY = ("stereotype", "agentic_communal", "gendered_terms", "pronoun")
+
+    def __init__(self, strings=None, type_names=None):
+        self.strings = strings if strings is not None else []
+        self._string_index = {s: i for i, s in enumerate(self.strings)}
+        self.type_names = type_names if type_names is not None else list(self.TYPES)
+
+        self.ids = []
+        self.types = array('B')
+        self.starts = array('l')
+        self.ends = array('l')
+        self.confidences = array('d')
+        self.texts = array('l')
+        self.descriptions = array('l')
+        self.suggestions = array('l')
+        self.severities = array('l')
+        self.alternatives = []
+
+    def __len__(self):
+        return len(self.types)
+
+    def intern(self, value):
+        """
+        Index of the string in the string table, -1 for None.
+        """
+        if value is None: return -1
+        index = self._string_index.get(value)
+        if index is None:
+            index = self._string_index[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+    def type_code(self, bias_type):
+        try:
+            return self.type_names.index(bias_type)
+        except ValueError:
+            self.type_names.append(bias_type)
+            return len(self.type_names) - 1
+
+    def append(self, bias, offset=0, new_id=False):
+        """
+        Adds a bias dict, shifting its position by offset. new_id gives it a fresh id, for
+        cached results that are reused across requests.
+        """
+        confidence = bias.get('confidence')
+        self.ids.append(str(uuid.uuid4()) if new_id else bias.get('id'))
+        self.types.append(self.type_code(bias['type']))
+        self.starts.append(bias['position']['start'] + offset)
+        self.ends.append(bias['position']['end'] + offset)
+        self.confidences.append(math.nan if confidence is None else float(confidence))
+        self.texts.append(self.intern(bias.get('text')))
+        self.descriptions.append(self.intern(bias.get('description')))
+        self.suggestions.append(self.intern(bias.get('suggestion')))
+        self.severities.append(self.intern(bias.get('severity')))
+        self.alternatives.append(tuple(self.intern(a) for a in bias.get('alternatives') or ()))
+
+    def extend(self, biases, offset=0, new_id=False):
+        for bias in biases:
+            self.append(bias, offset, new_id)
+
+    def spans(self):
+        return zip(self.starts, self.ends)
+
+    def filter(self, keep):
+        """
+        New table with the rows whose flag in keep is true. The string table is shared.
+        """
+        return self.take(i for i, flag in enumerate(keep) if flag)
+
+    def take(self, rows):
+        """
+        New table with the given rows, in the given order. The string table is shared.
+        """
+        table = BiasTable(self.strings, self.type_names)
+        table._string_index = self._string_index
+        for i in rows:
+            table.ids.append(self.ids[i])
+            table.types.append(self.types[i])
+            table.starts.append(self.starts[i])
+            table.ends.append(self.ends[i])
+            table.confidences.append(self.confidences[i])
+            table.texts.append(self.texts[i])
+            table.descriptions.append(self.descriptions[i])
+            table.suggestions.append(self.suggestions[i])
+            table.severities.append(self.severities[i])
+            table.alternatives.append(self.alternatives[i])
+        return table
+
+    def resolve(self, text, ignored=(), blocked=()):
+        """
+        Merges the output of all detectors into non-overlapping biases sorted by position.
+
+        Biases on ignored text, or overlapping one of the blocked (start, end) ranges such
+        as ignored sentences, are dropped first. The rest are visited by PRIORITY, then
+        position, longest first, and each is kept only if it does not overlap one kept
+        before it. Kept spans never overlap, so they stay in one sorted array and each check
+        is a bisect against its two neighbours instead of a scan over every blocked range.
+        """
+        rank = {name: i for i, name in enumerate(self.PRIORITY)}
+        type_rank = [rank.get(name, len(rank)) for name in self.type_names]
+
+        blocked = IntervalIndex((start, end, None) for start, end in blocked)
+        candidates = [
+            i for i in range(len(self))
+            if (not ignored or text[self.starts[i]:self.ends[i]].lower() not in ignored)
+            and not (blocked and blocked.overlapping(self.starts[i], self.ends[i]))
+        ]
+        candidates.sort(key=lambda i: (type_rank[self.types[i]], self.starts[i], self.starts[i] - self.ends[i]))
+
+        kept_starts, kept_ends, kept_rows = [], [], []
+        for i in candidates:
+            start, end = self.starts[i], self.ends[i]
+            slot = bisect_right(kept_starts, start)
+            if slot > 0 and kept_ends[slot - 1] > start: continue
+            if slot < len(kept_starts) and kept_starts[slot] < end: continue
+            kept_starts.insert(slot, start)
+            kept_ends.insert(slot, end)
+            kept_rows.insert(slot, i)
+
+        return self.take(kept_rows)
+
+    def counts(self):
+        counts = dict.fromkeys(self.TYPES, 0)
+        for code in self.types:
+            name = self.type_names[code]
+            counts[name] = counts.get(name, 0) + 1
+        return counts
+
+    def score_items(self):
+        """
+        (type, confidence) pairs, confidence None where the detector gives none.
+        """
+        return (
+            (self.type_names[code], None if math.isnan(confidence) else confidence)
+            for code, confidence in zip(self.types, self.confidences)
+        )
+
+    def _string(self, index):
+        return self.strings[index] if index >= 0 else None
+
+    def to_dicts(self):
+        biases = []
+        for i in range(len(self)):
+            bias = {
+                "id": self.ids[i],
+                "type": self.type_names[self.types[i]],
+                "text": self._string(self.texts[i]),
+                "description": self._string(self.descriptions[i]),
+                "suggestion": self._string(self.suggestions[i]),
+                "alternatives": [self.strings[a] for a in self.alternatives[i]],
+                "position": {"start": self.starts[i], "end": self.ends[i]},
+            }
+            if not math.isnan(self.confidences[i]): bias["confidence"] = self.confidences[i]
+            if self.severities[i] >= 0: bias["severity"] = self.strings[self.severities[i]]
+            biases.append(bias)
+        return biases
+
+    def to_columnar(self):
+        """
+        Parallel lists for the compact response. String columns hold indices into
+        `strings`, -1 for none, and missing confidences are null.
+        """
+        return {
+            "count": len(self),
+            "type_names": list(self.type_names),
+            "strings": list(self.strings),
+            "id": list(self.ids),
+            "type": self.types.tolist(),
+            "start": self.starts.tolist(),
+            "end": self.ends.tolist(),
+            "confidence": [None if math.isnan(c) else c for c in self.confidences],
+            "text": self.texts.tolist(),
+            "description": self.descriptions.tolist(),
+            "suggestion": self.suggestions.tolist(),
+            "severity": self.severities.tolist(),
+            "alternatives": [list(a) for a in self.alternatives],
+        }
@@ -0,0 +1,124 @@
+import sys
+import time
+import threading
+from collections import OrderedDict
+from .metrics import record_cache, registry
+
+def approximate_size(obj, _seen=None):
+    """
+    Approximate memory held by a cached key or value: sys.getsizeof of the object and of
+    everything it contains. Arrays and tensors count their buffers. Objects shared between
+    entries are counted for each of them, so the total errs on the high side.
+    """
+    if _seen is None: _seen = set()
+    if id(obj) in _seen: return 0
+    _seen.add(id(obj))
+
+    nbytes = getattr(obj, "nbytes", None)
+    if isinstance(nbytes, int): return nbytes + 128
+    if hasattr(obj, "element_size") and hasattr(obj, "nelement"): return obj.element_size() * obj.nelement() + 128
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approximate_size(k, _seen) + approximate_size(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(approximate_size(item, _seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += approximate_size(vars(obj), _seen)
+    return size
+
+def cache_limits(name):
+    """
+    Limits configured for a cache in settings.CACHE_LIMITS, on top of the global defaults.
+    """
+    from django.conf import settings
+    if not settings.configured: return {}
+
+    limits = {"max_mb": getattr(settings, "CACHE_MAX_MB", None), "ttl": getattr(settings, "CACHE_TTL", None)}
+    limits.update(getattr(settings, "CACHE_LIMITS", {}).get(name, {}))
+    return limits
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used mapping that reports hits and misses to the metrics
+    registry. Unlike functools.lru_cache it can be probed and filled explicitly, which
+    lets callers batch the work for every missing key before using the cache.
+
+    Besides the entry count, a cache is bounded by the approximate memory of its keys
+    and values (max_bytes) and can expire entries ttl seconds after they were stored.
+    Both come from settings.CACHE_LIMITS by cache name, so worker memory is sized in one
+    place. Evictions are counted per reason: "capacity", "memory" and "expired". Expired
+    entries are dropped when read, or once they reach the least recently used end.
+    """
+    def __init__(self, name: str, maxsize: int = 1024, max_bytes: int = None, ttl: float = None):
+        limits = cache_limits(name)
+        self.name = name
+        self.maxsize = limits.get("maxsize", maxsize)
+        self.max_bytes = int(limits["max_mb"] * 2**20) if limits.get("max_mb") else max_bytes
+        self.ttl = limits.get("ttl") or ttl
+        self.bytes = 0
+        # key -> (value, size, expiry time or None)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        registry.register_cache(self)
+
+    def _expired(self, entry, now):
+        return entry[2] is not None and entry[2] <= now
+
+    def get(self, key, default=None):
+        expired = False
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and self._expired(entry, time.monotonic()):
+                self._remove(key)
+                entry, expired = None, True
+            hit = entry is not None
+            if hit:
+                self._data.move_to_end(key)
+        if expired: registry.record_eviction(self.name, "expired")
+        record_cache(self.name, hit)
+        return entry[0] if hit else default
+
+    def put(self, key, value):
+        size = approximate_size(key) + approximate_size(value)
+        now = time.monotonic()
+        evicted = {}
+
+        with self._lock:
+            if key in self._data: self._remove(key)
+            # A value over the whole budget would only flush the cache before being dropped itself
+            if self.max_bytes is not None and size > self.max_bytes:
+                evicted["memory"] = 1
+            else:
+                self._data[key] = (value, size, now + self.ttl if self.ttl else None)
+                self.bytes += size
+
+            while self._data:
+                oldest, entry = next(iter(self._data.items()))
+                if self._expired(entry, now): reason = "expired"
+                elif self.maxsize is not None and len(self._data) > self.maxsize: reason = "capacity"
+                elif self.max_bytes is not None and self.bytes > self.max_bytes: reason = "memory"
+                else: break
+                self._remove(oldest)
+                evicted[reason] = evicted.get(reason, 0) + 1
+
+        for reason, count in evicted.items():
+            registry.record_eviction(self.name, reason, count)
+
+    def _remove(self, key):
+        _, size, _ = self._data.pop(key)
+        self.bytes -= size
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and not self._expired(entry, time.monotonic())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
@@ -0,0 +1,31 @@
+from pypdf import PdfReader
+import docx
+
+SUPPORTED_EXTENSIONS = ('.txt', '.pdf', '.docx')
+
+def extract_text(file_obj, file_name: str) -> str:
+    """
+    Extracts plain text from a .txt, .pdf or .docx file object.
+
+    Raises ValueError if the file format is not supported.
+    """
+    file_name = file_name.lower()
+    extracted_text = ""
+
+    if file_name.endswith('.pdf'):
+        pdf_reader = PdfReader(file_obj)
+        for page in pdf_reader.pages:
+            text = page.extract_text()
+            if text:
+                extracted_text += text + "\n"
+    elif file_name.endswith('.docx'):
+        doc = docx.Document(file_obj)
+        for para in doc.paragraphs:
+            extracted_text += para.text + "\n"
+    elif file_name.endswith('.txt'):
+        raw = file_obj.read()
+        extracted_text = raw.decode('utf-8', errors='replace') if isinstance(raw, bytes) else raw
+    else:
+        raise ValueError(f"Unsupported file format: {file_name}")
+
+    return extracted_text.replace('\u00A0', ' ').strip()
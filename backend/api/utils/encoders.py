@@ -0,0 +1,9 @@
+from django.core.serializers.json import DjangoJSONEncoder
+
+class NumpyEncoder(DjangoJSONEncoder):
+    def default(self, obj):
+        if hasattr(obj, 'item'):
+            return obj.item()
+        if hasattr(obj, 'tolist'):
+            return obj.tolist()
+        return super().default(obj)
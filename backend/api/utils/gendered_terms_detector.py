@@ -2,6 +2,9 @@ import spacy
 from sentence_transformers import CrossEncoder
 import warnings
 import uuid
+from bisect import bisect_right
+from .cache import LRUCache
+from .metrics import track
 
 warnings.filterwarnings("ignore")
 
@@ -15,6 +18,8 @@ class GenderedTermsDetector:
     """
     def __init__(self):
         self.nli_model = CrossEncoder('cross-encoder/nli-deberta-v3-base')
+        # (premise, hypothesis) -> verdict
+        self.nli_cache = LRUCache("nli", maxsize=8192)
         
         try:
             self.nlp = spacy.load("en_core_web_sm")
@@ -180,6 +185,15 @@ class GenderedTermsDetector:
             "villainess": "villain",
         }
 
+    @staticmethod
+    def build_hypothesis(term_token):
+        term = term_token.text
+        is_plural = term_token.tag_ == 'NNS'
+        
+        if is_plural:
+            return f"There are specific, real people who are the {term}."
+        return f"There is a specific, real person who is the {term}."
+
     def is_specific(self, sentence, term_token):
         """
         Uses deberta-v3 to determine if a term refers to a specific individual
@@ -187,56 +201,117 @@ class GenderedTermsDetector:
         Constructs a hypothesis and asks the model if the sentence entails the hypothesis.
         If entailed, the sentence describes a real person.
         """
-        term = term_token.text
-        is_plural = term_token.tag_ == 'NNS'
-        
-        if is_plural:
-            hypothesis = f"There are specific, real people who are the {term}."
-        else:
-            hypothesis = f"There is a specific, real person who is the {term}."
-        
-        scores = self.nli_model.predict([(sentence, hypothesis)])
-        result = scores[0]
-        
-        contradiction = result[0]
-        entailment = result[1]
-        neutral = result[2]
-        
-        return (entailment > neutral) and (entailment > contradiction)
+        return self.are_specific([(sentence, term_token)])[0]
 
-    def analyze(self, text):
+    def are_specific(self, candidates, batch_size=32):
+        """
+        Batched variant of is_specific. Takes (sentence, term_token) pairs and scores
+        all of their uncached hypotheses in one cross-encoder call.
+        """
+        if not candidates: return []
+
+        pairs = [(sentence, self.build_hypothesis(token)) for sentence, token in candidates]
+        verdicts = [self.nli_cache.get(pair) for pair in pairs]
+        misses = list(dict.fromkeys(pair for pair, verdict in zip(pairs, verdicts) if verdict is None))
+
+        scored = {}
+        if misses:
+            with track("nli", len(misses)):
+                scores = self.nli_model.predict(misses, batch_size=batch_size)
+
+            for pair, result in zip(misses, scores):
+                contradiction = result[0]
+                entailment = result[1]
+                neutral = result[2]
+                scored[pair] = bool((entailment > neutral) and (entailment > contradiction))
+                self.nli_cache.put(pair, scored[pair])
+
+        return [verdict if verdict is not None else scored[pair] for pair, verdict in zip(pairs, verdicts)]
+
+    def analyze(self, text, sentence_spans=None, ignored=None, specificity=None):
         """
         Scans text for exclusionary terminology and applies NLI filter to
         edge out false positives.
         """
-        biases = []
-        doc = self.nlp(text)
+        return self.analyze_batch([text], sentence_spans=None if sentence_spans is None else [sentence_spans], ignored=ignored, specificity=specificity)[0]
+
+    def find_candidates(self, texts, sentence_spans=None, ignored=None):
+        """
+        Gendered terms that may be used generically, before the specificity filter.
+        Returns (doc_index, premise, premise_start, token) tuples, premise being the
+        sentence the term occurs in and premise_start its offset in the document.
+
+        sentence_spans optionally gives the (start, end) sentence offsets of each document
+        from TextProcessor.sentence_spans. The premise is then the sentence the other
+        detectors saw, rather than spaCy's own sentence boundaries. Terms whose text, or
+        whose whole sentence, is in ignored (lowercase) are skipped.
+        """
+        candidates = []
+
+        with track("dependency_parse", len(texts)):
+            docs = list(self.nlp.pipe(texts))
         
-        for sent in doc.sents:
-            sent_text = sent.text
-            
-            for token in sent:
-                root = token.lemma_.lower()
+        for doc_index, doc in enumerate(docs):
+            spans = sentence_spans[doc_index] if sentence_spans is not None else None
+            starts = [start for start, _ in spans] if spans else None
+            for sent in doc.sents:
+                sent_text = sent.text
                 
-                if root in self.term_map:
-                    
-                    dets = [c.text.lower() for c in token.children if c.dep_ in ('det', 'poss')]
-                    if any(d in self.safe_dets for d in dets):
-                        continue 
+                for token in sent:
+                    root = token.lemma_.lower()
                     
-                    if not self.is_specific(sent_text, token):
-                        replacement_word = str(self.term_map[root])
-                        biases.append({
-                            "id": str(uuid.uuid4()),
-                            "text": str(token.text),
-                            "type": "gendered_terms",
-                            "description": f"'{token.text}' appears to be used in a generic context.",
-                            "suggestion": f'Consider usage of a neutral form of the word, like: {replacement_word}',
-                            "alternatives": [replacement_word],                            
-                            "position": {
-                                "start": int(token.idx),
-                                "end": int(token.idx + len(token.text))
-                            }
-                        })
+                    if root in self.term_map:
+                        if ignored and token.text.lower() in ignored: continue
+                        
+                        dets = [c.text.lower() for c in token.children if c.dep_ in ('det', 'poss')]
+                        if any(d in self.safe_dets for d in dets):
+                            continue 
+                        
+                        premise, premise_start = sent_text, sent.start_char
+                        if spans:
+                            premise_start, end = spans[max(0, bisect_right(starts, token.idx) - 1)]
+                            premise = texts[doc_index][premise_start:end]
+                        if ignored and premise.lower() in ignored: continue
+                        candidates.append((doc_index, premise, premise_start, token))
+
+        return candidates
+
+    def analyze_batch(self, texts, batch_size=32, sentence_spans=None, ignored=None, specificity=None):
+        """
+        Scans many documents at once. Candidate terms from every document are
+        collected first, so the NLI filter runs over all of them in large batches.
+        sentence_spans and ignored are passed on to find_candidates.
+
+        specificity optionally replaces the NLI filter: a callable taking (premise, start, end)
+        triples, with the term's offsets inside the premise, and returning whether each term
+        refers to a specific person. The distilled student model provides one.
+        """
+        candidates = self.find_candidates(texts, sentence_spans, ignored)
+
+        if specificity is None:
+            verdicts = self.are_specific([(premise, token) for _, premise, _, token in candidates], batch_size)
+        else:
+            verdicts = specificity([
+                (premise, token.idx - premise_start, token.idx - premise_start + len(token.text))
+                for _, premise, premise_start, token in candidates
+            ])
+
+        results = [[] for _ in texts]
+        for (doc_index, _, _, token), is_specific in zip(candidates, verdicts):
+            if is_specific: continue
+
+            replacement_word = str(self.term_map[token.lemma_.lower()])
+            results[doc_index].append({
+                "id": str(uuid.uuid4()),
+                "text": str(token.text),
+                "type": "gendered_terms",
+                "description": f"'{token.text}' appears to be used in a generic context.",
+                "suggestion": f'Consider usage of a neutral form of the word, like: {replacement_word}',
+                "alternatives": [replacement_word],                            
+                "position": {
+                    "start": int(token.idx),
+                    "end": int(token.idx + len(token.text))
+                }
+            })
                         
-        return biases
\ No newline at end of file
+        return results
\ No newline at end of file
@@ -0,0 +1,45 @@
+import re
+from .cache import LRUCache
+
+class IgnoreMatcher:
+    """
+    The words/phrases a user has dismissed, compiled once so detectors can skip them
+    before running any model.
+
+    A bias is ignored when its text, lowercased, is one of the terms. terms_in finds the
+    terms occurring in a sentence as whole words, so "he" is not found inside "the";
+    detectors that skip work for those terms add them to their cache key, so a result
+    computed for one ignore list is never served to another.
+    """
+    _compiled = LRUCache("ignore_matchers", maxsize=256)
+
+    def __init__(self, ignored_texts=None):
+        self.terms = frozenset(t.lower() for t in ignored_texts or () if t)
+        # One pattern per term: a single alternation would miss terms nested in, or starting
+        # at the same position as, a longer one
+        self.patterns = [(t, re.compile(r'(?<!\w)' + re.escape(t) + r'(?!\w)')) for t in sorted(self.terms)]
+
+    @classmethod
+    def compile(cls, ignored_texts=None):
+        """
+        Shared matcher for an ignore list. Clients re-send the same list on every keystroke,
+        so compiled matchers are cached.
+        """
+        terms = frozenset(t.lower() for t in ignored_texts or () if t)
+        matcher = cls._compiled.get(terms)
+        if matcher is None:
+            matcher = cls(terms)
+            cls._compiled.put(terms, matcher)
+        return matcher
+
+    def __bool__(self):
+        return bool(self.terms)
+
+    def __contains__(self, text):
+        return text.lower() in self.terms
+
+    def terms_in(self, text):
+        if not self.terms: return frozenset()
+        text = text.lower()
+        # The substring test rules out most terms before any regex runs
+        return frozenset(t for t, pattern in self.patterns if t in text and pattern.search(text))
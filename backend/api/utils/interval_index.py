@@ -0,0 +1,41 @@
+from bisect import bisect_left, bisect_right
+from typing import Any, Iterable, List, Tuple
+
+class IntervalIndex:
+    """
+    Static index over half-open character intervals [start, end).
+
+    Intervals are kept sorted by start alongside a running maximum of their ends, so
+    both bounds of an overlap query are found by bisection instead of a linear scan.
+    """
+    def __init__(self, intervals: Iterable[Tuple[int, int, Any]] = ()):
+        ordered = sorted(intervals, key=lambda x: (x[0], x[1]))
+        self.starts = [i[0] for i in ordered]
+        self.ends = [i[1] for i in ordered]
+        self.payloads = [i[2] for i in ordered]
+
+        self.max_ends = []
+        running = float("-inf")
+        for end in self.ends:
+            running = max(running, end)
+            self.max_ends.append(running)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def overlapping(self, start: int, end: int) -> List[Any]:
+        """
+        Payloads of every interval that overlaps [start, end), in start order.
+        """
+        # Intervals before `low` all end at or before `start`, those from `high` on start at or after `end`
+        low = bisect_right(self.max_ends, start)
+        high = bisect_left(self.starts, end)
+        return [self.payloads[i] for i in range(low, high) if self.ends[i] > start]
+
+    def within(self, start: int, end: int) -> List[Any]:
+        """
+        Payloads of every interval fully contained in [start, end), in start order.
+        """
+        low = bisect_left(self.starts, start)
+        high = bisect_left(self.starts, end)
+        return [self.payloads[i] for i in range(low, high) if self.ends[i] <= end]
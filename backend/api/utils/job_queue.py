@@ -0,0 +1,215 @@
+import os
+import time
+import socket
+import logging
+import threading
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+class JobQueue:
+    """
+    Runs AnalysisJob rows in a few in-process worker threads.
+
+    The database is the queue: workers poll it with claim_next_job, like the
+    run_analysis_worker command, so jobs left pending by a restart are picked up too.
+    submit() only wakes a worker early. On start, running jobs whose process is gone are
+    put back in the queue, see requeue_stale_jobs. With workers set to 0 nothing runs in-process, and jobs are
+    left for the run_analysis_worker command instead.
+    """
+    # Minimum seconds between two progress writes for the same job
+    PROGRESS_INTERVAL = 0.5
+    # Seconds an idle worker waits before polling the queue again
+    POLL_INTERVAL = 5.0
+
+    def __init__(self, workers: int = 1):
+        self.wakeup = threading.Event()
+        self.threads = [
+            threading.Thread(target=self._work, name=f'analysis-job-{i}', daemon=True)
+            for i in range(workers)
+        ]
+        if self.threads:
+            threading.Thread(target=self._start, name='analysis-job-recovery', daemon=True).start()
+
+    def _start(self):
+        # Runs off the startup thread, Django advises against queries while apps load
+        close_old_connections()
+        try:
+            requeued = requeue_stale_jobs(settings.ANALYSIS_JOB_STALE_SECONDS)
+            if requeued: logger.warning("Requeued %d analysis jobs left running by a stopped process", requeued)
+        except Exception:
+            logger.exception("Could not requeue stale analysis jobs")
+        finally:
+            close_old_connections()
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, job_id):
+        self.wakeup.set()
+
+    def _work(self):
+        while True:
+            self.wakeup.clear()
+            close_old_connections()
+            try:
+                job_id = claim_next_job()
+                if job_id is not None:
+                    run_job(job_id, claimed=True)
+            except Exception:
+                logger.exception("Analysis job worker failed")
+                job_id = None
+            finally:
+                close_old_connections()
+
+            if job_id is None:
+                self.wakeup.wait(self.POLL_INTERVAL)
+
+def worker_id() -> str:
+    """
+    Owner recorded on the jobs this process claims.
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def owner_alive(owner):
+    """
+    Whether the process that owns a job is still running: True or False for processes on
+    this host, None when that cannot be told (another host, or no owner recorded).
+    """
+    host, _, pid = owner.rpartition(':')
+    if host != socket.gethostname() or not pid.isdigit():
+        return None
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def claim_job(job_id) -> bool:
+    """
+    Atomically moves a pending job to running, owned by this process. Returns False if
+    another worker got it first.
+    """
+    from ..models import AnalysisJob
+    now = timezone.now()
+    return AnalysisJob.objects.filter(id=job_id, status=AnalysisJob.Status.PENDING).update(
+        status=AnalysisJob.Status.RUNNING, owner=worker_id(), heartbeat_at=now, updated_at=now
+    ) == 1
+
+def requeue_stale_jobs(stale_after) -> int:
+    """
+    Moves running jobs whose owner is gone back to pending, e.g. after the process running
+    them crashed. An owner on this host is gone when its process no longer exists, any
+    other one when it has not written a heartbeat for stale_after seconds. Live owners
+    heartbeat independently of progress, so slow jobs are never taken from them. Returns
+    the number of jobs requeued.
+    """
+    from ..models import AnalysisJob
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+
+    requeued = 0
+    running = AnalysisJob.objects.filter(status=AnalysisJob.Status.RUNNING).values_list('id', 'owner', 'heartbeat_at', 'updated_at')
+    for job_id, owner, heartbeat_at, updated_at in running:
+        alive = owner_alive(owner)
+        if alive or (alive is None and (heartbeat_at or updated_at) >= cutoff):
+            continue
+        # Filtered on the owner, so a job reclaimed in the meantime is left alone
+        requeued += AnalysisJob.objects.filter(id=job_id, status=AnalysisJob.Status.RUNNING, owner=owner).update(
+            status=AnalysisJob.Status.PENDING, owner='', heartbeat_at=None, sentences_processed=0,
+            updated_at=timezone.now()
+        )
+    return requeued
+
+class Heartbeat:
+    """
+    Background thread writing heartbeat_at on a running job every interval seconds until
+    stopped, or until the job is no longer owned by this process.
+    """
+    def __init__(self, job_id, owner, interval):
+        self.job_id = job_id
+        self.owner = owner
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._beat, name=f'analysis-job-heartbeat-{job_id}', daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+
+    def _beat(self):
+        from ..models import AnalysisJob
+        try:
+            while not self.stopped.wait(self.interval):
+                try:
+                    owned = AnalysisJob.objects.filter(
+                        id=self.job_id, status=AnalysisJob.Status.RUNNING, owner=self.owner
+                    ).update(heartbeat_at=timezone.now())
+                except Exception:
+                    logger.exception("Heartbeat of analysis job %s failed", self.job_id)
+                    continue
+                if not owned: return
+        finally:
+            connection.close()
+
+def claim_next_job():
+    """
+    Claims the oldest pending job, or returns None when the queue is empty.
+    """
+    from ..models import AnalysisJob
+
+    while True:
+        job_id = AnalysisJob.objects.filter(status=AnalysisJob.Status.PENDING).values_list('id', flat=True).first()
+        if job_id is None:
+            return None
+        if claim_job(job_id):
+            return job_id
+
+def run_job(job_id, detector=None, claimed=False):
+    """
+    Runs a single job to completion, writing throttled progress updates, heartbeats and
+    the final result (or error) back to its row. Nothing is written once the job is no
+    longer owned by this process.
+    """
+    from ..models import AnalysisJob
+    from ..views import get_detector, format_analysis
+
+    if not claimed and not claim_job(job_id):
+        return
+
+    job = AnalysisJob.objects.get(id=job_id)
+    owner = worker_id()
+    owned = AnalysisJob.objects.filter(id=job_id, owner=owner)
+    detector = detector or get_detector()
+    last_write = [0.0]
+
+    def report_progress(processed, total):
+        now = time.monotonic()
+        if processed < total and now - last_write[0] < JobQueue.PROGRESS_INTERVAL:
+            return
+        last_write[0] = now
+        owned.update(sentences_processed=processed, sentences_total=total, updated_at=timezone.now())
+
+    try:
+        with Heartbeat(job_id, owner, settings.ANALYSIS_JOB_HEARTBEAT_SECONDS):
+            analysis = detector.analyze_text(
+                job.text, job.ignored_texts, progress_callback=report_progress,
+                rewrite_tier=settings.STEREOTYPE_BATCH_REWRITE_TIER
+            )
+        written = owned.update(
+            result=format_analysis(analysis['text'], analysis), status=AnalysisJob.Status.COMPLETED,
+            updated_at=timezone.now()
+        )
+    except Exception as e:
+        logger.exception("Analysis job %s failed", job_id)
+        written = owned.update(error=str(e), status=AnalysisJob.Status.FAILED, updated_at=timezone.now())
+
+    if not written:
+        logger.warning("Analysis job %s was requeued while this process ran it, dropping its result", job_id)
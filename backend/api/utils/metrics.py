@@ -0,0 +1,229 @@
+import time
+import weakref
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class MetricsRegistry:
+    """
+    Process-wide, thread-safe store for stage latencies, model call counts, cache
+    hit rates and generic counters. Rendered in the Prometheus text format by the
+    metrics endpoint.
+
+    Caches register themselves, so their current size and memory are read when the
+    metrics are rendered rather than pushed on every change.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._cache = {}
+        self._evictions = {}
+        self._caches = weakref.WeakSet()
+        self._counters = {}
+        self._help = {}
+
+    def observe(self, stage: str, seconds: float, items: int = 1):
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                entry = self._stages[stage] = {"count": 0, "sum": 0.0, "items": 0, "buckets": [0] * len(BUCKETS)}
+            entry["count"] += 1
+            entry["sum"] += seconds
+            entry["items"] += items
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    entry["buckets"][i] += 1
+                    break
+
+    def record_cache(self, cache: str, hit: bool):
+        with self._lock:
+            entry = self._cache.setdefault(cache, {"hit": 0, "miss": 0})
+            entry["hit" if hit else "miss"] += 1
+
+    def record_eviction(self, cache: str, reason: str, count: int = 1):
+        with self._lock:
+            key = (cache, reason)
+            self._evictions[key] = self._evictions.get(key, 0) + count
+
+    def register_cache(self, cache):
+        with self._lock:
+            self._caches.add(cache)
+
+    def cache_usage(self) -> Dict:
+        """
+        Entries, approximate bytes and byte budget of the registered caches, summed by name.
+        """
+        with self._lock:
+            caches = list(self._caches)
+
+        usage = {}
+        for cache in caches:
+            entry = usage.setdefault(cache.name, {"entries": 0, "bytes": 0, "budget": 0})
+            entry["entries"] += len(cache)
+            entry["bytes"] += cache.bytes
+            entry["budget"] += cache.max_bytes or 0
+        return usage
+
+    def increment(self, name: str, labels: Dict[str, str] = None, value: float = 1, help_text: str = ""):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+            if help_text: self._help[name] = help_text
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "stages": {k: {"count": v["count"], "seconds": v["sum"], "items": v["items"]} for k, v in self._stages.items()},
+                "cache": {k: dict(v) for k, v in self._cache.items()},
+                "evictions": {f"{cache}:{reason}": count for (cache, reason), count in self._evictions.items()},
+                "counters": {f"{name}{_format_labels(dict(labels))}": value for (name, labels), value in self._counters.items()},
+            }
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            stages = {k: {"count": v["count"], "sum": v["sum"], "items": v["items"], "buckets": list(v["buckets"])} for k, v in self._stages.items()}
+            cache = {k: dict(v) for k, v in self._cache.items()}
+            evictions = dict(self._evictions)
+            counters = dict(self._counters)
+            help_texts = dict(self._help)
+        usage = self.cache_usage()
+
+        lines = [
+            "# HELP neutral_net_stage_seconds Time spent in each analysis stage, excluding nested stages. The request stage covers whole requests.",
+            "# TYPE neutral_net_stage_seconds histogram",
+        ]
+        for stage, entry in sorted(stages.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS, entry["buckets"]):
+                cumulative += count
+                lines.append(f'neutral_net_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'neutral_net_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {entry["count"]}')
+            lines.append(f'neutral_net_stage_seconds_sum{{stage="{stage}"}} {entry["sum"]:.6f}')
+            lines.append(f'neutral_net_stage_seconds_count{{stage="{stage}"}} {entry["count"]}')
+
+        lines += [
+            "# HELP neutral_net_stage_items_total Inputs (sentences, tokens or pairs) processed by each stage.",
+            "# TYPE neutral_net_stage_items_total counter",
+        ]
+        for stage, entry in sorted(stages.items()):
+            lines.append(f'neutral_net_stage_items_total{{stage="{stage}"}} {entry["items"]}')
+
+        lines += [
+            "# HELP neutral_net_cache_requests_total Cache lookups by result.",
+            "# TYPE neutral_net_cache_requests_total counter",
+        ]
+        for name, entry in sorted(cache.items()):
+            lines.append(f'neutral_net_cache_requests_total{{cache="{name}",result="hit"}} {entry["hit"]}')
+            lines.append(f'neutral_net_cache_requests_total{{cache="{name}",result="miss"}} {entry["miss"]}')
+
+        lines += [
+            "# HELP neutral_net_cache_evictions_total Cache entries dropped, by reason: capacity (entry count), memory (byte budget) or expired (TTL).",
+            "# TYPE neutral_net_cache_evictions_total counter",
+        ]
+        for (name, reason), count in sorted(evictions.items()):
+            lines.append(f'neutral_net_cache_evictions_total{{cache="{name}",reason="{reason}"}} {count}')
+
+        for metric, key, help_text in (
+            ("neutral_net_cache_entries", "entries", "Entries currently held by each cache."),
+            ("neutral_net_cache_bytes", "bytes", "Approximate memory currently held by each cache's keys and values."),
+            ("neutral_net_cache_budget_bytes", "budget", "Memory budget of each cache, 0 if it has none."),
+        ):
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"]
+            for name, entry in sorted(usage.items()):
+                lines.append(f'{metric}{{cache="{name}"}} {entry[key]}')
+
+        names = sorted({name for name, _ in counters})
+        for name in names:
+            if name in help_texts:
+                lines.append(f"# HELP {name} {help_texts[name]}")
+            lines.append(f"# TYPE {name} counter")
+            for (counter_name, labels), value in sorted(counters.items()):
+                if counter_name == name:
+                    lines.append(f"{name}{_format_labels(dict(labels))} {value}")
+
+        return "\n".join(lines) + "\n"
+
+def _format_labels(labels):
+    if not labels: return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in sorted(labels.items())) + "}"
+
+class RequestTrace:
+    """
+    Per-request breakdown of where time went. Collected for every traced request and
+    returned in the API response when the client asks for debug output.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.cache = {}
+
+    def add_stage(self, stage, seconds, items):
+        entry = self.stages.setdefault(stage, {"ms": 0.0, "calls": 0, "items": 0})
+        entry["ms"] += seconds * 1000.0
+        entry["calls"] += 1
+        entry["items"] += items
+
+    def add_cache(self, cache, hit):
+        entry = self.cache.setdefault(cache, {"hits": 0, "misses": 0})
+        entry["hits" if hit else "misses"] += 1
+
+    def to_dict(self):
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000.0, 2),
+            "stages": {k: {"ms": round(v["ms"], 2), "calls": v["calls"], "items": v["items"]} for k, v in self.stages.items()},
+            "cache": self.cache,
+        }
+
+registry = MetricsRegistry()
+
+_current_trace = contextvars.ContextVar("neutral_net_trace", default=None)
+_stage_stack = threading.local()
+
+@contextmanager
+def trace_request():
+    """
+    Starts a RequestTrace for everything run inside the block on this thread.
+    """
+    trace = RequestTrace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        registry.observe("request", time.perf_counter() - trace.started)
+
+@contextmanager
+def track(stage: str, items: int = 1):
+    """
+    Times a pipeline stage. Stages may nest (e.g. embeddings inside subject detection);
+    the time of nested stages is subtracted from the outer one, so the stages of a
+    request add up to its total.
+    """
+    stack = getattr(_stage_stack, "frames", None)
+    if stack is None:
+        stack = _stage_stack.frames = []
+
+    stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        nested = stack.pop()
+        if stack: stack[-1] += elapsed
+
+        exclusive = max(0.0, elapsed - nested)
+        registry.observe(stage, exclusive, items)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add_stage(stage, exclusive, items)
+
+def record_cache(cache: str, hit: bool):
+    registry.record_cache(cache, hit)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_cache(cache, hit)
@@ -1,6 +1,7 @@
 import spacy
 import uuid
 from fastcoref import FCoref
+from .metrics import track
 from .bias_patterns import (
     GENDERED_ROLES, PRONOUN_MAP, MALE_MODIFIERS, FEMALE_MODIFIERS,
     FREQUENCY_ADVERBS, OBLIGATION_MODALS, PREDICTION_MODALS, ALL_MODALS, CONDITIONAL_MARKERS
@@ -170,11 +171,29 @@ class PronounBiasDetector:
 
     def analyze(self, text: str):
         if not text.strip(): return []
-        
-        preds = self.resolver.predict(texts=[text], is_split_into_words=False)
-        clusters = preds[0].get_clusters(as_strings=False)
-        
-        doc = self.nlp(text)
+        return self.analyze_batch([text])[0]
+
+    def analyze_batch(self, texts):
+        """
+        Runs coreference resolution over every document in a single fastcoref call,
+        and parses them through spacy's pipe before evaluating the clusters.
+        """
+        results = [[] for _ in texts]
+        indices = [i for i, t in enumerate(texts) if t.strip()]
+        if not indices: return results
+
+        batch = [texts[i] for i in indices]
+        with track("coref", len(batch)):
+            preds = self.resolver.predict(texts=batch, is_split_into_words=False)
+        with track("dependency_parse", len(batch)):
+            docs = list(self.nlp.pipe(batch))
+
+        for i, pred, doc in zip(indices, preds, docs):
+            results[i] = self._analyze_doc(doc, pred.get_clusters(as_strings=False))
+
+        return results
+
+    def _analyze_doc(self, doc, clusters):
         biases = []
 
         suggestion_map = {
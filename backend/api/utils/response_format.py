@@ -0,0 +1,63 @@
+import json
+from django.http import HttpResponse
+from .encoders import NumpyEncoder
+
+try:
+    import msgpack
+except ImportError:
+    # Listed in requirements.txt; without it msgpack requests are answered with JSON,
+    # and the Content-Type tells the client which one it got
+    msgpack = None
+
+JSON = "application/json"
+COLUMNAR = "application/vnd.neutralnet.columnar+json"
+MSGPACK = "application/msgpack"
+
+def negotiate(request):
+    """
+    Picks the response format from the Accept header, JSON unless the client asks for the
+    columnar JSON or msgpack encoding. If msgpack is not installed, a request for it falls
+    through to the next acceptable type.
+    """
+    accept = request.headers.get('Accept', '')
+    offered = []
+    for part in accept.split(','):
+        media_type, _, params = part.strip().partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        offered.append((quality, media_type.strip().lower()))
+
+    for quality, media_type in sorted(offered, key=lambda o: -o[0]):
+        if quality <= 0: continue
+        if media_type == COLUMNAR: return COLUMNAR
+        if media_type in (MSGPACK, "application/x-msgpack") and msgpack is not None: return MSGPACK
+        if media_type in (JSON, "application/*", "*/*"): return JSON
+    return JSON
+
+def is_compact(content_type):
+    return content_type != JSON
+
+def _msgpack_default(obj):
+    # Same conversions as NumpyEncoder, for numpy scalars and arrays left in a result
+    if hasattr(obj, 'item'): return obj.item()
+    if hasattr(obj, 'tolist'): return obj.tolist()
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+def render(data, content_type, status=200):
+    """
+    Serializes a response body in the negotiated format.
+    """
+    if content_type == MSGPACK:
+        body = msgpack.packb(data, default=_msgpack_default, use_bin_type=True)
+    else:
+        body = json.dumps(data, cls=NumpyEncoder)
+
+    response = HttpResponse(body, content_type=content_type, status=status)
+    response['Vary'] = 'Accept'
+    return response
@@ -0,0 +1,108 @@
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+_configured = False
+
+def parse_cpu_list(value):
+    """
+    Parses a Linux style CPU list such as "0-7,16-23" into a sorted list of core ids.
+    """
+    cpus = set()
+    for part in value.split(','):
+        part = part.strip()
+        if not part: continue
+        if '-' in part:
+            low, high = part.split('-', 1)
+            cpus.update(range(int(low), int(high) + 1))
+        else:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+def worker_cpus(affinity, worker_index, threads):
+    """
+    Cores a worker should be pinned to, or None to leave scheduling to the OS.
+
+    "auto" gives every worker its own block of `threads` cores, indexed by WORKER_INDEX,
+    wrapping around when there are more workers than blocks. Anything else is an explicit
+    CPU list shared by all workers.
+    """
+    if not affinity: return None
+    if affinity != 'auto':
+        return parse_cpu_list(affinity)
+
+    if worker_index is None or threads <= 0:
+        logger.warning("CPU_AFFINITY=auto needs WORKER_INDEX and TORCH_NUM_THREADS, not pinning")
+        return None
+
+    available = sorted(os.sched_getaffinity(0))
+    blocks = max(1, len(available) // threads)
+    start = (worker_index % blocks) * threads
+    return available[start:start + threads]
+
+def setup_worker_process(counter, threads):
+    """
+    Initializer for the spawned worker processes of audit_corpus and the benchmark sweep.
+    Takes the next worker index from counter (a shared multiprocessing Value) and sets it,
+    with the thread count if positive, directly on settings before django.setup() loads
+    the models. Environment variables would not do: the child imports the command module
+    to unpickle its initializer, and that import may already have read the settings.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'neutral_net.settings')
+    from django.conf import settings
+
+    with counter.get_lock():
+        worker_index = counter.value
+        counter.value += 1
+
+    settings.WORKER_INDEX = worker_index
+    if threads > 0:
+        settings.TORCH_NUM_THREADS = threads
+
+    import django
+    django.setup()
+
+def configure_runtime():
+    """
+    Applies the thread and CPU settings of this process. Must run before torch is first
+    imported, because OpenMP reads its thread count once at load time, so ApiConfig.ready
+    calls it before any detector in api/utils is created. Later calls do nothing.
+    """
+    global _configured
+    if _configured: return
+    _configured = True
+
+    from django.conf import settings
+
+    threads = settings.TORCH_NUM_THREADS
+    interop_threads = settings.TORCH_INTEROP_THREADS
+    worker_index = settings.WORKER_INDEX
+
+    os.environ['TOKENIZERS_PARALLELISM'] = 'true' if settings.TOKENIZERS_PARALLELISM else 'false'
+    if threads > 0:
+        os.environ['OMP_NUM_THREADS'] = str(threads)
+        os.environ['MKL_NUM_THREADS'] = str(threads)
+
+    cpus = worker_cpus(settings.CPU_AFFINITY, worker_index, threads)
+    if cpus:
+        try:
+            os.sched_setaffinity(0, cpus)
+        except (AttributeError, OSError, ValueError):
+            logger.exception("Could not pin process to CPUs %s", cpus)
+            cpus = None
+
+    import torch
+    if threads > 0:
+        torch.set_num_threads(threads)
+    if interop_threads > 0:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError:
+            # Only allowed before the first inter-op parallel work in the process
+            logger.warning("Inter-op threads already started, keeping %d", torch.get_num_interop_threads())
+
+    logger.info(
+        "Runtime: worker=%s intra_op_threads=%d inter_op_threads=%d cpus=%s",
+        worker_index, torch.get_num_threads(), torch.get_num_interop_threads(), cpus or "all"
+    )
@@ -3,7 +3,12 @@ from torch.nn.functional import softmax
 from transformers import AutoTokenizer, AutoModelForSequenceClassification, AutoModelForSeq2SeqLM
 import uuid
 import os
+import logging
 from django.conf import settings
+from .metrics import track, registry
+from .cache import LRUCache
+
+logger = logging.getLogger(__name__)
 
 class StereotypeDetector:
     """
@@ -32,6 +37,9 @@ class StereotypeDetector:
         except Exception as e:
             self.rewriter_model = None
 
+        # (reason, rewrite) pairs keyed on (sentence, decoding tier)
+        self.rewrite_cache = LRUCache("stereotype_rewrite", maxsize=1024)
+
     def predict_bias(self, text):
         """
         Calculates the probability that a sentence contains a gender stereotype.
@@ -48,7 +56,7 @@ class StereotypeDetector:
             max_length=128,
         )
 
-        with torch.no_grad():
+        with track("stereotype_classify"), torch.no_grad():
             logits = self.detector_model(**inputs).logits
 
         probs = softmax(logits, dim=-1)
@@ -59,28 +67,186 @@ class StereotypeDetector:
             "confidence": bias_score,
         }
 
-    def fix_bias(self, text):
+    def predict_bias_batch(self, texts, batch_size=32):
+        """
+        Batched variant of predict_bias.
+
+        Sentences are sorted by length before being grouped so that each padded
+        batch wastes as little compute as possible. Results are returned in input order.
+        """
+        if not self.detector_model: return [{"bias": False, "confidence": 0.0} for _ in texts]
+
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        scores = [0.0] * len(texts)
+
+        for i in range(0, len(order), batch_size):
+            chunk = order[i:i + batch_size]
+            inputs = self.detector_tokenizer(
+                [texts[j] for j in chunk],
+                return_tensors="pt",
+                truncation=True,
+                max_length=128,
+                padding=True,
+            )
+
+            with track("stereotype_classify", len(chunk)), torch.no_grad():
+                logits = self.detector_model(**inputs).logits
+
+            probs = softmax(logits, dim=-1)[:, 1].tolist()
+            for j, score in zip(chunk, probs):
+                scores[j] = score
+
+        return [{"bias": score >= self.THRESHOLD, "confidence": score} for score in scores]
+
+    def fix_bias(self, text, tier=None):
         """
         Generates neutral rewrite and reasoning for the bias.
 
         Uses beam search encoding on the Seq2Seq model to ensure high quality,
-        grammatically correct outputs.
+        grammatically correct outputs. Lower latency tiers trade beam width for speed.
         """
-        if not self.rewriter_model: return "Model unavailable", text
+        return self.fix_bias_batch([text], tier)[0]
 
-        input_text = f"Fix Gender Bias: {text}"
-        inputs = self.rewriter_tokenizer(input_text, return_tensors="pt")
+    def fix_bias_batch(self, texts, tier=None, batch_size=None):
+        """
+        Batched variant of fix_bias, returning (reason, rewrite) pairs in input order.
 
-        with torch.no_grad():
-            outputs = self.rewriter_model.generate(
-                **inputs,
-                max_length=128,
-                num_beams=4,
-                early_stopping=True
+        Sentences are grouped by token length so each generate call pads as little as
+        possible. The decoding strategy (beam width, output length) comes from the given
+        latency tier in settings.STEREOTYPE_REWRITE_TIERS, and rewrites are cached per
+        sentence and tier.
+        """
+        if not self.rewriter_model: return [("Model unavailable", text) for text in texts]
+
+        tier = tier or settings.STEREOTYPE_REWRITE_TIER
+        if tier not in settings.STEREOTYPE_REWRITE_TIERS:
+            raise ValueError(f"Unknown rewrite tier '{tier}'")
+        decoding = settings.STEREOTYPE_REWRITE_TIERS[tier]
+        batch_size = batch_size or settings.STEREOTYPE_REWRITE_BATCH_SIZE
+
+        found = {}
+        missing = []
+        for text in dict.fromkeys(texts):
+            cached = self.rewrite_cache.get((text, tier))
+            if cached is None: missing.append(text)
+            else: found[text] = cached
+
+        if missing:
+            inputs = [f"Fix Gender Bias: {text}" for text in missing]
+            lengths = [len(ids) for ids in self.rewriter_tokenizer(inputs)["input_ids"]]
+            order = sorted(range(len(missing)), key=lambda i: lengths[i])
+
+            for i in range(0, len(order), batch_size):
+                bucket = order[i:i + batch_size]
+                encoded = self.rewriter_tokenizer(
+                    [inputs[j] for j in bucket],
+                    return_tensors="pt",
+                    padding=True,
+                )
+
+                with track("stereotype_rewrite", len(bucket)), torch.no_grad():
+                    if decoding.get("speculative"):
+                        outputs = self.generate_speculative(encoded, decoding)
+                    else:
+                        outputs = self.rewriter_model.generate(**encoded, **decoding)
+
+                decoded = self.rewriter_tokenizer.batch_decode(outputs, skip_special_tokens=True)
+                for j, result in zip(bucket, decoded):
+                    pair = self.parse_rewrite(result)
+                    self.rewrite_cache.put((missing[j], tier), pair)
+                    found[missing[j]] = pair
+
+        return [found[text] for text in texts]
+
+    def generate_speculative(self, encoded, decoding):
+        """
+        Greedy decoding with copy drafts. Rewrites are usually close edits of the input, so
+        instead of a draft model the input tokens themselves are the draft: after each step
+        the last generated tokens are looked up in the input, and the tokens that followed
+        them there are proposed as the continuation. The rewriter verifies the whole draft
+        in one decoder pass over its KV cache, keeps the longest prefix it agrees with plus
+        its own next token, and drops the cache entries of rejected tokens.
+
+        The output matches plain greedy decoding. Falls back to generate() if the
+        model's cache cannot be cropped.
+        """
+        sequences = []
+        for row in range(encoded["input_ids"].shape[0]):
+            mask = encoded["attention_mask"][row].bool()
+            input_ids = encoded["input_ids"][row][mask].unsqueeze(0)
+            try:
+                sequences.append(self._speculate_one(input_ids, decoding))
+            except (AttributeError, NotImplementedError):
+                logger.exception("Speculative decoding unavailable, falling back to greedy generate")
+                output = self.rewriter_model.generate(input_ids=input_ids, num_beams=1, max_new_tokens=decoding.get("max_new_tokens", 128))
+                sequences.append(output[0].tolist())
+        return sequences
+
+    def _speculate_one(self, input_ids, decoding):
+        model = self.rewriter_model
+        max_new_tokens = decoding.get("max_new_tokens", 128)
+        draft_tokens = decoding.get("draft_tokens", 10)
+        eos = model.config.eos_token_id
+
+        encoder_outputs = model.get_encoder()(input_ids=input_ids)
+        source = input_ids[0].tolist()
+        generated = [model.config.decoder_start_token_id]
+        past = None
+        cached = 0
+        drafted = accepted = 0
+
+        while len(generated) - 1 < max_new_tokens:
+            draft = self.copy_draft(source, generated, min(draft_tokens, max_new_tokens - len(generated)))
+            outputs = model(
+                encoder_outputs=encoder_outputs,
+                decoder_input_ids=torch.tensor([generated[cached:] + draft]),
+                past_key_values=past,
+                use_cache=True,
             )
+            # Model's choice after the last accepted token and after each draft token
+            predictions = outputs.logits[0, -(len(draft) + 1):].argmax(-1).tolist()
 
-        result = self.rewriter_tokenizer.decode(outputs[0], skip_special_tokens=True)
-        
+            matched = 0
+            while matched < len(draft) and draft[matched] == predictions[matched]:
+                matched += 1
+            drafted += len(draft)
+            accepted += matched
+
+            new_tokens = draft[:matched] + [predictions[matched]]
+            if eos in new_tokens:
+                generated.extend(new_tokens[:new_tokens.index(eos) + 1])
+                break
+            generated.extend(new_tokens)
+
+            # The newest token has not been fed yet, everything before it is valid cache
+            past = outputs.past_key_values
+            cached = len(generated) - 1
+            past.crop(cached)
+
+        registry.increment("neutral_net_speculative_tokens_total", {"result": "drafted"}, drafted,
+                           help_text="Copy-draft tokens proposed to and accepted by the stereotype rewriter.")
+        registry.increment("neutral_net_speculative_tokens_total", {"result": "accepted"}, accepted)
+        return generated
+
+    @staticmethod
+    def copy_draft(source, generated, limit, max_ngram=3):
+        """
+        Proposes up to `limit` tokens by finding the longest suffix of the generated tokens
+        (at most max_ngram long) in the source and copying what follows it there.
+        """
+        if limit <= 0: return []
+        for n in range(min(max_ngram, len(generated)), 0, -1):
+            suffix = generated[-n:]
+            for start in range(len(source) - n + 1):
+                if source[start:start + n] == suffix:
+                    return source[start + n:start + n + limit]
+        return []
+
+    @staticmethod
+    def parse_rewrite(result):
+        """
+        Splits the model output ("Reason: ... | Rewrite: ...") into a (reason, rewrite) pair.
+        """
         reason = "Automated Rewrite"
         rewrite = result
 
@@ -96,6 +262,57 @@ class StereotypeDetector:
             
         return reason, rewrite
 
+    def build_result(self, sentence, prediction, fix=None):
+        """
+        Converts a positive prediction into a bias object, generating the rewrite unless
+        a (reason, rewrite) pair is passed in. A (None, None) pair gives a detection without
+        description or suggestion, for modes that skip the rewriter.
+        """
+        reason, rewrite = fix if fix is not None else self.fix_bias(sentence)
+
+        if rewrite is None:
+            return {
+                "id": str(uuid.uuid4()),
+                "text": sentence,
+                "type": "stereotype",
+                "description": None,
+                "suggestion": None,
+                "alternatives": [],
+                "confidence": prediction["confidence"],
+                "position": {
+                    "start": 0,
+                    "end": len(sentence)
+                }
+            }
+        elif rewrite == "[MANUAL REWRITE]": # Model response when it deems a sentence unfixable
+            return {
+                "id": str(uuid.uuid4()),
+                "text": sentence,
+                "type": "stereotype",
+                "description": reason,
+                "suggestion": "Consider removing generalizations based on gender.",
+                "alternatives": [],
+                "confidence": prediction["confidence"],
+                "position": {
+                    "start": 0,
+                    "end": len(sentence)
+                }
+            }
+        else:
+            return {
+                "id": str(uuid.uuid4()),
+                "text": sentence, 
+                "type": "stereotype", 
+                "description": reason,
+                "suggestion": f"Consider rewriting the sentence to: {rewrite}",
+                "alternatives": [rewrite],
+                "confidence": prediction['confidence'],
+                "position": {
+                    "start": 0,             
+                    "end": len(sentence)    
+                }
+            }
+
     def analyze_sentence(self, sentence):
         """
         Evaluates a sentences, combining the response of both the models
@@ -105,35 +322,36 @@ class StereotypeDetector:
         prediction = self.predict_bias(sentence)
         
         if prediction['bias']:
-            reason, rewrite = self.fix_bias(sentence)
-
-            if rewrite == "[MANUAL REWRITE]": # Model response when it deems a sentence unfixable
-                return {
-                    "id": str(uuid.uuid4()),
-                    "text": sentence,
-                    "type": "stereotype",
-                    "description": reason,
-                    "suggestion": "Consider removing generalizations based on gender.",
-                    "alternatives": [],
-                    "confidence": prediction["confidence"],
-                    "position": {
-                        "start": 0,
-                        "end": len(sentence)
-                    }
-                }
-            else:
-                return {
-                    "id": str(uuid.uuid4()),
-                    "text": sentence, 
-                    "type": "stereotype", 
-                    "description": reason,
-                    "suggestion": f"Consider rewriting the sentence to: {rewrite}",
-                    "alternatives": [rewrite],
-                    "confidence": prediction['confidence'],
-                    "position": {
-                        "start": 0,             
-                        "end": len(sentence)    
-                    }
-                }
+            return self.build_result(sentence, prediction)
+
+        return None
+
+    def analyze_sentences(self, sentences, batch_size=32, tier=None, rewrite=True, predictions=None):
+        """
+        Evaluates many sentences at once. Classification runs in padded batches,
+        only the flagged sentences are sent to the rewriter, in length-bucketed batches.
+        With rewrite=False the rewriter is skipped and flagged sentences get a detection
+        without description or rewrite, for score and detect mode.
+
+        predictions optionally holds a predict_bias result per sentence from another
+        classifier (the distilled student model), in which case the classifier is skipped.
+        """
+        results = [None] * len(sentences)
+        indices = [i for i, s in enumerate(sentences) if s.strip()]
+        if predictions is None:
+            predictions = self.predict_bias_batch([sentences[i] for i in indices], batch_size)
+        else:
+            predictions = [predictions[i] for i in indices]
+
+        flagged = [(i, prediction) for i, prediction in zip(indices, predictions) if prediction['bias']]
+        if not rewrite:
+            for i, prediction in flagged:
+                results[i] = self.build_result(sentences[i], prediction, (None, None))
+            return results
+
+        fixes = self.fix_bias_batch([sentences[i] for i, _ in flagged], tier)
+
+        for (i, prediction), fix in zip(flagged, fixes):
+            results[i] = self.build_result(sentences[i], prediction, fix)
 
-        return None
\ No newline at end of file
+        return results
@@ -0,0 +1,187 @@
+import re
+import json
+from pathlib import Path
+import torch
+from torch import nn
+from transformers import AutoConfig, AutoModel, AutoTokenizer
+from .metrics import track
+from .cache import LRUCache
+
+WORD = re.compile(r"\w+")
+
+def first_tokens(offsets, words):
+    """
+    Index of the first sub-token of each (start, end) word, from the tokenizer's offset
+    mapping. None for words cut off by truncation.
+    """
+    firsts = [None] * len(words)
+    w = 0
+    for i, (start, end) in enumerate(offsets):
+        if start == end: continue # Special and padding tokens
+        while w < len(words) and words[w][1] <= start: w += 1
+        if w == len(words): break
+        if words[w][0] <= start and firsts[w] is None: firsts[w] = i
+    return firsts
+
+class MultiTaskStudent(nn.Module):
+    """
+    One small encoder shared by the heads that replace the detection models:
+        - stereotype: probability that the sentence holds a gender stereotype (stereotype classifier)
+        - human: probability that the sentence's subject is a person (spaCy + GLiNER + MiniLM)
+        - tags: per word none/agentic/communal, plus the skew score of tagged words (MiniLM anchors)
+        - specificity: per word, probability that a gendered term refers to a specific person (NLI)
+
+    Sentence heads read the mean of the token states, word heads the first sub-token of each word.
+    """
+    TAGS = (None, "Agentic", "Communal")
+
+    def __init__(self, encoder):
+        super().__init__()
+        self.encoder = encoder
+        hidden = encoder.config.hidden_size
+        self.dropout = nn.Dropout(0.1)
+        self.stereotype = nn.Linear(hidden, 1)
+        self.human = nn.Linear(hidden, 1)
+        self.tags = nn.Linear(hidden, len(self.TAGS))
+        self.tag_score = nn.Linear(hidden, 1)
+        self.specificity = nn.Linear(hidden, 1)
+
+    def forward(self, input_ids, attention_mask):
+        hidden = self.dropout(self.encoder(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state)
+        mask = attention_mask.unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+        return {
+            "stereotype": self.stereotype(pooled).squeeze(-1),
+            "human": self.human(pooled).squeeze(-1),
+            "tags": self.tags(hidden),
+            "tag_score": self.tag_score(hidden).squeeze(-1),
+            "specificity": self.specificity(hidden).squeeze(-1),
+        }
+
+class StudentModel:
+    """
+    Distilled detection backend (settings.DETECTION_BACKEND = "student"). One forward pass
+    per batch of sentences gives every detection signal the pipeline otherwise gets from
+    four models. Rewrites and synonym suggestions still come from the pipeline's generative
+    models, and pronoun detection from the coreference model.
+
+    Models are trained from the pipeline's own outputs with `manage.py distill_student`.
+    Predictions are cached per sentence.
+    """
+    CONFIG_NAME = "student.json"
+    WEIGHTS_NAME = "student.pt"
+    DEFAULT_THRESHOLDS = {"stereotype": 0.85, "human": 0.5, "specificity": 0.5}
+
+    def __init__(self, model, tokenizer, config):
+        self.model = model
+        self.model.eval()
+        self.tokenizer = tokenizer
+        self.config = config
+        self.max_length = config.get("max_length", 128)
+        self.thresholds = dict(self.DEFAULT_THRESHOLDS, **config.get("thresholds", {}))
+        self.cache = LRUCache("student", maxsize=4096)
+
+    @classmethod
+    def from_base(cls, base_model, max_length=128, thresholds=None):
+        """
+        Untrained student on top of a pretrained encoder, for distillation.
+        """
+        model = MultiTaskStudent(AutoModel.from_pretrained(base_model))
+        config = {"base_model": base_model, "max_length": max_length, "thresholds": thresholds or {}}
+        return cls(model, AutoTokenizer.from_pretrained(base_model), config)
+
+    @classmethod
+    def load(cls, path):
+        path = Path(path)
+        with open(path / cls.CONFIG_NAME, encoding="utf-8") as f:
+            config = json.load(f)
+        model = MultiTaskStudent(AutoModel.from_config(AutoConfig.from_pretrained(path)))
+        model.load_state_dict(torch.load(path / cls.WEIGHTS_NAME, map_location="cpu"))
+        return cls(model, AutoTokenizer.from_pretrained(path), config)
+
+    def save(self, path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        self.model.encoder.config.save_pretrained(path)
+        self.tokenizer.save_pretrained(path)
+        torch.save(self.model.state_dict(), path / self.WEIGHTS_NAME)
+        with open(path / self.CONFIG_NAME, "w", encoding="utf-8") as f:
+            json.dump(dict(self.config, thresholds=self.thresholds), f, indent=2)
+
+    def tokenize(self, sentences):
+        """
+        Returns the model inputs, the (start, end) words of each sentence and the index
+        of each word's first sub-token.
+        """
+        encoded = self.tokenizer(
+            sentences,
+            return_tensors="pt",
+            truncation=True,
+            max_length=self.max_length,
+            padding=True,
+            return_offsets_mapping=True,
+        )
+        offsets = encoded.pop("offset_mapping").tolist()
+        words = [[m.span() for m in WORD.finditer(s)] for s in sentences]
+        firsts = [first_tokens(o, w) for o, w in zip(offsets, words)]
+        inputs = {"input_ids": encoded["input_ids"], "attention_mask": encoded["attention_mask"]}
+        return inputs, words, firsts
+
+    def predict(self, sentences, batch_size=32):
+        """
+        Predictions for each sentence, in input order. Sentences missing from the cache are
+        sorted by length and run in padded batches. A prediction holds:
+            - stereotype: a StereotypeDetector.predict_bias style result
+            - human: whether the subject is a person
+            - tags: (start, end, "Agentic"/"Communal", score) of each tagged word
+            - specificity: specificity probability by word start offset
+        """
+        found = {}
+        missing = []
+        for sentence in dict.fromkeys(sentences):
+            prediction = self.cache.get(sentence)
+            if prediction is None: missing.append(sentence)
+            else: found[sentence] = prediction
+
+        missing.sort(key=len)
+        for i in range(0, len(missing), batch_size):
+            chunk = missing[i:i + batch_size]
+            inputs, words, firsts = self.tokenize(chunk)
+
+            with track("student", len(chunk)), torch.no_grad():
+                outputs = self.model(**inputs)
+
+            stereotype = torch.sigmoid(outputs["stereotype"]).tolist()
+            human = torch.sigmoid(outputs["human"]).tolist()
+            tags = outputs["tags"].argmax(dim=-1).tolist()
+            tag_scores = outputs["tag_score"].tolist()
+            specificity = torch.sigmoid(outputs["specificity"]).tolist()
+
+            for row, sentence in enumerate(chunk):
+                prediction = {
+                    "stereotype": {"bias": stereotype[row] >= self.thresholds["stereotype"], "confidence": stereotype[row]},
+                    "human": human[row] >= self.thresholds["human"],
+                    "tags": [],
+                    "specificity": {},
+                }
+                for (start, end), token in zip(words[row], firsts[row]):
+                    if token is None: continue
+                    label = MultiTaskStudent.TAGS[tags[row][token]]
+                    if label: prediction["tags"].append((start, end, label, tag_scores[row][token]))
+                    prediction["specificity"][start] = specificity[row][token]
+
+                self.cache.put(sentence, prediction)
+                found[sentence] = prediction
+
+        return [found[s] for s in sentences]
+
+    def are_specific(self, candidates, batch_size=32):
+        """
+        Drop-in for the NLI filter of GenderedTermsDetector. Takes (sentence, start, end)
+        triples and returns whether each term refers to a specific person.
+        """
+        predictions = self.predict([sentence for sentence, _, _ in candidates], batch_size)
+        return [
+            prediction["specificity"].get(start, 0.0) >= self.thresholds["specificity"]
+            for (_, start, _), prediction in zip(candidates, predictions)
+        ]
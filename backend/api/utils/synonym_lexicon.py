@@ -0,0 +1,77 @@
+import gzip
+import json
+import hashlib
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+class SynonymLexicon:
+    """
+    Precomputed neutral alternatives for the words the agentic/communal detector flags,
+    built offline by `manage.py build_synonym_lexicon`.
+
+    A word is flagged from its own embedding alone, so the anchor checks that filter the
+    fill-mask suggestions (tonal neutrality, closeness to the original word) do not depend
+    on the sentence and can be run once over the whole vocabulary. Only the part of speech
+    and the fit in the sentence are left to check per request.
+
+    Stored as gzipped JSON: {"fingerprint": ..., "entries": {word: {"type": ..., "alternatives": [[word, pos], ...]}}}.
+    """
+    VERSION = 1
+
+    def __init__(self, entries=None, fingerprint=None):
+        self.entries = entries or {}
+        self.fingerprint = fingerprint
+
+    @staticmethod
+    def anchor_fingerprint(agentic_anchors, communal_anchors, functional_anchors):
+        """
+        Identifies the anchors a lexicon was built against. A lexicon built for other
+        anchors would suggest words the detector now considers biased.
+        """
+        payload = json.dumps([SynonymLexicon.VERSION, list(agentic_anchors), list(communal_anchors), list(functional_anchors)])
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def load(cls, path, fingerprint=None):
+        """
+        Loads a lexicon, or returns an empty one if path is empty, the file does not exist
+        or it was built for other anchors than fingerprint.
+        """
+        if not path or not Path(path).exists():
+            return cls()
+
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+
+        if fingerprint is not None and data.get("fingerprint") != fingerprint:
+            logger.warning("Synonym lexicon %s was built for other anchors, rebuild it with build_synonym_lexicon", path)
+            return cls()
+
+        return cls(data["entries"], data.get("fingerprint"))
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump({"fingerprint": self.fingerprint, "entries": self.entries}, f, separators=(",", ":"))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, word):
+        return word.lower() in self.entries
+
+    def lookup(self, word, bias_type, pos):
+        """
+        Alternatives for word, best first, that share its part of speech. An empty list
+        means the vocabulary has no neutral alternative at all. None means the lexicon
+        cannot tell: it has no entry for the word as this bias type, or none of the
+        alternatives has the part of speech.
+        """
+        entry = self.entries.get(word.lower())
+        if entry is None or entry["type"] != bias_type: return None
+        matching = [alternative for alternative, alternative_pos in entry["alternatives"] if alternative_pos == pos]
+        if entry["alternatives"] and not matching: return None
+        return matching
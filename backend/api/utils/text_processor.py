@@ -10,13 +10,33 @@ class TextProcessor:
     Handles the text parsing required by the inference engines, and constructs the payload
     for the UI
     """
+    SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+')
+
     @staticmethod
     def extract_sentences(text: str) -> List[str]:
         """
         Splits text into sentences using punctuation boundaries.
         """
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        return [s.strip() for s in sentences if s.strip()]
+        return [text[start:end] for start, end in TextProcessor.sentence_spans(text)]
+
+    @staticmethod
+    def sentence_spans(text: str) -> List[Tuple[int, int]]:
+        """
+        (start, end) offsets of the sentences extract_sentences returns, found in one pass
+        over the punctuation boundaries, so callers never have to search for a sentence
+        to learn where it is.
+        """
+        spans = []
+        piece_start = 0
+        for match in [*TextProcessor.SENTENCE_BREAK.finditer(text), None]:
+            piece_end = match.start() if match else len(text)
+            piece = text[piece_start:piece_end]
+            stripped = piece.strip()
+            if stripped:
+                start = piece_start + len(piece) - len(piece.lstrip())
+                spans.append((start, start + len(stripped)))
+            if match: piece_start = match.end()
+        return spans
     
     @staticmethod
     def find_word_positions(text: str, word: str) -> List[Tuple[int, int]]:
@@ -31,29 +51,46 @@ class TextProcessor:
         
         return positions
     
+    PRONOUN_GENDERS = {
+        "he": "masculine", "him": "masculine", "his": "masculine", "himself": "masculine",
+        "she": "feminine", "her": "feminine", "hers": "feminine", "herself": "feminine",
+        "they": "neutral", "them": "neutral", "their": "neutral", "themselves": "neutral", "themself": "neutral",
+    }
+    # Counted on their own, outside the gender totals and the balance
+    REFLEXIVES = frozenset({"himself", "herself", "themselves", "themself"})
+    # Documents shorter than this, or with a single paragraph, get no per-paragraph breakdown
+    PARAGRAPH_STATS_MIN_CHARS = 5000
+    # Pronouns and paragraph breaks in one alternation, so a single scan gives both
+    PRONOUN_SCAN = re.compile(
+        r'(?P<paragraph>\n[^\S\n]*\n)|\b(?P<pronoun>' + '|'.join(sorted(PRONOUN_GENDERS, key=len, reverse=True)) + r')\b',
+        re.IGNORECASE
+    )
+
     @staticmethod
     def calculate_pronoun_stats(text: str) -> Dict[str, Any]:
         """
-        Generates a statistical breakdown of pronoun usage across the document.
+        Generates a statistical breakdown of pronoun usage across the document. Reflexives
+        get their own counts and are left out of the gender totals and the balance. Long
+        documents with several paragraphs also get per-paragraph gender totals.
         NOTE: This function isn't functionally useful, and is old code.
         """
-        text_lower = text.lower()
-        
-        stats = {
-            "he": len(re.findall(r'\bhe\b', text_lower)),
-            "she": len(re.findall(r'\bshe\b', text_lower)),
-            "him": len(re.findall(r'\bhim\b', text_lower)),
-            "her": len(re.findall(r'\bher\b', text_lower)),
-            "his": len(re.findall(r'\bhis\b', text_lower)),
-            "hers": len(re.findall(r'\bhers\b', text_lower)),
-            "they": len(re.findall(r'\bthey\b', text_lower)),
-            "them": len(re.findall(r'\bthem\b', text_lower)),
-            "their": len(re.findall(r'\btheir\b', text_lower)),
-        }
+        stats = dict.fromkeys(TextProcessor.PRONOUN_GENDERS, 0)
+        empty = {"masculine": 0, "feminine": 0, "neutral": 0}
+        paragraphs = [dict(empty, start=0)]
+
+        for match in TextProcessor.PRONOUN_SCAN.finditer(text):
+            pronoun = match.group('pronoun')
+            if pronoun is None:
+                paragraphs.append(dict(empty, start=match.end()))
+                continue
+            pronoun = pronoun.lower()
+            stats[pronoun] += 1
+            if pronoun not in TextProcessor.REFLEXIVES:
+                paragraphs[-1][TextProcessor.PRONOUN_GENDERS[pronoun]] += 1
         
-        masculine = stats["he"] + stats["him"] + stats["his"]
-        feminine = stats["she"] + stats["her"] + stats["hers"]
-        neutral = stats["they"] + stats["them"] + stats["their"]
+        masculine = sum(p["masculine"] for p in paragraphs)
+        feminine = sum(p["feminine"] for p in paragraphs)
+        neutral = sum(p["neutral"] for p in paragraphs)
         
         total_gendered = masculine + feminine
         if total_gendered > 0:
@@ -61,14 +98,18 @@ class TextProcessor:
         else:
             pronoun_balance = 1.0
         
-        return {
+        result = {
             **stats,
             "masculine_total": masculine,
             "feminine_total": feminine,
             "neutral_total": neutral,
+            "reflexive_total": sum(stats[p] for p in TextProcessor.REFLEXIVES),
             "pronoun_balance": round(pronoun_balance * 100, 2),
             "bias_score": round(pronoun_balance * 100)
         }
+        if len(paragraphs) > 1 and len(text) >= TextProcessor.PARAGRAPH_STATS_MIN_CHARS:
+            result["paragraphs"] = paragraphs
+        return result
     
     @staticmethod
     def highlight_text_with_biases(text: str, biases: List[Dict]) -> str:
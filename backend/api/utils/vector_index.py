@@ -0,0 +1,103 @@
+import json
+import logging
+from pathlib import Path
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+def cosine(a, b):
+    return float(normalize(a) @ normalize(b))
+
+class ExactIndex:
+    """
+    Brute-force cosine similarity against a set of vectors, such as an anchor list.
+    Vectors are normalized once, so scoring a query is a single matrix product.
+
+    Queries are one vector or a matrix of them: max and mean return a float for a single
+    vector and an array with one score per row otherwise.
+    """
+    def __init__(self, vectors):
+        self.vectors = normalize(np.atleast_2d(vectors))
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def similarities(self, queries):
+        return normalize(queries) @ self.vectors.T
+
+    def max(self, queries):
+        return self._reduce(self.similarities(queries).max(axis=-1))
+
+    def mean(self, queries):
+        return self._reduce(self.similarities(queries).mean(axis=-1))
+
+    @staticmethod
+    def _reduce(scores):
+        return float(scores) if np.ndim(scores) == 0 else scores
+
+    def search(self, query, k):
+        """
+        The k nearest vectors to one query, as (indices, similarities), best first.
+        """
+        scores = self.similarities(query)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return top.tolist(), scores[top].tolist()
+
+class EmbeddingTable:
+    """
+    Precomputed word embeddings, built by `manage.py build_embedding_table`. The vectors are
+    a .npy file opened with mmap, so startup does not read the table and the workers of a
+    host share one copy through the page cache.
+
+    Words are stored lowercase; the table records the encoder it was built with and is only
+    used with that encoder.
+    """
+    VECTORS_NAME = "vectors.npy"
+    WORDS_NAME = "words.json"
+
+    def __init__(self, words, vectors, model=None):
+        self.words = {word: i for i, word in enumerate(words)}
+        self.vectors = vectors
+        self.model = model
+
+    @classmethod
+    def load(cls, path, model=None):
+        """
+        Returns None if path is empty, holds no table or a table built with another model.
+        """
+        if not path or not (Path(path) / cls.VECTORS_NAME).exists():
+            return None
+
+        path = Path(path)
+        with open(path / cls.WORDS_NAME, encoding="utf-8") as f:
+            meta = json.load(f)
+
+        if model is not None and meta.get("model") != model:
+            logger.warning("Embedding table %s was built with %s, not %s, ignoring it", path, meta.get("model"), model)
+            return None
+
+        return cls(meta["words"], np.load(path / cls.VECTORS_NAME, mmap_mode="r"), meta.get("model"))
+
+    def save(self, path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / self.VECTORS_NAME, np.asarray(self.vectors, dtype=np.float32))
+        with open(path / self.WORDS_NAME, "w", encoding="utf-8") as f:
+            json.dump({"model": self.model, "words": list(self.words)}, f)
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, word):
+        return word.lower() in self.words
+
+    def get(self, word):
+        i = self.words.get(word.lower())
+        return None if i is None else np.asarray(self.vectors[i])
@@ -0,0 +1,91 @@
+import time
+import logging
+import threading
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+_ready = threading.Event()
+
+# Short, medium and long inputs, so kernels and tokenizer paths for several sequence
+# lengths are initialized. They touch every detector: agentic/communal words, a generic
+# gendered term, a generic pronoun and a stereotype.
+SAMPLES = (
+    "The manager is assertive.",
+    "Our chairman should be arriving any minute. A good nurse knows her patients, and she is always gentle and caring with them.",
+    "When a developer joins the team, he is expected to be ambitious and competitive. "
+    "Women are naturally better at organizing events than men. "
+    "The businessman presented the strategy, while the spokesman answered questions from the press. "
+    "Every engineer should double check his code before the deadline. "
+    "She was warm, supportive and nurturing towards the new interns, who found the first weeks daunting.",
+)
+
+def is_ready():
+    return _ready.is_set()
+
+def mark_ready():
+    _ready.set()
+
+def compile_models(detector):
+    """
+    Compiles the encoder-only models, and the student model when it is the detection backend,
+    with torch.compile. Sequence lengths vary per request, so graphs are compiled with dynamic
+    shapes. GLiNER and the seq2seq rewriter keep running eagerly: their generation and span
+    decoding loops do not compile cleanly.
+    """
+    modules = {
+        "stereotype_classifier": getattr(detector.stereotype_detector, "detector_model", None),
+        "sentence_encoder": detector.agentic_communal_detector.encoder[0].auto_model,
+        "nli": detector.gendered_terms_detector.nli_model.model,
+        "student": detector.student.model if detector.student is not None else None,
+    }
+    for name, module in modules.items():
+        if module is None: continue
+        try:
+            module.compile(dynamic=True)
+        except Exception:
+            logger.exception("Could not compile %s, running it eagerly", name)
+
+def warm_up(detector, compile_graphs=False):
+    """
+    Runs the sample inputs through every model, so tokenizers, torch kernels and the
+    models' internal caches are initialized before real traffic arrives, then marks the
+    process ready. Sample results are removed from the sentence caches afterwards.
+    """
+    from django.conf import settings
+
+    started = time.perf_counter()
+    try:
+        if compile_graphs:
+            compile_models(detector)
+
+        sentences = [s for text in SAMPLES for s in detector.processor.extract_sentences(text)]
+        agentic = detector.agentic_communal_detector
+
+        # Models that only run for flagged inputs are called directly
+        detector.stereotype_detector.fix_bias_batch(sentences[:2], settings.STEREOTYPE_REWRITE_TIER)
+        agentic.predict_entities(sentences)
+        agentic.fixer(f"The manager is very {agentic.fixer.tokenizer.mask_token}.")
+
+        for text in SAMPLES:
+            detector.analyze_text(text)
+            detector.analyze_text(text, mode="score")
+        detector.analyze_batch(list(SAMPLES))
+
+        detector.clear_caches()
+    except Exception:
+        logger.exception("Warm-up failed, serving with cold models")
+    finally:
+        elapsed = time.perf_counter() - started
+        registry.observe("warmup", elapsed)
+        logger.info("Warm-up finished in %.1fs", elapsed)
+        mark_ready()
+
+def start_warm_up(detector, compile_graphs=False):
+    """
+    Warms up in a background thread, so startup is not blocked. Until it finishes the
+    health endpoint reports the process as not ready.
+    """
+    thread = threading.Thread(target=warm_up, args=(detector, compile_graphs), name="model-warmup", daemon=True)
+    thread.start()
+    return thread
@@ -4,69 +4,203 @@ from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.views import View
 from django.apps import apps
-from django.core.serializers.json import DjangoJSONEncoder
 from django.http import HttpResponse
+from django.conf import settings
+from django.urls import reverse
 import json
-import io
-from pypdf import PdfReader
-import docx
-
-class NumpyEncoder(DjangoJSONEncoder):
-    def default(self, obj):
-        if hasattr(obj, 'item'):
-            return obj.item()
-        if hasattr(obj, 'tolist'):
-            return obj.tolist()
-        return super().default(obj)
+import logging
+from .models import AnalysisJob
+from .utils.document_reader import extract_text
+from .utils.encoders import NumpyEncoder
+from .utils.metrics import registry, trace_request
+from .utils.admission import Rejected
+from .utils import response_format
+
+logger = logging.getLogger(__name__)
 
 def home_view(request):
     return render(request, 'index.html')
 
+def get_detector():
+    api_config = apps.get_app_config('api')
+    detector = api_config.detector
+    
+    if detector is None:
+        from .utils.bias_detector import BiasDetector
+        detector = BiasDetector()
+    return detector
+
+def format_analysis(text, analysis, columnar=False):
+    """
+    Response body of a full analysis. columnar=True sends the biases as the parallel
+    arrays of BiasTable.to_columnar instead of a list of objects. Analyses run without
+    HTML highlighting carry the type to CSS class map instead of highlighted_html.
+    """
+    table = analysis.get('bias_table')
+    response_data = {
+        'text': text,
+        'biases': table.to_columnar() if columnar and table is not None else analysis['biases'],
+        'score': analysis['overall_score'],
+        'pronoun_stats': analysis['pronoun_stats'],
+        'word_count': analysis['word_count']
+    }
+    if analysis['highlighted_text'] is None:
+        from .utils.bias_patterns import BiasPatterns
+        response_data['highlight_classes'] = BiasPatterns.highlight_classes()
+    else:
+        response_data['highlighted_html'] = analysis['highlighted_text']
+    return response_data
+
+def format_delta(analysis, delta):
+    """
+    Response body of a full analysis sent as a delta against the client's last revision.
+    """
+    from .utils.bias_patterns import BiasPatterns
+    return {
+        'delta': delta,
+        'score': analysis['overall_score'],
+        'pronoun_stats': analysis['pronoun_stats'],
+        'word_count': analysis['word_count'],
+        'highlight_classes': BiasPatterns.highlight_classes()
+    }
+
+def format_score(analysis):
+    return {
+        'score': analysis['overall_score'],
+        'bias_count': analysis['bias_count'],
+        'counts': analysis['counts'],
+        'word_count': analysis['word_count']
+    }
+
+def get_mode(data):
+    """
+    Reads the requested analysis mode, or returns None if it is not a known one.
+    """
+    from .utils.bias_detector import BiasDetector
+    mode = data.get('mode', 'full')
+    return mode if mode in BiasDetector.MODES else None
+
+def is_string_list(value):
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+def get_ignored_texts(data):
+    """
+    The ignore list of a request. Clients with a session_id may send an ignore_version and
+    only include ignored_texts when the list changed, the server then keeps it for the
+    session. Returns None if the request relies on a list version the server does not have.
+    Callers check that ignored_texts is a list of strings first, see is_string_list.
+    """
+    session_id = data.get('session_id')
+    version = data.get('ignore_version')
+    if not session_id or version is None:
+        return data.get('ignored_texts', [])
+
+    sessions = apps.get_app_config('api').analysis_sessions
+    if 'ignored_texts' in data:
+        sessions.set_ignored(str(session_id), version, data['ignored_texts'])
+        return data['ignored_texts']
+    return sessions.get_ignored(str(session_id), version)
+
+def get_highlight(data):
+    """
+    Reads how highlights should be returned: True for server rendered HTML ("html"),
+    False for span offsets only ("spans"), None if the value is not a known one.
+    """
+    return {'html': True, 'spans': False}.get(data.get('highlight', 'html'))
+
+def get_client(request):
+    """
+    Identifies the client for per-client admission limits.
+    """
+    header = settings.ADMISSION_CLIENT_HEADER
+    value = request.META.get(header) if header else None
+    return value.split(',')[0].strip() if value else request.META.get('REMOTE_ADDR', '')
+
+def rejected_response(error):
+    response = JsonResponse({'error': str(error), 'code': error.code}, status=error.status)
+    if error.retry_after is not None:
+        response['Retry-After'] = str(error.retry_after)
+    return response
+
 @method_decorator(csrf_exempt, name='dispatch')
 class RealTimeAnalyzeView(View):    
     def post(self, request):
         try:
             data = json.loads(request.body)
             text = data.get('text', '')
-            ignored_texts = data.get('ignored_texts', [])
-            
-            if not text.strip():
+
+            mode = get_mode(data)
+            if mode is None:
+                return JsonResponse({'error': '"mode" must be "full", "detect" or "score".'}, status=400)
+
+            # Checked before get_ignored_texts stores the list for the session
+            if not is_string_list(data.get('ignored_texts', [])):
+                return JsonResponse({'error': '"ignored_texts" must be a list of strings.'}, status=400)
+
+            ignored_texts = get_ignored_texts(data)
+            if ignored_texts is None:
+                # Session evicted or served by another worker, the client re-sends the list
                 return JsonResponse({
-                    'text': '',
-                    'highlighted_html': '',
-                    'biases': [],
-                    'score': 100,
-                    'pronoun_stats': {},
-                    'word_count': 0
-                })
+                    'error': 'Unknown ignore_version for this session, send ignored_texts.',
+                    'code': 'ignored_texts_required'
+                }, status=409)
+
+            highlight = get_highlight(data)
+            if highlight is None:
+                return JsonResponse({'error': '"highlight" must be "html" or "spans".'}, status=400)
+
+            content_type = response_format.negotiate(request)
             
-            api_config = apps.get_app_config('api')
-            detector = api_config.detector
+            if not text.strip() and mode == 'full':
+                from .utils.bias_table import BiasTable
+                analysis = {
+                    'bias_table': BiasTable(), 'biases': [], 'overall_score': 100,
+                    'pronoun_stats': {}, 'word_count': 0, 'highlighted_text': '' if highlight else None
+                }
+                return response_format.render(
+                    format_analysis('', analysis, columnar=response_format.is_compact(content_type)), content_type
+                )
             
-            if detector is None:
-                from .utils.bias_detector import BiasDetector
-                detector = BiasDetector()
-
-            analysis = detector.analyze_text(text, ignored_texts)
+            detector = get_detector()
+            requested_mode = mode
+            try:
+                # Under load the analysis may run in a cheaper mode than requested
+                with apps.get_app_config('api').admission.admit(get_client(request), text, mode) as mode, trace_request() as trace:
+                    analysis = detector.analyze_text(text, ignored_texts, mode=mode, highlight=highlight)
+            except Rejected as e:
+                return rejected_response(e)
             
-            response_data = {
-                'text': text,
-                'highlighted_html': analysis['highlighted_text'],
-                'biases': analysis['biases'],
-                'score': analysis['overall_score'],
-                'pronoun_stats': analysis['pronoun_stats'],
-                'word_count': analysis['word_count']
-            }
-
-            return HttpResponse(
-                json.dumps(response_data, cls=NumpyEncoder), 
-                content_type="application/json"
-            )
+            session_id = data.get('session_id')
+            if mode == 'score':
+                response_data = format_score(analysis)
+            elif session_id and not highlight:
+                # Deltas only make sense when the client renders highlights from the offsets
+                revision, delta = apps.get_app_config('api').analysis_sessions.update(
+                    str(session_id), data.get('base_revision'), analysis['text'], analysis['biases']
+                )
+                if delta is not None:
+                    response_data = format_delta(analysis, delta)
+                    response_data['base_revision'] = data.get('base_revision')
+                else:
+                    from .utils.bias_table import BiasTable
+                    # Ids were carried over from the previous revision, rebuild the table with them
+                    analysis['bias_table'] = BiasTable()
+                    analysis['bias_table'].extend(analysis['biases'])
+                    response_data = format_analysis(text, analysis, columnar=response_format.is_compact(content_type))
+                response_data['session_id'] = session_id
+                response_data['revision'] = revision
+            else:
+                response_data = format_analysis(text, analysis, columnar=response_format.is_compact(content_type))
+            if mode != requested_mode:
+                response_data['mode'] = mode
+                response_data['requested_mode'] = requested_mode
+            if data.get('debug'):
+                response_data['debug'] = trace.to_dict()
+
+            return response_format.render(response_data, content_type)
             
         except Exception as e:
-            import traceback
-            print("SERVER ERROR DETAILS:")
-            print(traceback.format_exc())
+            logger.exception("Analysis request failed")
             return JsonResponse({
                 'error': str(e),
                 'text': '',
@@ -75,6 +209,139 @@ class RealTimeAnalyzeView(View):
                 'score': 100
             }, status=500)
 
+@method_decorator(csrf_exempt, name='dispatch')
+class BatchAnalyzeView(View):
+    def post(self, request):
+        try:
+            data = json.loads(request.body)
+            documents = data.get('documents', [])
+            ignored_texts = data.get('ignored_texts', [])
+
+            mode = get_mode(data)
+            if mode is None:
+                return JsonResponse({'error': '"mode" must be "full", "detect" or "score".', 'results': []}, status=400)
+
+            highlight = get_highlight(data)
+            if highlight is None:
+                return JsonResponse({'error': '"highlight" must be "html" or "spans".', 'results': []}, status=400)
+
+            if not is_string_list(documents):
+                return JsonResponse({'error': '"documents" must be a list of strings.', 'results': []}, status=400)
+
+            if not is_string_list(ignored_texts):
+                return JsonResponse({'error': '"ignored_texts" must be a list of strings.', 'results': []}, status=400)
+
+            max_documents = settings.ANALYSIS_BATCH_MAX_DOCUMENTS
+            if len(documents) > max_documents:
+                return JsonResponse({
+                    'error': f'A batch may contain at most {max_documents} documents.',
+                    'results': []
+                }, status=400)
+
+            content_type = response_format.negotiate(request)
+            columnar = response_format.is_compact(content_type)
+
+            detector = get_detector()
+            with trace_request() as trace:
+                analyses = detector.analyze_batch(documents, ignored_texts, batch_size=settings.ANALYSIS_BATCH_SIZE, mode=mode, highlight=highlight)
+
+            if mode == 'score':
+                results = [format_score(analysis) for analysis in analyses]
+            else:
+                results = [format_analysis(analysis['text'], analysis, columnar) for analysis in analyses]
+            response_data = {'results': results}
+            if data.get('debug'):
+                response_data['debug'] = trace.to_dict()
+
+            return response_format.render(response_data, content_type)
+
+        except Exception as e:
+            logger.exception("Analysis request failed")
+            return JsonResponse({
+                'error': str(e),
+                'results': []
+            }, status=500)
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AnalysisJobSubmitView(View):
+    def post(self, request):
+        try:
+            data = json.loads(request.body)
+            text = data.get('text', '')
+            ignored_texts = data.get('ignored_texts', [])
+
+            if not text.strip():
+                return JsonResponse({'error': 'No text provided.'}, status=400)
+
+            if not is_string_list(ignored_texts):
+                return JsonResponse({'error': '"ignored_texts" must be a list of strings.'}, status=400)
+
+            job = AnalysisJob.objects.create(text=text, ignored_texts=ignored_texts)
+            apps.get_app_config('api').job_queue.submit(job.id)
+
+            return JsonResponse({
+                'job_id': str(job.id),
+                'status': job.status,
+                'status_url': reverse('analysis-job', args=[job.id]),
+                'progress_url': reverse('analysis-job-progress', args=[job.id])
+            }, status=202)
+
+        except Exception as e:
+            logger.exception("Request failed")
+            return JsonResponse({'error': str(e)}, status=500)
+
+def job_progress(job):
+    return {
+        'job_id': str(job.id),
+        'status': job.status,
+        'sentences_processed': job.sentences_processed,
+        'sentences_total': job.sentences_total,
+        'progress': job.progress
+    }
+
+class AnalysisJobProgressView(View):
+    def get(self, request, job_id):
+        job = AnalysisJob.objects.filter(id=job_id).only(
+            'id', 'status', 'sentences_processed', 'sentences_total'
+        ).first()
+        if job is None:
+            return JsonResponse({'error': 'Job not found.'}, status=404)
+
+        return JsonResponse(job_progress(job))
+
+class AnalysisJobDetailView(View):
+    def get(self, request, job_id):
+        job = AnalysisJob.objects.filter(id=job_id).first()
+        if job is None:
+            return JsonResponse({'error': 'Job not found.'}, status=404)
+
+        response_data = job_progress(job)
+        if job.status == AnalysisJob.Status.COMPLETED:
+            response_data['result'] = job.result
+        elif job.status == AnalysisJob.Status.FAILED:
+            response_data['error'] = job.error
+
+        return HttpResponse(
+            json.dumps(response_data, cls=NumpyEncoder), 
+            content_type="application/json"
+        )
+
+class HealthView(View):
+    """
+    Readiness probe. Reports 503 until the models of this process are warmed up.
+    """
+    def get(self, request):
+        from .utils.warmup import is_ready
+        if not is_ready():
+            response = JsonResponse({'status': 'warming_up'}, status=503)
+            response['Retry-After'] = '5'
+            return response
+        return JsonResponse({'status': 'ready'})
+
+class MetricsView(View):
+    def get(self, request):
+        return HttpResponse(registry.render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
 @method_decorator(csrf_exempt, name='dispatch')
 class ApplySuggestionView(View):
     def post(self, request):
@@ -106,22 +373,11 @@ class DocumentUploadView(View):
                 
             uploaded_file = request.FILES['file']
             file_name = uploaded_file.name.lower()
-            extracted_text = ""
-
-            if file_name.endswith('.pdf'):
-                pdf_reader = PdfReader(uploaded_file)
-                for page in pdf_reader.pages:
-                    text = page.extract_text()
-                    if text:
-                        extracted_text += text + "\n"
-            elif file_name.endswith('.docx'):
-                doc = docx.Document(uploaded_file)
-                for para in doc.paragraphs:
-                    extracted_text += para.text + "\n"
-            else:
+
+            if not file_name.endswith(('.pdf', '.docx')):
                 return JsonResponse({'success': False, 'error': 'Unsupported file format. Please upload PDF or DOCX.'}, status=400)
 
-            extracted_text = extracted_text.replace('\u00A0', ' ').strip()
+            extracted_text = extract_text(uploaded_file, file_name)
 
             return JsonResponse({
                 'success': True,
@@ -129,6 +385,5 @@ class DocumentUploadView(View):
             })
 
         except Exception as e:
-            import traceback
-            print(traceback.format_exc())
+            logger.exception("Request failed")
             return JsonResponse({'success': False, 'error': str(e)}, status=500)
\ No newline at end of file
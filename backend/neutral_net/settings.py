@@ -1,4 +1,5 @@
 import os
+import json
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -59,11 +60,139 @@ USE_TZ = True
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Only used to persist asynchronous analysis jobs
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('DATABASE_PATH', BASE_DIR / 'db.sqlite3'),
+    }
+}
+
 CORS_ALLOW_ALL_ORIGINS = True
 CSRF_TRUSTED_ORIGINS = ['https://harssh3108-neutral-net-api.hf.space']
 
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'structured': {
+            'format': '%(asctime)s %(levelname)s %(name)s %(message)s',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'structured',
+        },
+    },
+    'loggers': {
+        'api': {
+            'handlers': ['console'],
+            'level': os.getenv('API_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ]
-}
\ No newline at end of file
+}
+
+# Runtime. Applied once per process before any model loads, see api/utils/runtime.py.
+# 0 keeps the PyTorch default of one intra-op thread per core, which oversubscribes the
+# CPU as soon as several workers share a host: set it to cores / workers
+TORCH_NUM_THREADS = int(os.getenv('TORCH_NUM_THREADS', '0'))
+TORCH_INTEROP_THREADS = int(os.getenv('TORCH_INTEROP_THREADS', '0'))
+TOKENIZERS_PARALLELISM = os.getenv('TOKENIZERS_PARALLELISM', 'false').lower() in ('1', 'true', 'yes')
+# Empty for no pinning, "auto" for a block of TORCH_NUM_THREADS cores per worker, or a CPU list like "0-7,16-23"
+CPU_AFFINITY = os.getenv('CPU_AFFINITY', '')
+# Index of this worker process on the host, set by the process manager. Used by CPU_AFFINITY=auto
+WORKER_INDEX = int(os.environ['WORKER_INDEX']) if os.getenv('WORKER_INDEX') else None
+
+# Startup warm-up: run sample inputs through every model before /api/health/ reports ready.
+# MODEL_COMPILE additionally compiles the classifier, sentence encoder and NLI model with torch.compile
+MODEL_WARMUP = os.getenv('MODEL_WARMUP', 'true').lower() in ('1', 'true', 'yes')
+MODEL_COMPILE = os.getenv('MODEL_COMPILE', 'false').lower() in ('1', 'true', 'yes')
+
+# "pipeline" runs every detection model, "student" one distilled multi-task model trained
+# with `manage.py distill_student`. Falls back to the pipeline if the student cannot be loaded
+DETECTION_BACKEND = os.getenv('DETECTION_BACKEND', 'pipeline')
+STUDENT_MODEL_PATH = os.getenv('STUDENT_MODEL_PATH', str(BASE_DIR / 'models' / 'student'))
+
+# Batch analysis
+ANALYSIS_BATCH_SIZE = int(os.getenv('ANALYSIS_BATCH_SIZE', '32'))
+ANALYSIS_BATCH_MAX_DOCUMENTS = int(os.getenv('ANALYSIS_BATCH_MAX_DOCUMENTS', '500'))
+
+# Real-time sessions kept per process for delta responses, least recently used are dropped
+ANALYSIS_SESSION_MAX = int(os.getenv('ANALYSIS_SESSION_MAX', '1000'))
+
+# Per-process cache budgets. Besides its entry count, each cache is bounded by the approximate
+# memory of its keys and values (max_mb) and can expire entries ttl seconds after they were
+# stored. CACHE_MAX_MB and CACHE_TTL apply to caches without their own value, 0 disables them.
+# The CACHE_LIMITS variable takes a JSON object overriding single caches, e.g. {"agentic": {"max_mb": 128}}
+CACHE_MAX_MB = float(os.getenv('CACHE_MAX_MB', '64'))
+CACHE_TTL = float(os.getenv('CACHE_TTL', '0'))
+CACHE_LIMITS = {
+    'agentic': {'max_mb': 64},
+    'stereotype': {'max_mb': 16},
+    'stereotype_rewrite': {'max_mb': 16},
+    'student': {'max_mb': 64},
+    'sentence_embeddings': {'max_mb': 32},
+    'gliner_entities': {'max_mb': 16},
+    'nli': {'max_mb': 8},
+    'ignore_matchers': {'max_mb': 16},
+    'analysis_sessions': {'max_mb': 256, 'ttl': 3600},
+    'analysis_session_ignores': {'max_mb': 32, 'ttl': 3600},
+}
+for _name, _limits in json.loads(os.getenv('CACHE_LIMITS', '{}')).items():
+    CACHE_LIMITS.setdefault(_name, {}).update(_limits)
+
+# Admission control for real-time analysis. A request costs its words plus 8 per sentence,
+# weighted by ADMISSION_MODE_COST. Full analyses are served in a cheaper mode once the cost in
+# flight reaches the ADMISSION_DEGRADE_AT fraction of ADMISSION_PROCESS_MAX_COST, and rejected
+# with 503 when no mode fits. Clients over ADMISSION_PROCESS_CLIENT_CONCURRENCY get 429, texts
+# over ADMISSION_MAX_WORDS 413. 0 disables a limit
+# The budgets are kept in each worker process, not shared: with N workers the server admits up
+# to N times ADMISSION_PROCESS_MAX_COST, and a client up to N times the concurrency
+ADMISSION_PROCESS_MAX_COST = float(os.getenv('ADMISSION_PROCESS_MAX_COST', '20000'))
+ADMISSION_PROCESS_CLIENT_CONCURRENCY = int(os.getenv('ADMISSION_PROCESS_CLIENT_CONCURRENCY', '2'))
+ADMISSION_MAX_WORDS = int(os.getenv('ADMISSION_MAX_WORDS', '20000'))
+ADMISSION_MODE_COST = {'full': 1.0, 'detect': 0.5, 'score': 0.3}
+ADMISSION_DEGRADE_AT = {'detect': 0.5, 'score': 0.8}
+# Request header naming the client behind a proxy, e.g. HTTP_X_FORWARDED_FOR. REMOTE_ADDR otherwise
+ADMISSION_CLIENT_HEADER = os.getenv('ADMISSION_CLIENT_HEADER', '')
+
+# Asynchronous analysis jobs. Set to 0 to run jobs only through `manage.py run_analysis_worker`
+ANALYSIS_JOB_WORKERS = int(os.getenv('ANALYSIS_JOB_WORKERS', '1'))
+# Workers write a heartbeat on their running jobs every ANALYSIS_JOB_HEARTBEAT_SECONDS. When a
+# worker starts, running jobs whose process is gone (no heartbeat for ANALYSIS_JOB_STALE_SECONDS,
+# or a dead process on this host) are queued again
+ANALYSIS_JOB_HEARTBEAT_SECONDS = float(os.getenv('ANALYSIS_JOB_HEARTBEAT_SECONDS', '30'))
+ANALYSIS_JOB_STALE_SECONDS = int(os.getenv('ANALYSIS_JOB_STALE_SECONDS', '180'))
+
+# Agentic/communal cascade. Sentences without a skew lexicon hit whose embedding scores below
+# the threshold exit before subject detection. Set the threshold to 0 to disable the early exit
+AGENTIC_SCREEN_THRESHOLD = float(os.getenv('AGENTIC_SCREEN_THRESHOLD', '0.10'))
+AGENTIC_SCREEN_LEXICON = os.getenv('AGENTIC_SCREEN_LEXICON', 'true').lower() in ('1', 'true', 'yes')
+
+# Precomputed MiniLM word embeddings, built with `manage.py build_embedding_table` and opened
+# with mmap. Words missing from it are encoded on demand. Empty disables it
+EMBEDDING_TABLE_PATH = os.getenv('EMBEDDING_TABLE_PATH', str(BASE_DIR / 'models' / 'embeddings'))
+
+# Precomputed neutral alternatives for flagged agentic/communal words, built with
+# `manage.py build_synonym_lexicon`. Replacements fall back to fill-mask without it. Empty disables it
+SYNONYM_LEXICON_PATH = os.getenv('SYNONYM_LEXICON_PATH', str(BASE_DIR / 'models' / 'synonym_lexicon.json.gz'))
+
+# Stereotype rewriter decoding per latency tier, passed straight to generate()
+STEREOTYPE_REWRITE_TIERS = {
+    'quality': {'num_beams': 4, 'max_length': 128, 'early_stopping': True},
+    'balanced': {'num_beams': 2, 'max_new_tokens': 96, 'early_stopping': True},
+    'fast': {'num_beams': 1, 'max_new_tokens': 64},
+    # Greedy decoding that drafts tokens by copying from the input sentence, see StereotypeDetector.generate_speculative
+    'speculative': {'speculative': True, 'max_new_tokens': 128, 'draft_tokens': 10},
+}
+# Tier for real-time analysis and for batch analysis, jobs and audits respectively
+STEREOTYPE_REWRITE_TIER = os.getenv('STEREOTYPE_REWRITE_TIER', 'quality')
+STEREOTYPE_BATCH_REWRITE_TIER = os.getenv('STEREOTYPE_BATCH_REWRITE_TIER', 'quality')
+STEREOTYPE_REWRITE_BATCH_SIZE = int(os.getenv('STEREOTYPE_REWRITE_BATCH_SIZE', '8'))
@@ -13,6 +13,11 @@ class NeutralNet {
         this.lastCursorPosition = null;
         this.isUpdatingHighlights = false;
         this.shouldSkipNextAnalysis = false; 
+        this.sessionId = window.crypto && crypto.randomUUID ? crypto.randomUUID() : `${Date.now()}-${Math.random()}`;
+        this.revision = null;
+        // The backend keeps the ignore list per session, it is only re-sent when the version changes
+        this.ignoreVersion = 0;
+        this.syncedIgnoreVersion = null;
         
         this.initializeElements();
         this.bindEvents();
@@ -80,6 +85,15 @@ class NeutralNet {
                 this.closeAllTooltips();
             }
         });
+
+        // One delegated handler, so patched highlights need no listeners of their own
+        this.editableDiv.addEventListener('click', (e) => {
+            const element = e.target.closest('.bias-highlight');
+            if (!element || !element.dataset.biasId) return;
+            e.preventDefault();
+            e.stopPropagation();
+            showBiasSuggestion(element.dataset.biasId);
+        });
     }
     
     loadInitialDemo() {
@@ -259,7 +273,11 @@ class NeutralNet {
         return text;
     }
     
-    async analyzeText(text) {
+    markIgnoredChanged() {
+        this.ignoreVersion += 1;
+    }
+
+    async analyzeText(text, retried = false) {
         if (!text.trim()) {
             this.updateUIWithEmptyResults();
             this.editableDiv.textContent = '';
@@ -267,38 +285,77 @@ class NeutralNet {
         }
         
         try {
+            const payload = {
+                text: text,
+                highlight: 'spans',
+                session_id: this.sessionId,
+                base_revision: this.revision,
+                ignore_version: this.ignoreVersion
+            };
+            const ignoreVersion = this.ignoreVersion;
+            if (ignoreVersion !== this.syncedIgnoreVersion) {
+                payload.ignored_texts = Array.from(this.ignoredBiases);
+            }
+
             const response = await fetch(`${API_BASE_URL}/api/real-time-analyze/`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
                     'X-CSRFToken': this.getCookie('csrftoken')
                 },
-                body: JSON.stringify({ 
-                    text: text,
-                    ignored_texts: Array.from(this.ignoredBiases) 
-                })
+                body: JSON.stringify(payload)
             });
             
+            if (response.status === 409 && !retried) {
+                // The server lost this session's ignore list, send it again
+                this.syncedIgnoreVersion = null;
+                return this.analyzeText(text, true);
+            }
+
+            if (response.status === 429 || response.status === 503) {
+                // Server busy: retry after its hint, unless typing schedules a newer analysis first
+                const retryAfter = parseInt(response.headers.get('Retry-After'), 10) || 2;
+                this.updateStatus('busy');
+                clearTimeout(this.debounceTimer);
+                this.debounceTimer = setTimeout(() => this.analyzeText(text), retryAfter * 1000);
+                return;
+            }
+
+            if (response.status === 413) {
+                this.updateStatus('tooLarge');
+                return;
+            }
+
             if (!response.ok) {
                 throw new Error(`Analysis failed: ${response.status}`);
             }
             
             const data = await response.json();
+            this.syncedIgnoreVersion = ignoreVersion;
 
             const currentText = this.getPlainTextFromEditable();
             if (currentText !== text) {
                 return;
             }
 
-            this.currentBiases = data.biases || [];
+            if (data.mode === 'score') {
+                // Degraded under load to a score only response, keep the current highlights
+                this.updateScore(data.score);
+                this.updateStatus('degraded');
+                return;
+            }
+
+            this.currentBiases = data.delta ? this.applyDelta(data.delta) : (data.biases || []);
+            this.revision = data.revision ?? null;
             
             this.isUpdatingHighlights = true;
-            await this.updateEditableWithHighlights(data.highlighted_html || data.highlighted_text, text);
+            this.highlightClasses = data.highlight_classes || this.highlightClasses || {};
+            this.renderHighlights(this.currentBiases, text);
             
             this.updateScore(data.overall_score || data.score);
-            this.updateBiasCounts(data.biases);
-            this.updateSuggestions(data.biases);
-            this.updateStatus('success');
+            this.updateBiasCounts(this.currentBiases);
+            this.updateSuggestions(this.currentBiases);
+            this.updateStatus(data.mode ? 'degraded' : 'success');
             
             setTimeout(() => {
                 this.restoreCursorPosition();
@@ -307,54 +364,106 @@ class NeutralNet {
             
         } catch (error) {
             console.error('Error analyzing text:', error);
+            this.revision = null;
             this.updateStatus('error');
             this.editableDiv.textContent = text;
             this.isUpdatingHighlights = false;
         }
     }
     
-    async updateEditableWithHighlights(highlightedHtml, originalText) {
-        if (highlightedHtml && highlightedHtml.includes('bias-highlight')) {
-            const scrollTop = this.editableDiv.scrollTop;
-            
-            let processedHtml = highlightedHtml
-                .replace(/&nbsp;/g, ' ')
-                .replace(/\s+/g, ' ');
-            
-            this.editableDiv.innerHTML = processedHtml;
-            this.editableDiv.scrollTop = scrollTop;
-            this.editableDiv.setAttribute('contenteditable', 'true');
-            
-            this.setupBiasClickHandlers();
-        } else {
+    applyDelta(delta) {
+        // Biases keep their ids across revisions, so the delta is applied by id
+        const removed = new Set(delta.removed);
+        const moved = new Map(delta.moved.map(change => [change.id, change.position]));
+
+        return this.currentBiases
+            .filter(bias => !removed.has(bias.id))
+            .map(bias => moved.has(bias.id) ? { ...bias, position: moved.get(bias.id) } : bias)
+            .concat(delta.added)
+            .sort((a, b) => a.position.start - b.position.start);
+    }
+
+    renderHighlights(biases, originalText) {
+        // Highlights are rendered from the bias offsets instead of server HTML. Spans whose
+        // range and type did not change are kept (only their bias id is refreshed), stale ones
+        // are unwrapped and new ones are wrapped around their DOM range, so the text and the
+        // cursor marker are left in place.
+        const scrollTop = this.editableDiv.scrollTop;
+
+        const domText = this.getEditableTextNodes().map(node => node.data).join('').replace(/\s/g, ' ');
+        if (domText !== originalText) {
+            // Offsets refer to the normalized text, so a DOM whose text differs by more than
+            // single whitespace characters (e.g. collapsed runs of spaces) is reset
             this.editableDiv.textContent = originalText;
         }
-    }
-    
-    setupBiasClickHandlers() {
-        const biasElements = this.editableDiv.querySelectorAll('.bias-highlight');
-        biasElements.forEach(element => {
-            const biasId = element.dataset.biasId;
-            if (biasId) {
-                element.onclick = null;
-                
-                element.onclick = (e) => {
-                    e.preventDefault();
-                    e.stopPropagation();
-                    showBiasSuggestion(biasId);
-                };
-                
-                element.addEventListener('mouseenter', () => {
-                    element.style.transform = 'translateY(-1px)';
-                    element.style.boxShadow = '0 2px 8px rgba(0, 0, 0, 0.1)';
-                });
-                
-                element.addEventListener('mouseleave', () => {
-                    element.style.transform = '';
-                    element.style.boxShadow = '';
-                });
+
+        const wanted = new Map();
+        let lastEnd = 0;
+        [...biases]
+            .filter(bias => bias.position && bias.id)
+            .sort((a, b) => a.position.start - b.position.start)
+            .forEach(bias => {
+                const start = Math.max(0, bias.position.start);
+                const end = Math.min(originalText.length, bias.position.end);
+                if (start < lastEnd || end <= start) return;
+                wanted.set(`${start}:${end}:${bias.type}`, { bias, start, end });
+                lastEnd = end;
+            });
+
+        this.editableDiv.querySelectorAll('.bias-highlight').forEach(element => {
+            const match = wanted.get(element.dataset.span);
+            if (match) {
+                element.dataset.biasId = match.bias.id;
+                wanted.delete(element.dataset.span);
+            } else {
+                element.replaceWith(...element.childNodes);
             }
         });
+        this.editableDiv.normalize();
+
+        // Wrapping from the end keeps the offsets of the spans still to be wrapped valid
+        [...wanted.entries()].reverse().forEach(([key, { bias, start, end }]) => {
+            const range = this.rangeFromOffsets(start, end);
+            if (!range) return;
+
+            const span = document.createElement('span');
+            span.className = `bias-highlight ${this.highlightClasses[bias.type] || 'bias-other'}`;
+            span.dataset.biasId = bias.id;
+            span.dataset.span = key;
+            span.appendChild(range.extractContents());
+            range.insertNode(span);
+        });
+
+        this.editableDiv.scrollTop = scrollTop;
+    }
+
+    getEditableTextNodes() {
+        const walker = document.createTreeWalker(this.editableDiv, NodeFilter.SHOW_TEXT, {
+            acceptNode: node => node.parentNode.closest('#cursor-marker') ? NodeFilter.FILTER_REJECT : NodeFilter.FILTER_ACCEPT
+        });
+        const nodes = [];
+        while (walker.nextNode()) nodes.push(walker.currentNode);
+        return nodes;
+    }
+
+    rangeFromOffsets(start, end) {
+        const range = document.createRange();
+        let offset = 0;
+        let startSet = false;
+
+        for (const node of this.getEditableTextNodes()) {
+            const length = node.data.length;
+            if (!startSet && start < offset + length) {
+                range.setStart(node, start - offset);
+                startSet = true;
+            }
+            if (startSet && end <= offset + length) {
+                range.setEnd(node, end - offset);
+                return range;
+            }
+            offset += length;
+        }
+        return null;
     }
     
     setCursorToEnd() {
@@ -555,12 +664,15 @@ class NeutralNet {
             const suggestion = document.createElement('div');
             suggestion.className = 'suggestion-item';
             suggestion.dataset.biasId = bias.id;
+            // Detect mode results carry no suggestion, only the highlight
+            const hasSuggestion = bias.suggestion || (bias.alternatives && bias.alternatives.length > 0);
             
             suggestion.innerHTML = `
                 <div class="suggestion-text">
                     <strong>${(bias.type || 'bias').replace('_', ' ').toUpperCase()}:</strong>
                     "${bias.target_text || bias.targetText || ''}" - ${bias.description || 'Bias detected'}
                 </div>
+                ${hasSuggestion ? `
                 <div class="suggestion-actions">
                     <input type="text" 
                         class="suggestion-replace" 
@@ -570,6 +682,7 @@ class NeutralNet {
                         Apply
                     </button>
                 </div>
+                ` : ''}
             `;
             this.suggestionsContainer.appendChild(suggestion);
         });
@@ -596,7 +709,10 @@ class NeutralNet {
             ready: { text: '● Ready', color: '#10b981' },
             analyzing: { text: '● Analyzing...', color: '#f59e0b' },
             success: { text: '● Analysis complete', color: '#10b981' },
-            error: { text: '● Error analyzing', color: '#ef4444' }
+            error: { text: '● Error analyzing', color: '#ef4444' },
+            busy: { text: '● Server busy, retrying...', color: '#f59e0b' },
+            degraded: { text: '● Analysis complete (reduced under load)', color: '#f59e0b' },
+            tooLarge: { text: '● Text too long for live analysis', color: '#ef4444' }
         };
         
         const config = statusConfig[status] || statusConfig.ready;
@@ -627,6 +743,7 @@ class NeutralNet {
         this.currentText = '';
         this.currentBiases = [];
         this.ignoredBiases.clear(); 
+        this.markIgnoredChanged();
         this.lastCursorPosition = null;
         this.shouldSkipNextAnalysis = false;
         
@@ -680,6 +797,7 @@ class NeutralNet {
 
             if (data.success) {
                 this.ignoredBiases.clear();
+                this.markIgnoredChanged();
                 this.editableDiv.textContent = data.text;
                 
                 setTimeout(() => {
@@ -751,8 +869,8 @@ function showBiasSuggestion(biasId) {
             <button onclick="closeAllPopups()" style="background: none; border: none; font-size: 20px; cursor: pointer; color: #666;">×</button>
         </div>
         <div style="margin-bottom: 16px;">
-            <p><strong>Issue:</strong> ${bias.description}</p>
-            <p><strong>Suggestion:</strong> ${bias.suggestion}</p>
+            <p><strong>Issue:</strong> ${bias.description || 'Bias detected'}</p>
+            ${bias.suggestion ? `<p><strong>Suggestion:</strong> ${bias.suggestion}</p>` : ''}
         </div>
         ${bias.alternatives && bias.alternatives.length > 0 ? `
             <div style="margin-bottom: 16px;">
@@ -881,6 +999,7 @@ function ignoreBias(biasId) {
         console.log(`Successfully extracted word to ignore: "${cleanWord}"`);
         
         neutralNet.ignoredBiases.add(cleanWord);
+        neutralNet.markIgnoredChanged();
         console.log("Current Ignored List being sent to backend:", Array.from(neutralNet.ignoredBiases));
         
         neutralNet.statusIndicator.textContent = '● Updating...';